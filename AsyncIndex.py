@@ -0,0 +1,122 @@
+from utilities.Point import Point
+from utilities.Rectangle import Rectangle
+from utilities.NodeArrays import as_points, as_rectangles
+
+import asyncio
+
+# both run in the executor, where they take the arrays of the tree, building them if it was changed
+# answer a batch of rectangles in one traversal of the arrays, the coordinates found in every rectangle in the order of search_in_rectangle
+def _search_batch(tree, lower, upper):
+    arrays = tree._node_arrays()
+    offsets, positions = arrays.search_positions(lower, upper)
+    coordinates = arrays.points[positions].tolist()
+    offsets = offsets.tolist()
+    return [coordinates[offsets[i]:offsets[i + 1]] for i in range(len(lower))]
+
+def _contains_batch(tree, points):
+    return tree._node_arrays().contains(points).tolist()
+
+class AsyncIndex:
+    """
+    Asyncio front end of a KdTree, QuadTree, FlatKdTree or MappedTree. Requests made while a batch is collected are
+    answered together: the first request of a batch waits window seconds for others, a batch of max_batch requests
+    is sent at once. Every batch runs as one traversal of the tree's NodeArrays in the executor (the loop's default
+    one if None), so the event loop is blocked neither by the search nor by building the arrays after the tree was
+    changed. One batch of searches and one of contains run at
+    a time, the requests arriving meanwhile are sent as the next batch when it ends, so batches grow with the load.
+    The points found in a rectangle are those of search_in_rectangle, in the same order and as floats.
+    The tree may be changed between batches: every batch uses the snapshot of the tree at the time it runs, so the
+    tree must not be changed while a batch is running.
+    """
+    def __init__(self, tree, window=0.001, max_batch=1024, executor=None):
+        if window < 0:
+            raise ValueError("The batch window must be non-negative.")
+        if max_batch < 1:
+            raise ValueError("The maximum batch size must be at least 1.")
+        self._tree = tree
+        self._dimension = tree._dimension
+        self._window = window
+        self._max_batch = max_batch
+        self._executor = executor
+        self._pending = {"search": [], "contains": []}    # (query, future) of the requests of the batch being collected
+        self._timers = {}                                 # call_later handle ending the window of the batch of a kind
+        self._running = {}                                # task of the batch of a kind being answered
+        self._requests = 0
+        self._batches = 0
+        self._largest = 0
+
+    # find all points in the given rectangle
+    async def search(self, rectangle, raw=False):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError("The rectangle has different dimension than the points in the tree.")
+        result = await self._request("search", rectangle)
+        if raw:
+            return result
+        return [Point(point) for point in result]
+
+    # check if the tree contains the point
+    async def contains(self, point):
+        if len(point) != self._dimension:
+            raise ValueError("The point has different dimension than the points in the tree.")
+        return await self._request("contains", tuple(point))
+
+    # number of requests and batches answered, the mean and the largest batch size
+    def stats(self):
+        return {"requests": self._requests, "batches": self._batches,
+                "mean_batch": self._requests / self._batches if self._batches else 0.0, "largest_batch": self._largest}
+
+    def _request(self, kind, query):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending[kind]
+        pending.append((query, future))
+        if len(pending) == 1:
+            self._timers[kind] = loop.call_later(self._window, self._expire, kind)
+        if len(pending) >= self._max_batch and kind not in self._running:
+            self._send(kind)
+        return future
+
+    # the window of the batch ends, it is sent now or when the running batch ends
+    def _expire(self, kind):
+        del self._timers[kind]
+        if kind not in self._running:
+            self._send(kind)
+
+    # run up to max_batch of the requests collected, the rest start the next batch
+    def _send(self, kind):
+        timer = self._timers.pop(kind, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._pending[kind]
+        batch, self._pending[kind] = pending[:self._max_batch], pending[self._max_batch:]
+        self._running[kind] = asyncio.get_running_loop().create_task(self._run(kind, batch))
+        self._running[kind].add_done_callback(lambda _: self._next(kind))
+
+    # after a batch, send the requests whose window ended while it ran
+    def _next(self, kind):
+        del self._running[kind]
+        pending = self._pending[kind]
+        if pending and (kind not in self._timers or len(pending) >= self._max_batch):
+            self._send(kind)
+
+    async def _run(self, kind, batch):
+        self._requests += len(batch)
+        self._batches += 1
+        self._largest = max(self._largest, len(batch))
+        queries = [query for query, _ in batch]
+        try:
+            if kind == "search":
+                arguments = (_search_batch, self._tree, *as_rectangles(queries, self._dimension))
+            else:
+                arguments = (_contains_batch, self._tree, as_points(queries, self._dimension))
+            results = await asyncio.get_running_loop().run_in_executor(self._executor, *arguments)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
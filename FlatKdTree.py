@@ -0,0 +1,221 @@
+from utilities.Point import Point
+from utilities.Rectangle import Rectangle
+from utilities.NodeArrays import NodeArrays, as_points, as_rectangles, as_unique_rows, expand
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+class FlatKdTree:
+    """
+    KdTree stored as contiguous NumPy arrays instead of one KdTreeNode object per split.
+    Node i covers the slice [start[i], end[i]) of the index array, which holds the rows of the
+    coordinate array in leaf order, so a whole subtree can be emitted as one slice. Splitting
+    follows KdTreeNode: points lower or equal to the median go to the left subtree.
+    """
+    def __init__(self, points, depth=0, leaf_size=1, workers=1):
+        if len(points) == 0:
+            raise ValueError("The list of points is empty.")
+        if not all(len(point) == len(points[0]) for point in points):
+            raise ValueError("The points have different dimensions.")
+        if leaf_size < 1:
+            raise ValueError("The leaf size must be at least 1.")
+        if workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+        coords = np.array([tuple(point) for point in points])
+        if len(np.unique(coords, axis=0)) != len(coords):
+            raise ValueError("The points are not unique.")
+        self._dimension = coords.shape[1]
+        self._leaf_size = leaf_size
+        self._arrays = None
+        self._build(coords, depth, workers)
+
+    # build the tree on the rows of an (n, d) float32/float64 array or buffer without copying it: the tree keeps the
+    # array and refers to its rows by index, so the array must not be changed while the tree is in use
+    @classmethod
+    def from_array(cls, array, depth=0, leaf_size=1, workers=1):
+        array, _, _ = as_unique_rows(array)
+        if leaf_size < 1:
+            raise ValueError("The leaf size must be at least 1.")
+        if workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+        tree = cls.__new__(cls)
+        tree._dimension = array.shape[1]
+        tree._leaf_size = leaf_size
+        tree._arrays = None
+        tree._build(array, depth, workers)
+        return tree
+
+    # with more than one worker the top levels are split here until the nodes hold at most 1 / (4 * workers) of the
+    # points, a pool of processes lays out the subtrees below them and their blocks are stitched into the arrays
+    # the tree is the one a single process builds, only its nodes are numbered in another order
+    def _build(self, coords, depth, workers=1):
+        limit = len(coords) // (4 * workers) if workers > 1 else 0
+        arrays, pending = self._layout(coords, depth, self._leaf_size, coords.min(axis=0), coords.max(axis=0), limit)
+        if pending:
+            axis, split, left, right, start, end, lower, upper, index = arrays
+            with ProcessPoolExecutor(workers) as pool:
+                blocks = list(pool.map(FlatKdTree._layout, [coords[index[start[node]:end[node]]] for node, _ in pending],
+                                       [depth for _, depth in pending], repeat(self._leaf_size),
+                                       [lower[node] for node, _ in pending], [upper[node] for node, _ in pending]))
+            arrays = self._stitch(arrays, pending, [block for block, _ in blocks])
+        self._axis, self._split, self._left, self._right, self._start, self._end, self._lower, self._upper, self._index = arrays
+        self._coords = coords                             # coordinates in the order they were given
+
+    # lay out the tree of the rows of coords in the rectangle [lower, upper], nodes of at most limit points are not split
+    # returns the arrays (axis, split, left, right, start, end, lower, upper, index) and the (node, depth) of the nodes
+    # left unsplit because of limit
+    @staticmethod
+    def _layout(coords, depth, leaf_size, lower, upper, limit=0):
+        n, d = coords.shape
+        capacity = 2 * n                                  # every split has two non-empty children
+        itype = np.int32 if capacity < 2**31 else np.int64
+        axes = np.full(capacity, -1, dtype=np.int8)       # split axis, -1 for leaves
+        splits = np.zeros(capacity, dtype=coords.dtype)
+        lefts = np.full(capacity, -1, dtype=itype)
+        rights = np.full(capacity, -1, dtype=itype)
+        starts = np.zeros(capacity, dtype=itype)          # slice of the index array covered by the node
+        ends = np.zeros(capacity, dtype=itype)
+        lowers = np.zeros((capacity, d), dtype=coords.dtype)    # rectangle of the node
+        uppers = np.zeros((capacity, d), dtype=coords.dtype)
+        index = np.arange(n, dtype=itype)                 # row of every point in leaf order
+        lowers[0] = lower
+        uppers[0] = upper
+        count = 1
+        pending = []
+        stack = [(0, 0, n, depth)]
+        while stack:
+            node, start, end, depth = stack.pop()
+            starts[node] = start
+            ends[node] = end
+            if end - start <= leaf_size:
+                continue
+            if end - start <= limit:
+                pending.append((node, depth))
+                continue
+            segment = index[start:end]
+            # points sharing every split coordinate with the median would all go left, try the next axis
+            for shift in range(d):
+                axis = (depth + shift) % d
+                values = coords[segment, axis]
+                median = (len(values) - 1) // 2
+                split = np.partition(values, median)[median]
+                mask = values <= split
+                size = int(np.count_nonzero(mask))
+                if size < len(values):
+                    break
+            else:
+                continue
+            index[start:end] = np.concatenate((segment[mask], segment[~mask]))
+            left, right = count, count + 1
+            count += 2
+            axes[node] = axis
+            splits[node] = split
+            lefts[node] = left
+            rights[node] = right
+            lowers[left] = lowers[right] = lowers[node]
+            uppers[left] = uppers[right] = uppers[node]
+            uppers[left, axis] = lowers[right, axis] = split
+            stack.append((right, start + size, end, depth + shift + 1))
+            stack.append((left, start, start + size, depth + shift + 1))
+        arrays = tuple(array[:count].copy() for array in (axes, splits, lefts, rights, starts, ends, lowers, uppers))
+        return arrays + (index,), pending
+
+    # put the block laid out for every pending node under it: the first node of a block is the pending node itself,
+    # the others are appended with their children, slices and rows moved to where the block lies in the tree
+    @staticmethod
+    def _stitch(arrays, pending, blocks):
+        axis, split, left, right, start, end, lower, upper, index = arrays
+        parts = [[array] for array in arrays[:-1]]
+        used = len(axis)
+        for (node, _), block in zip(pending, blocks):
+            b_axis, b_split, b_left, b_right, b_start, b_end, b_lower, b_upper, b_index = block
+            b_left, b_right = (np.where(children > 0, children.astype(left.dtype) + (used - 1), -1) for children in (b_left, b_right))
+            b_start, b_end = (bounds.astype(start.dtype) + start[node] for bounds in (b_start, b_end))
+            axis[node], split[node], left[node], right[node] = b_axis[0], b_split[0], b_left[0], b_right[0]
+            index[start[node]:end[node]] = index[start[node]:end[node]][b_index]
+            for part, array in zip(parts, (b_axis, b_split, b_left, b_right, b_start, b_end, b_lower, b_upper)):
+                part.append(array[1:])
+            used += len(b_axis) - 1
+        return tuple(np.concatenate(part) for part in parts) + (index,)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ("_axis", "_split", "_left", "_right", "_start",
+                                                           "_end", "_lower", "_upper", "_index", "_coords"))
+
+    # check if the tree contains the point
+    def if_contains(self, point):
+        if len(point) != self._dimension:
+            raise ValueError("The point has different dimension than the points in the tree.")
+        point = tuple(point)
+        if not all(low <= x <= high for low, x, high in zip(self._lower[0].tolist(), point, self._upper[0].tolist())):
+            return False
+        node = 0
+        while self._axis[node] >= 0:
+            if self._split[node] >= point[self._axis[node]]:
+                node = self._left[node]
+            else:
+                node = self._right[node]
+        leaf = self._coords[self._index[self._start[node]:self._end[node]]]
+        return bool(np.any(np.all(leaf == point, axis=1)))
+
+    # find all points in the given rectangle
+    def search_in_rectangle(self, rectangle, raw=False):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError("The rectangle has different dimension than the points in the tree.")
+        positions = self._search_positions(np.array(rectangle.lowerleft._point), np.array(rectangle.upperright._point))
+        result = self._coords[self._index[positions]].tolist()
+        if raw:
+            return result
+        return [Point(point) for point in result]
+
+    # positions in the index array of all points in [lower, upper], in leaf order
+    def _search_positions(self, lower, upper):
+        frontier = np.zeros(1, dtype=np.int64)
+        starts, ends = [], []
+        while len(frontier):
+            node_lower = self._lower[frontier]
+            node_upper = self._upper[frontier]
+            intersects = np.all((node_lower <= upper) & (node_upper >= lower), axis=1)
+            frontier = frontier[intersects]
+            contained = np.all((node_lower[intersects] >= lower) & (node_upper[intersects] <= upper), axis=1)
+            starts.append(self._start[frontier[contained]])
+            ends.append(self._end[frontier[contained]])
+            frontier = frontier[~contained]
+            leaves = frontier[self._axis[frontier] < 0]
+            if len(leaves):
+                hits = expand(self._start[leaves], self._end[leaves])
+                points = self._coords[self._index[hits]]
+                hits = hits[np.all((points >= lower) & (points <= upper), axis=1)]
+                starts.append(hits)
+                ends.append(hits + 1)
+            frontier = frontier[self._axis[frontier] >= 0]
+            frontier = np.concatenate((self._left[frontier], self._right[frontier]))
+        starts = np.concatenate(starts)
+        ends = np.concatenate(ends)
+        order = np.argsort(starts, kind="stable")
+        return expand(starts[order], ends[order])
+
+    # find the points in many rectangles (Rectangle objects or an (m, 2, d) array) in one traversal
+    # the points of rectangles[i] are indices[offsets[i]:offsets[i+1]], positions in the list given to the tree
+    def search_in_rectangles(self, rectangles):
+        lower, upper = as_rectangles(rectangles, self._dimension)
+        return self._node_arrays().search_rectangles(lower, upper)
+
+    # check many points (an (m, d) array) at once, returns a boolean array
+    def contains_many(self, points):
+        return self._node_arrays().contains(as_points(points, self._dimension))
+
+    # the snapshot holds the coordinates in leaf order, so it copies them on first use
+    def _node_arrays(self):
+        if self._arrays is None:
+            split = np.full(self._lower.shape, np.nan)
+            inner = np.flatnonzero(self._axis >= 0)
+            split[inner, self._axis[inner]] = self._split[inner]
+            self._arrays = NodeArrays(self._lower, self._upper, np.column_stack((self._left, self._right)), split,
+                                      self._start, self._end, self._coords[self._index], self._index)
+        return self._arrays
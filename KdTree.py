@@ -1,20 +1,68 @@
-from utilities.Point import Point
+from utilities.Point import Point, METRICS
 from utilities.Rectangle import Rectangle
+from utilities.NodeArrays import NodeArrays, as_points, as_rectangles, as_unique_rows
+from utilities.Aggregate import Aggregate
+from utilities.QueryStats import QueryStats, QueryTracer
+from MappedTree import MappedTree
 
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
+from itertools import compress, count, islice, repeat
+import gc
+import heapq
+import time
+
+import numpy as np
 
 class KdTree:
-    def __init__(self, points, depth=0, points_in_node=False):
+    def __init__(self, points, depth=0, points_in_node=False, leaf_size=1, weights=None, workers=1):
         if len(points) == 0:
             raise ValueError("The list of points is empty.")
         if not all(len(point) == len(points[0]) for point in points):
             raise ValueError("The points have different dimensions.")
+        if leaf_size < 1:
+            raise ValueError("The leaf size must be at least 1.")
+        if weights is not None and len(weights) != len(points):
+            raise ValueError("The number of weights differs from the number of points.")
+        if workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
         points = [Point(point) for point in points]
         if len(set(points)) != len(points):
             raise ValueError("The points are not unique.")
-        self._root = KdTreeNode(points, Rectangle.from_points(points), depth, points_in_node)
+        self._setup(points, Rectangle.from_points(points), depth, points_in_node, leaf_size, weights, workers=workers)
+
+    # build the tree on the rows of an (n, d) float32/float64 array or buffer: bounds and uniqueness are checked
+    # on the array with NumPy and the build takes the coordinates from it, but the nodes still hold one Point per row,
+    # its coordinates copied into Python floats, so the tree takes as much memory as one built by the constructor
+    # positions in batched queries are the rows of the array
+    @classmethod
+    def from_array(cls, array, depth=0, points_in_node=False, leaf_size=1, weights=None, workers=1):
+        array, lower, upper = as_unique_rows(array)
+        if leaf_size < 1:
+            raise ValueError("The leaf size must be at least 1.")
+        if weights is not None and len(weights) != len(array):
+            raise ValueError("The number of weights differs from the number of points.")
+        if workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+        tree = cls.__new__(cls)
+        points = list(map(Point._of, zip(*array.T.tolist())))
+        tree._setup(points, Rectangle._of(Point._of(lower), Point._of(upper)), depth, points_in_node, leaf_size, weights, array, workers)
+        return tree
+
+    # build the tree on unique points, coords being their coordinates as an array if at hand
+    # the splits are planned as arrays, with more than one worker in a pool of processes, see KdTreeNode._build_planned
+    def _setup(self, points, rectangle, depth, points_in_node, leaf_size, weights, coords=None, workers=1):
+        self._root = KdTreeNode._build_planned(points, rectangle, depth, points_in_node, leaf_size, coords, workers)
         self._points_in_node = points_in_node
+        self._leaf_size = leaf_size
         self._dimension = len(points[0])
+        self._points = dict.fromkeys(points)  # points in the order they were given or inserted
+        self._arrays = None                   # NodeArrays snapshot for batched queries, built on first use
+        self._tracer = None                   # QueryTracer sampling the rectangle queries, see instrument
+        self._weights = None                  # weight of every point, aggregated in the nodes
+        if weights is not None:
+            self._weights = dict(zip(points, weights))
+            self._root._aggregate_weights(self._weights)
 
     # check if the tree contains the point
     def if_contains(self, point):
@@ -22,7 +70,7 @@ class KdTree:
             raise ValueError("The point has different dimension than the points in the tree.")
         if not isinstance(point, Point):
             point = Point(point)
-        if self._root._rectangle.contains(point):
+        if self._root._rectangle._contains_point(point):
             return self._root._if_contains(point)
         return False
     
@@ -32,6 +80,8 @@ class KdTree:
             raise ValueError("The rectangle is not a Rectangle object.")
         if len(rectangle) != self._dimension:
             raise ValueError("The rectangle has different dimension than the points in the tree.")
+        if self._tracer is not None and self._tracer.sampled():
+            return self._traced("search", rectangle, raw)
         area = rectangle.intersection(self._root._rectangle)
         if area is None:
             return []
@@ -40,12 +90,239 @@ class KdTree:
             return [point.point for point in result]
         return result
 
+    # yield the points in the given rectangle one by one, at most limit of them
+    def iter_in_rectangle(self, rectangle, limit=None, raw=False):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError("The rectangle has different dimension than the points in the tree.")
+        if limit is not None and limit < 0:
+            raise ValueError("The limit must be non-negative.")
+        area = rectangle.intersection(self._root._rectangle)
+        if area is None:
+            return iter(())
+        result = islice(self._root._iter_rectangle(area, self._points_in_node), limit)
+        if raw:
+            return (point.point for point in result)
+        return result
+
+    # count the points in the given rectangle without collecting them
+    def count_in_rectangle(self, rectangle):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError("The rectangle has different dimension than the points in the tree.")
+        if self._tracer is not None and self._tracer.sampled():
+            return self._traced("count", rectangle)
+        area = rectangle.intersection(self._root._rectangle)
+        if area is None:
+            return 0
+        return self._root._count_rectangle(area)
+
+    # count, sum, min and max of the weights of the points in the given rectangle
+    def aggregate_in_rectangle(self, rectangle):
+        if self._weights is None:
+            raise ValueError("The tree was built without weights.")
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError("The rectangle has different dimension than the points in the tree.")
+        area = rectangle.intersection(self._root._rectangle)
+        if area is None:
+            return Aggregate.empty()
+        return self._root._aggregate_rectangle(area, self._weights)
+
+    # trace every sample-th search_in_rectangle and count_in_rectangle, callback(kind, rectangle, stats) gets the
+    # QueryStats of each traced query; untraced queries take the usual path, so the cost without tracing is one check
+    def instrument(self, callback=None, sample=1):
+        self._tracer = QueryTracer(callback, sample)
+
+    # stop tracing and return the totals of the traced queries
+    def uninstrument(self):
+        totals = self.query_stats()
+        self._tracer = None
+        return totals
+
+    # totals of the queries traced since instrument was called
+    def query_stats(self):
+        if self._tracer is None:
+            return QueryStats.empty()
+        return self._tracer.totals
+
+    def _traced(self, kind, rectangle, raw=False):
+        start = time.perf_counter()
+        area = rectangle.intersection(self._root._rectangle)
+        result, nodes, pruned, accepted, scanned = ([] if kind == "search" else 0), 0, 0, 0, 0
+        if area is not None:
+            result, nodes, pruned, accepted, scanned = self._root._trace_rectangle(area, self._points_in_node, kind == "count")
+        returned = len(result) if kind == "search" else result
+        if raw:
+            result = [point.point for point in result]
+        self._tracer.record(kind, rectangle, QueryStats(1, nodes, pruned, accepted, scanned, returned, time.perf_counter() - start))
+        return result
+
+    # add a point to the tree, weight is required if the tree was built with weights
+    def insert(self, point, weight=None):
+        if len(point) != self._dimension:
+            raise ValueError("The point has different dimension than the points in the tree.")
+        if (weight is None) != (self._weights is None):
+            raise ValueError("A weight must be given exactly when the tree was built with weights.")
+        if not isinstance(point, Point):
+            point = Point(point)
+        if point in self._points:
+            raise ValueError("The point is already in the tree.")
+        path = self._root._path(point)
+        for node in path:
+            if not node._rectangle._contains_point(point):
+                node._rectangle = Rectangle._of(node._rectangle.lowerleft.minimum(point), node._rectangle.upperright.maximum(point))
+            node._count += 1
+            node._updates += 1
+        if self._points_in_node:
+            offsets = self._offsets(path)
+            end = offsets[-1] + len(path[-1]._points)
+            for node, offset in zip(path, offsets):
+                node._points.insert(end - offset, point)
+        else:
+            path[-1]._points.append(point)
+        self._points[point] = None
+        if weight is not None:
+            self._weights[point] = weight
+        self._rebalance(path)
+
+    # remove a point from the tree
+    def remove(self, point):
+        if len(point) != self._dimension:
+            raise ValueError("The point has different dimension than the points in the tree.")
+        if not isinstance(point, Point):
+            point = Point(point)
+        if point not in self._points:
+            raise ValueError("The point is not in the tree.")
+        path = self._root._path(point)
+        for node in path:
+            node._count -= 1
+            node._updates += 1
+            if self._points_in_node:
+                node._points.remove(point)
+        if not self._points_in_node:
+            path[-1]._points.remove(point)
+        del self._points[point]
+        if self._weights is not None:
+            del self._weights[point]
+        self._rebalance(path)
+
+    # rebuild the highest node on the path that is out of balance, then refresh the aggregates along the path
+    # (scapegoat rebalancing: a subtree of m points is rebuilt only after O(m) updates went through it)
+    def _rebalance(self, path):
+        self._arrays = None
+        for level, node in enumerate(path):
+            if node._needs_rebuild(self._leaf_size):
+                rebuilt = KdTreeNode(list(node._iter_leaves(self._points_in_node)), node._rectangle, node._depth,
+                                     self._points_in_node, self._leaf_size)
+                if self._points_in_node:
+                    offsets = self._offsets(path)
+                    for ancestor, offset in zip(path[:level], offsets):
+                        ancestor._points[offsets[level] - offset:offsets[level] - offset + rebuilt._count] = rebuilt._points
+                if level == 0:
+                    self._root = rebuilt
+                elif path[level-1]._left is node:
+                    path[level-1]._left = rebuilt
+                else:
+                    path[level-1]._right = rebuilt
+                path = path[:level] + [rebuilt]
+                break
+        if self._weights is not None:
+            path[-1]._aggregate_weights(self._weights)
+            for node in reversed(path[:-1]):
+                node._aggregate = node._left._aggregate.merge(node._right._aggregate)
+
+    # with points_in_node every node keeps its points in the order of its leaves, the order a search takes them in;
+    # where the points of every node on the path start in those of the first one
+    @staticmethod
+    def _offsets(path):
+        offsets = [0]
+        for parent, child in zip(path, path[1:]):
+            offsets.append(offsets[-1] + (parent._left._count if child is parent._right else 0))
+        return offsets
+
+    # find the points in many rectangles (Rectangle objects or an (m, 2, d) array) in one traversal
+    # the points of rectangles[i] are indices[offsets[i]:offsets[i+1]], positions in the list given to the tree
+    # followed by the inserted points, without the removed ones
+    def search_in_rectangles(self, rectangles):
+        lower, upper = as_rectangles(rectangles, self._dimension)
+        return self._node_arrays().search_rectangles(lower, upper)
+
+    # check many points (an (m, d) array) at once, returns a boolean array
+    def contains_many(self, points):
+        return self._node_arrays().contains(as_points(points, self._dimension))
+
+    # write the tree to a file in the format of NodeArrays.save, which load maps instead of building the tree again
+    def save(self, path):
+        self._node_arrays().save(path, self._metadata())
+
+    # open a tree written by save as a read-only MappedTree, mmap=False reads the arrays into memory instead
+    @staticmethod
+    def load(path, mmap=True):
+        return MappedTree.open(path, "KdTree", mmap)
+
+    # publish the tree in a new block of shared memory, which other processes view read-only through attach
+    # returns the SharedMemory, its owner closes and unlinks it once no process queries the tree
+    def share(self, name=None):
+        return self._node_arrays().share(self._metadata(), name)
+
+    # attach to a tree published by share as a read-only MappedTree, nothing is copied
+    @staticmethod
+    def attach(name):
+        return MappedTree.attach(name, "KdTree")
+
+    def _metadata(self):
+        return {"kind": "KdTree", "leaf_size": self._leaf_size, "points_in_node": self._points_in_node}
+
+    def _node_arrays(self):
+        if self._arrays is None:
+            self._arrays = NodeArrays.from_nodes(self._root,
+                                                 lambda node: None if node._axis is None else [node._left, node._right],
+                                                 lambda node: [node._axis if axis == node._depth % self._dimension else None for axis in range(self._dimension)],
+                                                 lambda node: node._points,
+                                                 {point: i for i, point in enumerate(self._points)})
+        return self._arrays
+
+    # find all points within the given distance from the center
+    def search_in_radius(self, center, radius, metric="euclidean", raw=False):
+        if len(center) != self._dimension:
+            raise ValueError("The center has different dimension than the points in the tree.")
+        if radius < 0:
+            raise ValueError("The radius must be non-negative.")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {list(METRICS)}.")
+        if not isinstance(center, Point):
+            center = Point(center)
+        result = self._root._search_radius(center, radius, metric, self._points_in_node)
+        if raw:
+            return [point.point for point in result]
+        return result
+
+    # find k points closest to the given point, as (point, distance) pairs sorted by distance
+    def nearest(self, point, k=1, raw=False):
+        if len(point) != self._dimension:
+            raise ValueError("The point has different dimension than the points in the tree.")
+        if k < 1:
+            raise ValueError("The number of neighbours must be at least 1.")
+        if not isinstance(point, Point):
+            point = Point(point)
+        result = self._root._nearest(point, k)
+        if raw:
+            return [(neighbour.point, distance) for neighbour, distance in result]
+        return result
+
 class KdTreeNode:
-    def __init__(self, points, rectangle, depth=0, points_in_node=False):
+    _partition_limit = 64                     # larger nodes are split with NumPy, smaller ones over presorted lists
+    _balance = 0.75                           # largest share of the points a child may hold before the node is rebuilt
+
+    def __init__(self, points, rectangle, depth=0, points_in_node=False, leaf_size=1, coords=None, ordered=None):
         if points_in_node:
             self._points = points.copy()      # points in the node
-        elif len(points) == 1:
-            self._points = points             # leaf node
+        elif len(points) <= leaf_size:
+            self._points = points             # leaf node, scanned point by point
         else:
             self._points = []            
         self._points_in_node = points_in_node # bool if points are stored in the node
@@ -54,49 +331,367 @@ class KdTreeNode:
         self._rectangle = rectangle           # rectangle that contains all points in the node
         self._axis = None                     # axis value
         self._depth = depth                   # even: x-axis, odd: y-axis [for more than 2 dimensions, use depth % number_of_dimensions]
-        self._build(points, depth, points_in_node)
+        self._count = len(points)             # number of points in the subtree
+        self._updates = 0                     # inserts and removals in the subtree since it was built
+        self._aggregate = None                # Aggregate of the weights in the subtree, if the tree has weights
+        self._build(points, depth, points_in_node, leaf_size, coords, ordered)
 
-    def _build(self, points, depth, points_in_node):
-        if len(points) > 1:
-            points.sort(key=lambda x: x[depth % len(x)])
-            median = (len(points)-1) // 2
-            self._axis = points[median][depth % len(points[median])]
-            lr, rr = self._rectangle.divide(depth % len(self._rectangle), self._axis)
-            med = median
-            for point in points[median+1:]:
-                if point[depth % len(points[median])] == points[median][depth % len(points[median])]:
-                    med += 1
-                else:
+    # coords: array of the node's coordinates, ordered[axis]: the node's points sorted along axis
+    # both are handed down to the children, so no level has to sort again
+    def _build(self, points, depth, points_in_node, leaf_size=1, coords=None, ordered=None):
+        if len(points) <= leaf_size:
+            return
+        dimension = len(points[0])
+        if len(points) > self._partition_limit:
+            if coords is None:
+                coords = np.array([point._point for point in points])
+            # points lower or equal to the median go left, if that leaves the right side empty try the next axis
+            for shift in range(dimension):
+                axis = (depth + shift) % dimension
+                values = coords[:, axis]
+                med = (len(values)-1) // 2
+                value = np.partition(values, med)[med]
+                mask = values <= value
+                if not mask.all():
+                    break
+            else:
+                return self._make_leaf(points, points_in_node)
+            left = list(compress(points, mask.tolist())), coords[mask], None
+            right = list(compress(points, (~mask).tolist())), coords[~mask], None
+            return self._split(axis, value.item(), depth + shift, points_in_node, leaf_size, left, right)
+        if ordered is None:
+            ordered = [sorted(points, key=lambda x: x._point[axis]) for axis in range(dimension)]
+        for shift in range(dimension):
+            axis = (depth + shift) % dimension
+            line = ordered[axis]
+            med = (len(line)-1) // 2
+            value = line[med]._point[axis]
+            while med + 1 < len(line) and line[med+1]._point[axis] == value:
+                med += 1
+            if med + 1 < len(line):
+                break
+        else:
+            return self._make_leaf(points, points_in_node)
+        left = [line[:med+1] if i == axis else [point for point in ordered[i] if point._point[axis] <= value] for i in range(dimension)]
+        right = [line[med+1:] if i == axis else [point for point in ordered[i] if point._point[axis] > value] for i in range(dimension)]
+        self._split(axis, value, depth + shift, points_in_node, leaf_size, (left[axis], None, left), (right[axis], None, right))
+
+    # left, right: (points, coords, ordered) of the children
+    def _split(self, axis, value, depth, points_in_node, leaf_size, left, right):
+        self._depth = depth
+        self._axis = value
+        lr, rr = self._rectangle.divide(axis, value)
+        self._left = KdTreeNode(left[0], lr, depth + 1, points_in_node, leaf_size, left[1], left[2])
+        self._right = KdTreeNode(right[0], rr, depth + 1, points_in_node, leaf_size, right[1], right[2])
+        if points_in_node:
+            self._points = self._left._points + self._right._points
+
+    # build a subtree from the arrays of _plan: with one worker the whole subtree is planned here, with more the top
+    # levels are planned here until the nodes hold at most 1 / (4 * workers) of the points and a pool of workers plans
+    # their subtrees; the nodes are always created here
+    # the tree is the one the recursive _build makes, only the order of the points in a leaf may differ
+    @staticmethod
+    def _build_planned(points, rectangle, depth, points_in_node, leaf_size, coords, workers=1):
+        if coords is None:
+            coords = np.array([point._point for point in points])
+        limit = len(points) // (4 * workers) if workers > 1 else 0
+        axes, values, depths, lefts, bounds, index = KdTreeNode._plan(coords, depth, leaf_size, limit)
+        root = KdTreeNode.__new__(KdTreeNode)
+        root._rectangle = rectangle
+        # the collector would go over all nodes created so far again and again, which costs more than creating them
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            ordered = [points[i] for i in index.tolist()]
+            pending = root._materialize((axes, values, depths, lefts, bounds), ordered, points_in_node, leaf_size)
+            # with one worker the plan is complete, the leaves left over hold points no axis separates
+            if workers > 1 and pending:
+                segments = [coords[index[start:end]] for _, start, end, _ in pending]
+                with ProcessPoolExecutor(workers) as pool:
+                    plans = pool.map(KdTreeNode._plan, segments, [depth for *_, depth in pending], repeat(leaf_size))
+                    for (node, start, end, _), plan in zip(pending, plans):
+                        segment = ordered[start:end]
+                        node._materialize(plan[:-1], [segment[i] for i in plan[-1].tolist()], points_in_node, leaf_size)
+            # the workers reorder the points of their subtrees, so the nodes above them take them again in leaf order
+            if workers > 1 and pending and points_in_node:
+                root._join_points()
+        finally:
+            if enabled:
+                gc.enable()
+        return root
+
+    # with points_in_node give every split node the points of its children, in the order of its leaves
+    def _join_points(self):
+        if self._axis is not None:
+            self._points = self._left._join_points() + self._right._join_points()
+        return self._points
+
+    # split the points like _build, but as arrays: the split axis (-1 for leaves), value, depth and left child of every node
+    # (the right child follows it), the slice [start, end) of index it covers and index, the order of the rows of coords
+    # nodes of at most limit points are not split, so their subtrees can be planned separately
+    @staticmethod
+    def _plan(coords, depth, leaf_size, limit=0):
+        n, dimension = coords.shape
+        capacity = 2 * n                      # every split has two non-empty children
+        axes = np.full(capacity, -1, dtype=np.int8)
+        values = np.zeros(capacity, dtype=coords.dtype)
+        depths = np.zeros(capacity, dtype=np.int64)
+        lefts = np.full(capacity, -1, dtype=np.int64)
+        bounds = np.zeros((capacity, 2), dtype=np.int64)
+        index = np.arange(n)
+        used = 1
+        stack = [(0, 0, n, depth)]
+        while stack:
+            node, start, end, depth = stack.pop()
+            bounds[node] = start, end
+            depths[node] = depth
+            if end - start <= max(leaf_size, limit):
+                continue
+            segment = index[start:end]
+            for shift in range(dimension):
+                axis = (depth + shift) % dimension
+                line = coords[segment, axis]
+                med = (len(line)-1) // 2
+                value = np.partition(line, med)[med]
+                mask = line <= value
+                size = int(np.count_nonzero(mask))
+                if size < len(line):
                     break
-            self._left = KdTreeNode(points[:med+1], lr, depth + 1, points_in_node)
-            self._right = KdTreeNode(points[med+1:], rr, depth + 1, points_in_node)
+            else:
+                continue
+            index[start:end] = np.concatenate((segment[mask], segment[~mask]))
+            axes[node] = axis
+            values[node] = value
+            depths[node] = depth + shift
+            lefts[node] = used
+            stack.append((used + 1, start + size, end, depth + shift + 1))
+            stack.append((used, start, start + size, depth + shift + 1))
+            used += 2
+        return axes[:used], values[:used], depths[:used], lefts[:used], bounds[:used], index
+
+    # create the subtree of this node, whose rectangle is set, from the arrays of _plan and the points in plan order
+    # returns the leaves of the plan holding more than leaf_size points as (node, start, end, depth), still to be built
+    def _materialize(self, plan, points, points_in_node, leaf_size):
+        axes, values, depths, lefts, bounds = (array.tolist() for array in plan)
+        nodes = [None] * len(axes)
+        nodes[0] = self
+        pending = []
+        for i, (axis, value, depth, left, (start, end)) in enumerate(zip(axes, values, depths, lefts, bounds)):
+            node = nodes[i]
+            node._points_in_node = points_in_node
+            node._depth = depth
+            node._count = end - start
+            node._updates = 0
+            node._aggregate = None
+            if axis < 0:
+                node._points = points[start:end]
+                node._axis = node._left = node._right = None
+                if end - start > leaf_size:
+                    pending.append((node, start, end, depth))
+                continue
+            node._points = points[start:end] if points_in_node else []
+            node._axis = value
+            lower, upper = node._rectangle._lowerleft, node._rectangle._upperright
+            node._left = nodes[left] = KdTreeNode.__new__(KdTreeNode)
+            node._right = nodes[left + 1] = KdTreeNode.__new__(KdTreeNode)
+            node._left._rectangle = Rectangle._of(lower, Point._of(upper._point[:axis] + (value,) + upper._point[axis+1:]))
+            node._right._rectangle = Rectangle._of(Point._of(lower._point[:axis] + (value,) + lower._point[axis+1:]), upper)
+        return pending
+
+    # no axis separates the points, keep all of them in one leaf
+    def _make_leaf(self, points, points_in_node):
+        if not points_in_node:
+            self._points = points
+
+    # nodes from this one down to the leaf where the point is or would be stored
+    def _path(self, point):
+        coordinates = point._point
+        path = [self]
+        node = self
+        while node._axis is not None:
+            node = node._left if node._axis >= coordinates[node._depth % len(coordinates)] else node._right
+            path.append(node)
+        return path
+
+    # a leaf is rebuilt when it grows over leaf_size, an inner node when it shrinks to leaf_size points
+    # or one child holds more than _balance of its points after enough updates
+    def _needs_rebuild(self, leaf_size):
+        if self._axis is None:
+            return self._count > leaf_size
+        if self._count <= leaf_size:
+            return True
+        heavier = max(self._left._count, self._right._count)
+        return heavier > self._balance * self._count and self._updates > (1 - self._balance) * self._count
 
     # check if the tree contains the point
     def _if_contains(self, point):
-        if self._axis == None:
-            return point == self._points[0]
-        if self._axis >= point[self._depth % len(point)]:
-            return self._left._if_contains(point)
-        if self._axis < point[self._depth % len(point)]:
-            return self._right._if_contains(point)
+        coordinates = point._point
+        node = self
+        while node._axis is not None:
+            node = node._left if node._axis >= coordinates[node._depth % len(coordinates)] else node._right
+        return point in node._points
         
     def _add_leaves(self, points_in_node=False):
         if points_in_node:
             return self._points
-        else:
-            if self._axis is None:
-                return self._points
-            return self._left._add_leaves() + self._right._add_leaves()
+        result = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._axis is None:
+                result += node._points
+            else:
+                stack.append(node._right)
+                stack.append(node._left)
+        return result
         
-    # find all points in the given rectangle 
+    # find all points in the given rectangle, collected into one list instead of concatenating on every level
     def _search_rectangle(self, area, points_in_node=False):
-        if self._axis is None:
-            return [point for point in self._points if area.contains(point)]
-        if area.contains(self._rectangle):
-            return self._add_leaves(points_in_node)
-        if area.does_intersect(self._rectangle):
-            return self._left._search_rectangle(area, points_in_node) + self._right._search_rectangle(area, points_in_node)
-        return []
+        result = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._axis is None:
+                result += [point for point in node._points if area._contains_point(point)]
+            elif area._contains_rectangle(node._rectangle):
+                result += node._add_leaves(points_in_node)
+            elif area._intersects(node._rectangle):
+                stack.append(node._right)
+                stack.append(node._left)
+        return result
+
+    # _search_rectangle, or _count_rectangle if count, also counting the nodes visited, pruned and accepted whole
+    # and the points of the leaves scanned
+    def _trace_rectangle(self, area, points_in_node=False, count=False):
+        result = 0 if count else []
+        nodes = pruned = accepted = scanned = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            if node._axis is None:
+                scanned += len(node._points)
+                found = [point for point in node._points if area._contains_point(point)]
+                result += len(found) if count else found
+            elif area._contains_rectangle(node._rectangle):
+                accepted += 1
+                result += node._count if count else node._add_leaves(points_in_node)
+            elif area._intersects(node._rectangle):
+                stack.append(node._right)
+                stack.append(node._left)
+            else:
+                pruned += 1
+        return result, nodes, pruned, accepted, scanned
+
+    # count the points in the given rectangle, covered subtrees add their stored size
+    def _count_rectangle(self, area):
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._axis is None:
+                count += sum(1 for point in node._points if area._contains_point(point))
+            elif area._contains_rectangle(node._rectangle):
+                count += node._count
+            elif area._intersects(node._rectangle):
+                stack.append(node._right)
+                stack.append(node._left)
+        return count
+
+    def _aggregate_rectangle(self, area, weights):
+        result = Aggregate.empty()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._axis is None:
+                for point in node._points:
+                    if area._contains_point(point):
+                        result = result.merge(Aggregate.of(weights[point]))
+            elif area._contains_rectangle(node._rectangle):
+                result = result.merge(node._aggregate)
+            elif area._intersects(node._rectangle):
+                stack.append(node._right)
+                stack.append(node._left)
+        return result
+
+    # fill _aggregate of every node bottom-up
+    def _aggregate_weights(self, weights):
+        stack = [(self, False)]
+        while stack:
+            node, ready = stack.pop()
+            if node._axis is None:
+                node._aggregate = Aggregate.empty()
+                for point in node._points:
+                    node._aggregate = node._aggregate.merge(Aggregate.of(weights[point]))
+            elif ready:
+                node._aggregate = node._left._aggregate.merge(node._right._aggregate)
+            else:
+                stack += [(node, True), (node._right, False), (node._left, False)]
+
+    # walk the tree with an explicit stack, so no partial results are copied between levels
+    def _iter_rectangle(self, area, points_in_node=False):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._axis is None:
+                for point in node._points:
+                    if area._contains_point(point):
+                        yield point
+            elif area._contains_rectangle(node._rectangle):
+                yield from node._iter_leaves(points_in_node)
+            elif area._intersects(node._rectangle):
+                stack.append(node._right)
+                stack.append(node._left)
+
+    def _iter_leaves(self, points_in_node=False):
+        if points_in_node:
+            yield from self._points
+            return
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._axis is None:
+                yield from node._points
+            else:
+                stack.append(node._right)
+                stack.append(node._left)
+
+    # find all points in the ball, subtrees whose rectangle lies inside the ball are taken whole
+    def _search_radius(self, center, radius, metric, points_in_node=False):
+        result = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._axis is None:
+                result += [point for point in node._points if center.distance(point, metric) <= radius]
+            elif node._rectangle.max_distance(center, metric) <= radius:
+                result += node._add_leaves(points_in_node)
+            elif node._rectangle.distance(center, metric) <= radius:
+                stack.append(node._right)
+                stack.append(node._left)
+        return result
+
+    # best-first search: nodes are visited by the distance to their rectangle, the k closest points found so far
+    # are kept in a max-heap and the search stops once no rectangle can hold a closer point
+    def _nearest(self, point, k):
+        order = count()
+        best = []                             # (-distance, order, point)
+        queue = [(self._rectangle.distance(point), next(order), self)]
+        while queue:
+            bound, _, node = heapq.heappop(queue)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            if node._axis is None:
+                for candidate in node._points:
+                    distance = point.distance(candidate)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, next(order), candidate))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, next(order), candidate))
+            else:
+                for child in (node._left, node._right):
+                    heapq.heappush(queue, (child._rectangle.distance(point), next(order), child))
+        return [(candidate, -distance) for distance, _, candidate in sorted(best, reverse=True)]
     
 # ----------------------------------------------------------------------------------------------------------------------------
     
@@ -0,0 +1,124 @@
+from utilities.Point import Point
+from utilities.Rectangle import Rectangle
+from utilities.NodeArrays import expand
+
+import math
+import numpy as np
+
+class LinearQuadTree:
+    """
+    Pointer-free QuadTree: coordinates are quantised to a 2^bits x 2^bits grid over the rectangle
+    of the points, each point gets the Morton (Z-order) code of its cell and the points are stored
+    sorted by code. Every QuadTree cell is then one contiguous range of codes, so the whole tree is
+    the two arrays _codes and _points and a cell is found by binary search instead of following nodes.
+    """
+    _scan_limit = 32                                      # ranges with fewer points are filtered instead of divided
+
+    def __init__(self, points, bits=16):
+        if len(points) == 0:
+            raise ValueError("The list of points is empty.")
+        if not all(len(point) == 2 for point in points):
+            raise ValueError("The points have different dimensions than 2.")
+        if not 1 <= bits <= 31:
+            raise ValueError("The number of bits must be between 1 and 31.")
+        coords = np.array([tuple(point) for point in points], dtype=np.float64)
+        if len(np.unique(coords, axis=0)) != len(coords):
+            raise ValueError("Not all points are unique.")
+        self._bits = bits
+        self._side = 2 ** bits                            # number of cells along each axis
+        self._lower = coords.min(axis=0)
+        self._upper = coords.max(axis=0)
+        extent = self._upper - self._lower
+        self._scale = np.divide(self._side, extent, out=np.zeros(2), where=extent > 0)
+        codes = self._encode(self._quantise(coords))
+        order = np.argsort(codes, kind="stable")
+        self._codes = codes[order]                        # Morton codes, sorted
+        self._points = coords[order]                      # coordinates in code order
+        self._index = order                               # original position of every point
+
+    @property
+    def nbytes(self):
+        return self._codes.nbytes + self._points.nbytes + self._index.nbytes
+
+    # cell of every point along both axes, monotone in each coordinate
+    def _quantise(self, coords):
+        cells = np.floor((coords - self._lower) * self._scale)
+        return np.clip(cells, 0, self._side - 1).astype(np.uint64)
+
+    # interleave the bits of the cells, x in the even and y in the odd bits
+    @staticmethod
+    def _encode(cells):
+        return LinearQuadTree._spread(cells[:, 0]) | (LinearQuadTree._spread(cells[:, 1]) << np.uint64(1))
+
+    # spread the lower 32 bits of the values to the even bits, for uint64 arrays or, with cast=int, Python ints
+    @staticmethod
+    def _spread(values, cast=np.uint64):
+        values = values & cast(0x00000000FFFFFFFF)
+        for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF), (4, 0x0F0F0F0F0F0F0F0F),
+                            (2, 0x3333333333333333), (1, 0x5555555555555555)):
+            values = (values | (values << cast(shift))) & cast(mask)
+        return values
+
+    # check if the tree contains the point
+    def if_contains(self, point):
+        if len(point) != 2:
+            raise ValueError("The point has different dimension than 2.")
+        point = [float(value) for value in point]
+        # one point is quantised with Python floats, which round the same way as the arrays in _quantise
+        cells = []
+        for value, low, high, scale in zip(point, self._lower.tolist(), self._upper.tolist(), self._scale.tolist()):
+            if not low <= value <= high:
+                return False
+            cells.append(min(math.floor((value - low) * scale), self._side - 1))
+        code = np.uint64(self._spread(cells[0], int) | (self._spread(cells[1], int) << 1))
+        start = np.searchsorted(self._codes, code, side="left")
+        end = np.searchsorted(self._codes, code, side="right")
+        return point in self._points[start:end].tolist()
+
+    # find all points in the given rectangle, in Z-order
+    def search_in_rectangle(self, rectangle, raw=False):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != 2:
+            raise ValueError("The rectangle has different dimension than 2.")
+        lower = np.array(rectangle.lowerleft._point, dtype=np.float64)
+        upper = np.array(rectangle.upperright._point, dtype=np.float64)
+        if np.any(lower > self._upper) or np.any(upper < self._lower):
+            return []
+        result = self._points[self._search_positions(lower, upper)].tolist()
+        if raw:
+            return result
+        return [Point(point) for point in result]
+
+    # positions of the points in [lower, upper]: the grid is divided like a QuadTree, a cell of size x size cells
+    # being the code range [start, start + size^2); cells strictly inside the query are taken whole, cells on its
+    # border are divided further until they hold at most _scan_limit points, which are then compared one by one.
+    # All cells of one level are handled together, so every level costs a few array operations.
+    def _search_positions(self, lower, upper):
+        (x0, y0), (x1, y1) = self._quantise(np.array([lower, upper])).astype(np.int64).tolist()
+        x = np.zeros(1, dtype=np.int64)                   # lower cell of every cell along x and y
+        y = np.zeros(1, dtype=np.int64)
+        start = np.zeros(1, dtype=np.uint64)              # first code of every cell
+        size = self._side
+        taken, checked = [], []
+        while len(x):
+            first = np.searchsorted(self._codes, start)
+            last = np.searchsorted(self._codes, start + np.uint64(size * size))
+            keep = (x <= x1) & (y <= y1) & (x + size - 1 >= x0) & (y + size - 1 >= y0) & (first < last)
+            x, y, start, first, last = x[keep], y[keep], start[keep], first[keep], last[keep]
+            inside = (x0 < x) & (x + size - 1 < x1) & (y0 < y) & (y + size - 1 < y1)
+            taken.append((first[inside], last[inside]))
+            small = ~inside & ((last - first <= self._scan_limit) | (size == 1))
+            checked.append((first[small], last[small]))
+            rest = ~inside & ~small
+            size //= 2
+            quarter = np.uint64(size * size)
+            x, y, start = x[rest], y[rest], start[rest]
+            x = np.concatenate((x, x + size, x, x + size))
+            y = np.concatenate((y, y, y + size, y + size))
+            start = np.concatenate((start, start + quarter, start + np.uint64(2) * quarter, start + np.uint64(3) * quarter))
+        candidates = expand(np.concatenate([first for first, _ in checked]), np.concatenate([last for _, last in checked]))
+        points = self._points[candidates]
+        candidates = candidates[np.all((points >= lower) & (points <= upper), axis=1)]
+        positions = expand(np.concatenate([first for first, _ in taken]), np.concatenate([last for _, last in taken]))
+        return np.sort(np.concatenate((positions, candidates)))
@@ -0,0 +1,119 @@
+from utilities.Point import Point
+from utilities.Rectangle import Rectangle
+from utilities.NodeArrays import NodeArrays, as_points, as_rectangles
+
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+class MappedTree:
+    """
+    Read-only tree answering queries on the NodeArrays of a saved or shared KdTree or QuadTree, without
+    copying them. open maps a file written by save: only its header is read, pages are read on first use
+    and shared through the OS page cache by all processes mapping the same file. attach views a block of
+    shared memory published by share. Positions returned by batched queries are those of the original tree.
+    """
+    def __init__(self, metadata, arrays, shared=None):
+        self._kind = metadata.get("kind")
+        self._arrays = arrays
+        self._dimension = arrays.points.shape[1]
+        self._shared = shared              # SharedMemory the arrays are views of, if attached
+
+    # open a file written by save, mmap=False reads the arrays into memory instead of mapping them
+    @classmethod
+    def open(cls, path, kind=None, mmap=True):
+        metadata, arrays = NodeArrays.load(path, mmap)
+        cls._check_kind(metadata, kind)
+        return cls(metadata, arrays)
+
+    # attach to the block of shared memory of the given name published by share
+    @classmethod
+    def attach(cls, name, kind=None):
+        try:
+            shared = SharedMemory(name, track=False)
+        except TypeError:
+            # before Python 3.13 attaching registers the block with the resource tracker, which unlinks it when
+            # the process exits although the publisher still owns it, so the registration is skipped
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None if rtype == "shared_memory" else register(name, rtype)
+            try:
+                shared = SharedMemory(name)
+            finally:
+                resource_tracker.register = register
+        try:
+            metadata, arrays = NodeArrays.attach(shared)
+            cls._check_kind(metadata, kind)
+        except ValueError:
+            arrays = None
+            shared.close()
+            raise
+        return cls(metadata, arrays, shared)
+
+    @staticmethod
+    def _check_kind(metadata, kind):
+        if kind is not None and metadata.get("kind") != kind:
+            raise ValueError(f"The saved tree is a {metadata.get('kind')}, not a {kind}.")
+
+    # release the shared memory of an attached tree, the tree cannot be queried afterwards
+    def close(self):
+        self._arrays = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def kind(self):
+        return self._kind
+
+    def __len__(self):
+        return len(self._arrays.points)
+
+    # check if the tree contains the point
+    def if_contains(self, point):
+        if len(point) != self._dimension:
+            raise ValueError("The point has different dimension than the points in the tree.")
+        return bool(self._arrays.contains(as_points([tuple(point)], self._dimension))[0])
+
+    # find all points in the given rectangle, in the order of the leaves
+    def search_in_rectangle(self, rectangle, raw=False):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError("The rectangle has different dimension than the points in the tree.")
+        lower, upper = as_rectangles([rectangle], self._dimension)
+        result = self._arrays.points[self._arrays.search_positions(lower, upper)[1]].tolist()
+        if raw:
+            return result
+        return [Point(point) for point in result]
+
+    # count the points in the given rectangle
+    def count_in_rectangle(self, rectangle):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError("The rectangle has different dimension than the points in the tree.")
+        return int(self._arrays.search_positions(*as_rectangles([rectangle], self._dimension))[0][-1])
+
+    # find the points in many rectangles (Rectangle objects or an (m, 2, d) array) in one traversal
+    # the points of rectangles[i] are indices[offsets[i]:offsets[i+1]], positions in the saved tree
+    def search_in_rectangles(self, rectangles):
+        lower, upper = as_rectangles(rectangles, self._dimension)
+        return self._arrays.search_rectangles(lower, upper)
+
+    # check many points (an (m, d) array) at once, returns a boolean array
+    def contains_many(self, points):
+        return self._arrays.contains(as_points(points, self._dimension))
+
+    # the arrays answering the queries, under the name the trees give their snapshot
+    def _node_arrays(self):
+        return self._arrays
+
+    # coordinates of the points in the order of their positions, to build a tree that can be updated again
+    def points(self):
+        coordinates = np.empty_like(self._arrays.points)
+        coordinates[self._arrays.index] = self._arrays.points
+        return coordinates
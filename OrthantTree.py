@@ -0,0 +1,24 @@
+from QuadTree import QuadTree
+
+class OrthantTree(QuadTree):
+    """
+    QuadTree of points in any dimension: a node holding more than max_capacity points is divided at the center of its
+    rectangle into 2^d orthants, in 3D it is an octree. The tree is a QuadTree with the dimension taken from the
+    points, so it has the same API and nodes, including insert and remove, max_depth, weights, batched queries and
+    save and share. It is compressed by default, so that only the orthants holding points get a subtree;
+    compressed=False gives every divided node all 2^d subtrees like an uncompressed QuadTree.
+    """
+    _dimensions = None
+
+    def __init__(self, points, max_capacity=1, points_in_node=False, weights=None, compressed=True, max_depth=None):
+        super().__init__(points, max_capacity, points_in_node, weights, compressed, max_depth)
+
+    @classmethod
+    def from_array(cls, array, max_capacity=1, points_in_node=False, weights=None, compressed=True, max_depth=None):
+        return super().from_array(array, max_capacity, points_in_node, weights, compressed, max_depth)
+
+class Octree(OrthantTree):
+    """
+    OrthantTree of 3D points, every node has up to 8 subtrees
+    """
+    _dimensions = 3
@@ -1,116 +1,724 @@
-from utilities.Point import Point
+from utilities.Point import Point, METRICS
 from utilities.Rectangle import Rectangle
+from utilities.NodeArrays import NodeArrays, as_points, as_rectangles, as_unique_rows
+from utilities.Aggregate import Aggregate
+from utilities.QueryStats import QueryStats, QueryTracer
+from MappedTree import MappedTree
+
+from collections import Counter
+from itertools import count, islice
+import heapq
+import math
+import time
 
 class QuadTree:
-    def __init__(self, points, max_capacity=1, points_in_node=False):
+    _dimensions = 2                        # dimension the points must have, None lets the first point decide
+
+    def __init__(self, points, max_capacity=1, points_in_node=False, weights=None, compressed=False, max_depth=None):
         if len(points) == 0:
             raise ValueError("The list of points is empty.")
-        if not all(len(point) == 2 for point in points):
-            raise ValueError("The points have different dimensions than 2.")
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("The maximum depth must be non-negative.")
+        self._check_dimension(len(points[0]))
+        if not all(len(point) == len(points[0]) for point in points):
+            raise ValueError("The points have different dimensions.")
+        if weights is not None and len(weights) != len(points):
+            raise ValueError("The number of weights differs from the number of points.")
         points = [Point(point) for point in points]
         if len(set(points)) != len(points):
             raise ValueError("Not all points are unique.")
-        self._root = QuadTreeNode(points, Rectangle.from_points(points), max_capacity, points_in_node)
+        self._setup(points, Rectangle.from_points(points), max_capacity, points_in_node, weights, compressed, max_depth)
+
+    # build the tree on the rows of an (n, d) float32/float64 array or buffer, bounds and uniqueness are checked
+    # on the array with NumPy; the nodes still hold one Point per row, its coordinates copied into Python floats
+    # positions in batched queries are the rows of the array
+    @classmethod
+    def from_array(cls, array, max_capacity=1, points_in_node=False, weights=None, compressed=False, max_depth=None):
+        array, lower, upper = as_unique_rows(array)
+        cls._check_dimension(array.shape[1])
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("The maximum depth must be non-negative.")
+        if weights is not None and len(weights) != len(array):
+            raise ValueError("The number of weights differs from the number of points.")
+        tree = cls.__new__(cls)
+        points = list(map(Point._of, zip(*array.T.tolist())))
+        tree._setup(points, Rectangle._of(Point._of(lower), Point._of(upper)), max_capacity, points_in_node, weights, compressed, max_depth)
+        return tree
+
+    @classmethod
+    def _check_dimension(cls, dimension):
+        if cls._dimensions is not None and dimension != cls._dimensions:
+            raise ValueError(f"The points have different dimensions than {cls._dimensions}.")
+
+    # build the tree on unique points
+    def _setup(self, points, rectangle, max_capacity, points_in_node, weights, compressed, max_depth):
+        self._root = QuadTreeNode(points, rectangle, max_capacity, points_in_node, compressed, max_depth)
+        self._dimension = len(rectangle)
         self._max_capacity = max_capacity
+        self._max_depth = max_depth        # leaves at this depth are not split and may hold more than max_capacity points
         self._points_in_node = points_in_node
+        self._compressed = compressed      # no empty orthants and no chains of nodes with a single child
+        self._points = dict.fromkeys(points) # points in the order they were given or inserted
+        self._arrays = None                # NodeArrays snapshot for batched queries, built on first use
+        self._tracer = None                # QueryTracer sampling the rectangle queries, see instrument
+        self._weights = None               # weight of every point, aggregated in the nodes
+        if weights is not None:
+            self._weights = dict(zip(points, weights))
+            self._root._aggregate_weights(self._weights)
 
     def if_contains(self,point):
-        if len(point) != 2:
-            raise ValueError("The point has different dimension than 2.")
+        if len(point) != self._dimension:
+            raise ValueError(f"The point has different dimension than {self._dimension}.")
         if not isinstance(point, Point):
             point = Point(point)
-        if self._root._rectangle.contains(point):
+        if self._root._rectangle._contains_point(point):
             return self._root._if_contains(point)
         return False
 
     def search_in_rectangle(self, rectangle, raw = False):
         if not isinstance(rectangle, Rectangle):
             raise ValueError("The rectangle is not a Rectangle object.")
-        if len(rectangle) != 2:
-            raise ValueError("The rectangle has different dimension than 2.")
+        if len(rectangle) != self._dimension:
+            raise ValueError(f"The rectangle has different dimension than {self._dimension}.")
+        if self._tracer is not None and self._tracer.sampled():
+            return self._traced("search", rectangle, raw)
         area = rectangle.intersection(self._root._rectangle)
         if area is None:
             return []
-        result = list(self._root._search_in_rectangle(area, self._points_in_node))
+        result = list(self._root._iter_in_rectangle(area, self._points_in_node))
         if raw:
             return [point.point for point in result]
         return result
+
+    # yield the points in the given rectangle one by one, at most limit of them
+    def iter_in_rectangle(self, rectangle, limit=None, raw=False):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError(f"The rectangle has different dimension than {self._dimension}.")
+        if limit is not None and limit < 0:
+            raise ValueError("The limit must be non-negative.")
+        area = rectangle.intersection(self._root._rectangle)
+        if area is None:
+            return iter(())
+        result = islice(self._root._iter_in_rectangle(area, self._points_in_node), limit)
+        if raw:
+            return (point.point for point in result)
+        return result
+
+    # count the points in the given rectangle without collecting them
+    def count_in_rectangle(self, rectangle):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError(f"The rectangle has different dimension than {self._dimension}.")
+        if self._tracer is not None and self._tracer.sampled():
+            return self._traced("count", rectangle)
+        area = rectangle.intersection(self._root._rectangle)
+        if area is None:
+            return 0
+        return self._root._count_in_rectangle(area)
+
+    # count, sum, min and max of the weights of the points in the given rectangle
+    def aggregate_in_rectangle(self, rectangle):
+        if self._weights is None:
+            raise ValueError("The tree was built without weights.")
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        if len(rectangle) != self._dimension:
+            raise ValueError(f"The rectangle has different dimension than {self._dimension}.")
+        area = rectangle.intersection(self._root._rectangle)
+        if area is None:
+            return Aggregate.empty()
+        return self._root._aggregate_in_rectangle(area, self._weights)
+
+    # trace every sample-th search_in_rectangle and count_in_rectangle, callback(kind, rectangle, stats) gets the
+    # QueryStats of each traced query; untraced queries take the usual path, so the cost without tracing is one check
+    def instrument(self, callback=None, sample=1):
+        self._tracer = QueryTracer(callback, sample)
+
+    # stop tracing and return the totals of the traced queries
+    def uninstrument(self):
+        totals = self.query_stats()
+        self._tracer = None
+        return totals
+
+    # totals of the queries traced since instrument was called
+    def query_stats(self):
+        if self._tracer is None:
+            return QueryStats.empty()
+        return self._tracer.totals
+
+    def _traced(self, kind, rectangle, raw=False):
+        start = time.perf_counter()
+        area = rectangle.intersection(self._root._rectangle)
+        result, nodes, pruned, accepted, scanned = ([] if kind == "search" else 0), 0, 0, 0, 0
+        if area is not None:
+            result, nodes, pruned, accepted, scanned = self._root._trace_in_rectangle(area, self._points_in_node, kind == "count")
+        returned = len(result) if kind == "search" else result
+        if raw:
+            result = [point.point for point in result]
+        self._tracer.record(kind, rectangle, QueryStats(1, nodes, pruned, accepted, scanned, returned, time.perf_counter() - start))
+        return result
+
+    # add a point to the tree, weight is required if the tree was built with weights
+    # a point outside the tree grows the root, the old root becomes one orthant of the new one
+    # (and an uncompressed tree is rebuilt if that pushes its leaves below max_depth)
+    def insert(self, point, weight=None):
+        if len(point) != self._dimension:
+            raise ValueError(f"The point has different dimension than {self._dimension}.")
+        if (weight is None) != (self._weights is None):
+            raise ValueError("A weight must be given exactly when the tree was built with weights.")
+        if not isinstance(point, Point):
+            point = Point(point)
+        if point in self._points:
+            raise ValueError("The point is already in the tree.")
+        grown = False
+        while not self._root._rectangle._contains_point(point):
+            self._root = self._root._grow(point, self._max_capacity, self._points_in_node, self._compressed, self._max_depth)
+            grown = True
+        if grown and not self._compressed and self._max_depth is not None and self.stats()["depth"] > self._max_depth:
+            self._root = QuadTreeNode(list(self._root._iter_leaves(self._points_in_node)), self._root._rectangle,
+                                      self._max_capacity, self._points_in_node, self._compressed, self._max_depth)
+            if self._weights is not None:
+                self._root._aggregate_weights(self._weights)
+        self._points[point] = None
+        if weight is not None:
+            self._weights[point] = weight
+        self._refresh(self._root._insert(point, self._max_capacity, self._points_in_node, self._compressed, self._max_depth))
+
+    # remove a point from the tree, the 2^d leaves of a node holding at most max_capacity points together are merged
+    def remove(self, point):
+        if len(point) != self._dimension:
+            raise ValueError(f"The point has different dimension than {self._dimension}.")
+        if not isinstance(point, Point):
+            point = Point(point)
+        if point not in self._points:
+            raise ValueError("The point is not in the tree.")
+        del self._points[point]
+        if self._weights is not None:
+            del self._weights[point]
+        self._refresh(self._root._remove(point, self._max_capacity, self._points_in_node, self._compressed))
+        if self._compressed and not self._root._leaf and len(self._root._quarters()) == 1:
+            self._root = self._root._quarters()[0]
+
+    # recompute the aggregates along the updated path, nodes created by the update are aggregated whole
+    def _refresh(self, path):
+        self._arrays = None
+        if self._weights is None:
+            return
+        for node in reversed(path):
+            if node._leaf:
+                node._aggregate = Aggregate.empty()
+                for point in node.points:
+                    node._aggregate = node._aggregate.merge(Aggregate.of(self._weights[point]))
+                continue
+            node._aggregate = Aggregate.empty()
+            for child in node._quarters():
+                if child._aggregate is None:
+                    child._aggregate_weights(self._weights)
+                node._aggregate = node._aggregate.merge(child._aggregate)
+
+    # find the points in many rectangles (Rectangle objects or an (m, 2, d) array) in one traversal
+    # the points of rectangles[i] are indices[offsets[i]:offsets[i+1]], positions in the list given to the tree
+    # followed by the inserted points, without the removed ones
+    def search_in_rectangles(self, rectangles):
+        lower, upper = as_rectangles(rectangles, self._dimension)
+        return self._node_arrays().search_rectangles(lower, upper)
+
+    # check many points (an (m, d) array) at once, returns a boolean array
+    def contains_many(self, points):
+        return self._node_arrays().contains(as_points(points, self._dimension))
+
+    # write the tree to a file in the format of NodeArrays.save, which load maps instead of building the tree again
+    def save(self, path):
+        self._node_arrays().save(path, self._metadata())
+
+    # open a tree written by save as a read-only MappedTree, mmap=False reads the arrays into memory instead
+    @classmethod
+    def load(cls, path, mmap=True):
+        return MappedTree.open(path, cls.__name__, mmap)
+
+    # publish the tree in a new block of shared memory, which other processes view read-only through attach
+    # returns the SharedMemory, its owner closes and unlinks it once no process queries the tree
+    def share(self, name=None):
+        return self._node_arrays().share(self._metadata(), name)
+
+    # attach to a tree published by share as a read-only MappedTree, nothing is copied
+    @classmethod
+    def attach(cls, name):
+        return MappedTree.attach(name, cls.__name__)
+
+    def _metadata(self):
+        return {"kind": type(self).__name__, "max_capacity": self._max_capacity, "compressed": self._compressed, "max_depth": self._max_depth}
+
+    def _node_arrays(self):
+        if self._arrays is None:
+            self._arrays = NodeArrays.from_nodes(self._root,
+                                                 lambda node: None if node._leaf else node._children,
+                                                 lambda node: node._center._point,
+                                                 lambda node: node.points,
+                                                 {point: i for i, point in enumerate(self._points)})
+        return self._arrays
+
+    # number of nodes, leaves, empty leaves and leaves over max_capacity, the length of the longest path from the root
+    # to a leaf, and the histograms of the leaves by depth and by number of points, as sorted {value: leaves} dicts
+    def stats(self):
+        nodes = 0
+        depths, sizes = Counter(), Counter()
+        stack = [(self._root, 0)]
+        while stack:
+            node, level = stack.pop()
+            nodes += 1
+            if node._leaf:
+                depths[level] += 1
+                sizes[node._count] += 1
+            else:
+                stack += [(child, level + 1) for child in node._quarters()]
+        return {"nodes": nodes, "leaves": sum(depths.values()), "empty_leaves": sizes[0],
+                "overflow_leaves": sum(leaves for size, leaves in sizes.items() if size > self._max_capacity),
+                "depth": max(depths), "depth_histogram": dict(sorted(depths.items())), "size_histogram": dict(sorted(sizes.items()))}
+
+    # find all points within the given distance from the center
+    def search_in_radius(self, center, radius, metric="euclidean", raw=False):
+        if len(center) != self._dimension:
+            raise ValueError(f"The center has different dimension than {self._dimension}.")
+        if radius < 0:
+            raise ValueError("The radius must be non-negative.")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {list(METRICS)}.")
+        if not isinstance(center, Point):
+            center = Point(center)
+        result = list(self._root._search_in_radius(center, radius, metric, self._points_in_node))
+        if raw:
+            return [point.point for point in result]
+        return result
+
+    # find k points closest to the given point, as (point, distance) pairs sorted by distance
+    def nearest(self, point, k=1, raw=False):
+        if len(point) != self._dimension:
+            raise ValueError(f"The point has different dimension than {self._dimension}.")
+        if k < 1:
+            raise ValueError("The number of neighbours must be at least 1.")
+        if not isinstance(point, Point):
+            point = Point(point)
+        result = self._root._nearest(point, k)
+        if raw:
+            return [(neighbour.point, distance) for neighbour, distance in result]
+        return result
         
         
 
 class QuadTreeNode:
-    def __init__(self, points, rectangle, max_capacity=1, points_in_node=False):
+    def __init__(self, points, rectangle, max_capacity=1, points_in_node=False, compressed=False, max_depth=None):
         if points_in_node:
             self.points = points.copy()    # points in the node
         elif len(points) <= max_capacity:
             self.points = points           # points in the leaf
-        self._left_up = None               # left up subtree
-        self._right_up = None              # right up subtree
-        self._left_down = None             # left down subtree
-        self._right_down = None            # right down subtree
+        self._children = ()                # the 2^d subtrees of a split node, numbered like Rectangle.orthant,
+                                           # None where a compressed node misses one
+        self._leaf = True                  # False once the node is split
         self._rectangle = rectangle        # rectangle that contains all points in the node
-        self._build(points, max_capacity, points_in_node)
+        self._center = rectangle.center()  # point where the orthants meet
+        self._count = len(points)          # number of points in the subtree
+        self._aggregate = None             # Aggregate of the weights in the subtree, if the tree has weights
+        self._build(points, max_capacity, points_in_node, compressed, max_depth)
 
-    def _build(self, points, max_capacity, points_in_node):
-        if len(points) > max_capacity:
-            rec_left_down, rec_right_down, rec_right_up, rec_left_up = self._rectangle.to_quaters()
-            points_left_up = []
-            points_right_up = []
-            points_left_down = []
-            points_right_down = []
-            center = self._rectangle.center()
+    # a compressed node creates no empty orthants, and while all of its points fall into one orthant
+    # it shrinks to that orthant, so it jumps straight to the smallest cell that holds them
+    # max_depth is the number of levels allowed below this node, a node allowed none keeps all its points in one leaf
+    # with points_in_node a split node keeps its points in the order of its leaves, the order a search takes them in
+    def _build(self, points, max_capacity, points_in_node, compressed=False, max_depth=None):
+        if len(points) <= max_capacity:
+            return
+        orthants = self._divide(points)
+        while compressed and sum(1 for orthant in orthants if orthant) == 1:
+            rectangle = self._rectangle._orthant(next(i for i, orthant in enumerate(orthants) if orthant), self._center)
+            if rectangle == self._rectangle:
+                # the orthants stopped shrinking at the float precision, keep the points in one leaf
+                if not points_in_node:
+                    self.points = points
+                return
+            self._rectangle = rectangle
+            self._center = rectangle.center()
+            orthants = self._divide(points)
+        if max_depth is not None and max_depth <= 0:
+            if not points_in_node:
+                self.points = points
+            return
+        self._leaf = False
+        below = None if max_depth is None else max_depth - 1
+        if compressed:
+            # only the rectangles of the orthants holding points are computed, most of the 2^d are empty in higher dimensions
+            self._children = [QuadTreeNode(orthant, self._rectangle._orthant(number, self._center), max_capacity, points_in_node, True, below)
+                              if orthant else None for number, orthant in enumerate(orthants)]
+        else:
+            self._children = [QuadTreeNode(orthant, rectangle, max_capacity, points_in_node, False, below)
+                              for orthant, rectangle in zip(orthants, self._rectangle._orthants(self._center))]
+        if points_in_node:
+            self.points = [point for child in self._quarters() for point in child.points]
+
+    # split the points between the orthants, in the order of their numbers
+    def _divide(self, points):
+        orthants = [[] for _ in range(2 ** len(self._center))]
+        if len(self._center) != 2:
             for point in points:
-                if point.x <= center.x:
-                    if point.y <= center.y:
-                        points_left_down.append(point)
-                    else:
-                        points_left_up.append(point)
+                orthants[self._slot(point)].append(point)
+            return orthants
+        # _slot inlined for the plane, dividing is most of the time spent building a QuadTree; the comparisons are
+        # branched on rather than added up, which is slow for the NumPy scalars of points taken from an array
+        left_down, right_down, left_up, right_up = orthants
+        center_x, center_y = self._center._point
+        for point in points:
+            x, y = point._point
+            if x <= center_x:
+                if y <= center_y:
+                    left_down.append(point)
                 else:
-                    if point.y <= center.y:
-                        points_right_down.append(point)
-                    else:
-                        points_right_up.append(point)
-            self._left_up = QuadTreeNode(points_left_up, rec_left_up, max_capacity, points_in_node)
-            self._right_up = QuadTreeNode(points_right_up, rec_right_up, max_capacity, points_in_node)
-            self._left_down = QuadTreeNode(points_left_down, rec_left_down, max_capacity, points_in_node)
-            self._right_down = QuadTreeNode(points_right_down, rec_right_down, max_capacity, points_in_node)
+                    left_up.append(point)
+            elif y <= center_y:
+                right_down.append(point)
+            else:
+                right_up.append(point)
+        return orthants
+
+    # existing subtrees in the order of their numbers, the missing ones of a compressed node are skipped
+    def _quarters(self):
+        return [child for child in self._children if child is not None]
 
     def _if_contains(self, point):
-        if self._left_up is None:
-            return point in self.points
-        center = self._rectangle.center()
-        ld = lu = rd = ru = False
-        if point.x <= center.x:
-            if point.y <= center.y:
-                return self._left_down._if_contains(point)
-            return self._left_up._if_contains(point)
+        node = self
+        while not node._leaf:
+            node = node._children[node._slot(point)]
+            if node is None:
+                return False
+        return point in node.points
+
+    # number of the orthant the point belongs to, like in Rectangle.orthant bit i is set for the upper half
+    # along dimension i; points on the center go to the lower half
+    def _slot(self, point):
+        coordinates, center = point._point, self._center._point
+        if len(center) == 2:
+            return (coordinates[0] > center[0]) + 2 * (coordinates[1] > center[1])
+        number, bit = 0, 1
+        for value, middle in zip(coordinates, center):
+            if value > middle:
+                number += bit
+            bit += bit
+        return number
+
+    # subtree the point belongs to, None if a compressed node misses it
+    def _child(self, point):
+        return self._children[self._slot(point)]
+
+    # add the point to the leaf it belongs to and split the leaf if it gets over max_capacity
+    # @return: the nodes from this one down to the leaf
+    # in a compressed tree a point falling into a missing orthant, or outside the cell of a shrunk subtree,
+    # is attached to the last node on the path instead
+    # with points_in_node the changed subtree gets its new points at its place in the points of every node on the path
+    def _insert(self, point, max_capacity, points_in_node, compressed=False, max_depth=None):
+        path = [self]
+        offsets = [0]                      # where the points of every node on the path start in those of this node
+        attached = None
+        while not path[-1]._leaf:
+            node = path[-1]
+            slot = node._slot(point)
+            child = node._children[slot]
+            start = offsets[-1] + (sum(other._count for other in node._children[:slot] if other is not None) if points_in_node else 0)
+            if child is not None and (not compressed or child._in_cell(point, node._rectangle._orthant(slot, node._center))):
+                path.append(child)
+                offsets.append(start)
+                continue
+            node._children[slot] = node._enclose(child, point, max_capacity, points_in_node, None if max_depth is None else max_depth - len(path))
+            attached = node._children[slot]
+            replaced = 0 if child is None else child._count
+            break
+        for node in path:
+            node._count += 1
+        if attached is not None:
+            if points_in_node:
+                for node, offset in zip(path, offsets):
+                    node.points[start - offset:start - offset + replaced] = attached.points
+            return path
+        leaf = path[-1]
+        replaced = len(leaf.points)
+        leaf.points.append(point)
+        if len(leaf.points) > max_capacity:
+            leaf._build(leaf.points, max_capacity, points_in_node, compressed, None if max_depth is None else max_depth - len(path) + 1)
+            if not leaf._leaf and not points_in_node:
+                del leaf.points
+        if points_in_node:
+            for node, offset in zip(path[:-1], offsets):
+                node.points[offsets[-1] - offset:offsets[-1] - offset + replaced] = leaf.points
+        return path
+
+    # check if the point, lying in the orthant this compressed node was shrunk from, lies in the cell of the node;
+    # the lower sides of the cell inside the orthant are center lines, whose points belong to the lower cells
+    def _in_cell(self, point, orthant):
+        if not self._rectangle._contains_point(point):
+            return False
+        return all(value != low or low == outer for value, low, outer in zip(point._point, self._rectangle._lowerleft._point, orthant._lowerleft._point))
+
+    # node that takes the place of child in the point's orthant of this compressed node: a new leaf if the orthant
+    # is empty, otherwise the smallest cell of the orthant where the point and the child fall apart
+    # (the child is a cell obtained by dividing the orthant, so its center tells which way it goes);
+    # if the child would end up more than max_depth levels below, the orthant is built again instead
+    def _enclose(self, child, point, max_capacity, points_in_node, max_depth=None):
+        rectangle = self._rectangle._orthant(self._slot(point), self._center)
+        if child is None:
+            return QuadTreeNode([point], rectangle, max_capacity, points_in_node, True)
+        if max_depth is not None and child._height() >= max_depth:
+            return QuadTreeNode(list(child._iter_leaves(points_in_node)) + [point], rectangle, max_capacity, points_in_node, True, max_depth)
+        anchor = child._center
+        node = QuadTreeNode([], rectangle, max_capacity, points_in_node, True)
+        while node._slot(anchor) == node._slot(point):
+            rectangle = node._rectangle._orthant(node._slot(point), node._center)
+            if rectangle == node._rectangle:
+                return QuadTreeNode(list(child._iter_leaves(points_in_node)) + [point], rectangle, max_capacity, points_in_node, True, max_depth)
+            node._rectangle = rectangle
+            node._center = rectangle.center()
+        node._leaf = False
+        node._count = child._count + 1
+        if points_in_node:
+            node.points = [point] + child.points if node._slot(point) < node._slot(anchor) else child.points + [point]
         else:
-            if point.y <= center.y:
-                return self._right_down._if_contains(point)
-            return self._right_up._if_contains(point)
-    
-    def _add_leaves(self, points_in_node=False):
+            del node.points
+        node._children = [None] * 2 ** len(point)
+        node._children[node._slot(anchor)] = child
+        node._children[node._slot(point)] = QuadTreeNode([point], node._rectangle._orthant(node._slot(point), node._center),
+                                                         max_capacity, points_in_node, True)
+        return node
+
+    # remove the point from its leaf, the highest node left with at most max_capacity points becomes a leaf
+    # a compressed tree drops the leaf if it gets empty, and its parent if only one subtree is left
+    # @return: the nodes from this one down to the updated leaf
+    def _remove(self, point, max_capacity, points_in_node, compressed=False):
+        path = [self]
+        while not path[-1]._leaf:
+            path.append(path[-1]._child(point))
+        for node in path:
+            node._count -= 1
+            if points_in_node:
+                node.points.remove(point)
+        if not points_in_node:
+            path[-1].points.remove(point)
+        for level, node in enumerate(path):
+            if not node._leaf and node._count <= max_capacity:
+                if not points_in_node:
+                    node.points = list(node._iter_leaves())
+                node._children = ()
+                node._leaf = True
+                return path[:level+1]
+        if compressed and len(path) > 1 and path[-1]._count == 0:
+            parent = path[-2]
+            parent._children[parent._slot(point)] = None
+            if len(path) > 2 and len(parent._quarters()) == 1:
+                grandparent = path[-3]
+                grandparent._children[grandparent._slot(point)] = parent._quarters()[0]
+                return path[:-2]
+            return path[:-1]
+        return path
+
+    # new root whose orthant is this node and whose rectangle contains the point, the rectangle is doubled
+    # on every axis, or extended up to the point if that is further; the center lies on the corner of this node
+    # (just below it when extended to the lower side, so the points on that edge still belong to this node)
+    def _grow(self, point, max_capacity, points_in_node, compressed=False, max_depth=None):
+        lowerleft, upperright, center, upper = self._rectangle.lowerleft.point, self._rectangle.upperright.point, [], []
+        for axis in range(len(point)):
+            extent = max(upperright[axis] - lowerleft[axis], lowerleft[axis] - point[axis], point[axis] - upperright[axis])
+            upper.append(point[axis] < lowerleft[axis])
+            if upper[axis]:
+                center.append(math.nextafter(lowerleft[axis], -math.inf))
+                lowerleft[axis] -= extent
+            else:
+                center.append(upperright[axis])
+                upperright[axis] += extent
+        if compressed:
+            return self._regrow(Rectangle(lowerleft, upperright), max_capacity, points_in_node, max_depth)
+        root = QuadTreeNode([], Rectangle(lowerleft, upperright), max_capacity, points_in_node)
+        root._center = Point(center)
+        root._leaf = False
         if points_in_node:
-            return set(self.points)
+            root.points = list(self.points)
         else:
-            if self._left_down is None:
-                return set(self.points)
-            return self._left_up._add_leaves() \
-                 | self._right_up._add_leaves() \
-                 | self._left_down._add_leaves() \
-                 | self._right_down._add_leaves()
+            del root.points
+        root._count = self._count
+        root._children = [QuadTreeNode([], rectangle, max_capacity, points_in_node) for rectangle in root._rectangle._orthants(root._center)]
+        root._children[sum(1 << axis for axis, side in enumerate(upper) if side)] = self
+        return root
+
+    # the cells of a compressed tree have to come from dividing the root, which the old root is not,
+    # so its points are divided again under the grown rectangle; the root keeps that rectangle even
+    # if all points fall into one orthant, so that the next points do not grow it again right away
+    def _regrow(self, rectangle, max_capacity, points_in_node, max_depth=None):
+        points = list(self._iter_leaves(points_in_node))
+        if max_depth is not None and max_depth <= 0:
+            return QuadTreeNode(points, rectangle, max_capacity, points_in_node, False, max_depth)
+        inner = QuadTreeNode(points, rectangle, max_capacity, points_in_node, True, max_depth)
+        if inner._rectangle == rectangle:
+            return inner
+        if max_depth is not None:
+            # shrinking does not use up depth, so the orthant shrinks the same way one level lower
+            inner = QuadTreeNode(points, rectangle, max_capacity, points_in_node, True, max_depth - 1)
+        root = QuadTreeNode([], rectangle, max_capacity, points_in_node, True)
+        root._leaf = False
+        root._count = inner._count
+        if points_in_node:
+            root.points = list(inner.points)
+        else:
+            del root.points
+        root._children = [None] * 2 ** len(rectangle)
+        root._children[root._slot(inner._center)] = inner
+        return root
+    
+    # length of the longest path from this node to a leaf
+    def _height(self):
+        height = 0
+        stack = [(self, 0)]
+        while stack:
+            node, level = stack.pop()
+            height = max(height, level)
+            if not node._leaf:
+                stack += [(child, level + 1) for child in node._quarters()]
+        return height
+
+    def _add_leaves(self, points_in_node=False):
+        return set(self._iter_leaves(points_in_node))
         
+    # collected into one set instead of merging sets on every level
     def _search_in_rectangle(self, rectangle, points_in_node=False):
-        if self._left_up is None:
-            return set([point for point in self.points if rectangle.contains(point)])
-        if rectangle.contains(self._rectangle):
-            return self._add_leaves(points_in_node)
-        if rectangle.does_intersect(self._rectangle):
-            return self._left_up._search_in_rectangle(rectangle, points_in_node) \
-                 | self._right_up._search_in_rectangle(rectangle, points_in_node) \
-                 | self._left_down._search_in_rectangle(rectangle, points_in_node) \
-                 | self._right_down._search_in_rectangle(rectangle, points_in_node)
-        return set()
+        return set(self._iter_in_rectangle(rectangle, points_in_node))
+
+    # walk the tree with an explicit stack, so no partial results are merged between levels
+    def _iter_in_rectangle(self, rectangle, points_in_node=False):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._leaf:
+                for point in node.points:
+                    if rectangle._contains_point(point):
+                        yield point
+            elif rectangle._contains_rectangle(node._rectangle):
+                yield from node._iter_leaves(points_in_node)
+            elif rectangle._intersects(node._rectangle):
+                stack += node._quarters()[::-1]
+
+    # _iter_in_rectangle as a list, or _count_in_rectangle if count, also counting the nodes visited, pruned and
+    # accepted whole and the points of the leaves scanned
+    def _trace_in_rectangle(self, rectangle, points_in_node=False, count=False):
+        result = 0 if count else []
+        nodes = pruned = accepted = scanned = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            nodes += 1
+            if node._leaf:
+                scanned += len(node.points)
+                found = [point for point in node.points if rectangle._contains_point(point)]
+                result += len(found) if count else found
+            elif rectangle._contains_rectangle(node._rectangle):
+                accepted += 1
+                result += node._count if count else list(node._iter_leaves(points_in_node))
+            elif rectangle._intersects(node._rectangle):
+                stack += node._quarters()[::-1]
+            else:
+                pruned += 1
+        return result, nodes, pruned, accepted, scanned
+
+    # count the points in the given rectangle, covered subtrees add their stored size
+    def _count_in_rectangle(self, rectangle):
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._leaf:
+                count += sum(1 for point in node.points if rectangle._contains_point(point))
+            elif rectangle._contains_rectangle(node._rectangle):
+                count += node._count
+            elif rectangle._intersects(node._rectangle):
+                stack += node._quarters()[::-1]
+        return count
+
+    def _aggregate_in_rectangle(self, rectangle, weights):
+        result = Aggregate.empty()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._leaf:
+                for point in node.points:
+                    if rectangle._contains_point(point):
+                        result = result.merge(Aggregate.of(weights[point]))
+            elif rectangle._contains_rectangle(node._rectangle):
+                result = result.merge(node._aggregate)
+            elif rectangle._intersects(node._rectangle):
+                stack += node._quarters()[::-1]
+        return result
+
+    # fill _aggregate of every node bottom-up
+    def _aggregate_weights(self, weights):
+        stack = [(self, False)]
+        while stack:
+            node, ready = stack.pop()
+            children = node._quarters()
+            if node._leaf:
+                node._aggregate = Aggregate.empty()
+                for point in node.points:
+                    node._aggregate = node._aggregate.merge(Aggregate.of(weights[point]))
+            elif ready:
+                node._aggregate = Aggregate.empty()
+                for child in children:
+                    node._aggregate = node._aggregate.merge(child._aggregate)
+            else:
+                stack.append((node, True))
+                stack += [(child, False) for child in children]
+
+    def _iter_leaves(self, points_in_node=False):
+        if points_in_node:
+            yield from self.points
+            return
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._leaf:
+                yield from node.points
+            else:
+                stack += node._quarters()[::-1]
+
+    # find all points in the ball, subtrees whose rectangle lies inside the ball are taken whole
+    def _search_in_radius(self, center, radius, metric, points_in_node=False):
+        result = set()
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._leaf:
+                result.update(point for point in node.points if center.distance(point, metric) <= radius)
+            elif node._rectangle.max_distance(center, metric) <= radius:
+                result.update(node._iter_leaves(points_in_node))
+            elif node._rectangle.distance(center, metric) <= radius:
+                stack += node._quarters()[::-1]
+        return result
+
+    # best-first search: nodes are visited by the distance to their rectangle, the k closest points found so far
+    # are kept in a max-heap and the search stops once no rectangle can hold a closer point
+    def _nearest(self, point, k):
+        order = count()
+        best = []                          # (-distance, order, point)
+        queue = [(self._rectangle.distance(point), next(order), self)]
+        while queue:
+            bound, _, node = heapq.heappop(queue)
+            if len(best) == k and bound > -best[0][0]:
+                break
+            if node._leaf:
+                for candidate in node.points:
+                    distance = point.distance(candidate)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, next(order), candidate))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, next(order), candidate))
+            else:
+                for child in node._quarters():
+                    heapq.heappush(queue, (child._rectangle.distance(point), next(order), child))
+        return [(candidate, -distance) for distance, _, candidate in sorted(best, reverse=True)]
         
 
 # ------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,145 @@
+from utilities.Rectangle import Rectangle
+
+from collections import OrderedDict
+from itertools import product
+import math
+import sys
+
+_GRID = 16                           # cells per axis of the bounds of the tree the cached rectangles are bucketed in
+_WIDE = 64                           # rectangles covering more cells are kept in one list checked on every change
+
+class QueryCache:
+    """
+    Result cache in front of search_in_rectangle and if_contains of a KdTree or QuadTree. Entries are keyed on the
+    bounds of the rectangle or the coordinates of the point as floats and evicted least recently used first once the
+    memory they add, the lists of results and their keys, would exceed max_bytes; the points are those of the tree.
+    insert and remove go to the tree and drop only the entries of the rectangles containing the point and the entry
+    of the point itself; the rectangles are bucketed in a grid over the bounds of the tree, so only those in the
+    point's cell are checked. Changes made to the tree directly are not seen, clear() drops every entry. After changes,
+    the order of the points of an entry that was kept may differ from a new search, the points are the same.
+    Other attributes are those of the tree.
+    """
+    def __init__(self, tree, max_bytes=64 * 2**20):
+        if max_bytes < 0:
+            raise ValueError("The cache size must be non-negative.")
+        self._tree = tree
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()     # ("rectangle", lower, upper) or ("point", coordinates) -> (result, size), least recently used first
+        bounds = tree._root._rectangle
+        self._origin = tuple(map(float, bounds.lowerleft._point))
+        self._cell = tuple((high - low) / _GRID or 1.0 for low, high in zip(self._origin, map(float, bounds.upperright._point)))
+        self._buckets = {}                # grid cell -> keys of the cached rectangles overlapping it
+        self._wide = set()                # keys of the cached rectangles overlapping more than _WIDE cells
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def __getattr__(self, name):
+        return getattr(self._tree, name)
+
+    # find all points in the given rectangle
+    def search_in_rectangle(self, rectangle, raw=False):
+        if not isinstance(rectangle, Rectangle):
+            raise ValueError("The rectangle is not a Rectangle object.")
+        key = ("rectangle", tuple(map(float, rectangle.lowerleft._point)), tuple(map(float, rectangle.upperright._point)))
+        result = self._get(key)
+        if result is None:
+            result = self._tree.search_in_rectangle(rectangle)
+            self._put(key, result, sys.getsizeof(result))
+        if raw:
+            return [point.point for point in result]
+        return list(result)
+
+    # check if the tree contains the point
+    def if_contains(self, point):
+        key = ("point", tuple(map(float, point)))
+        result = self._get(key)
+        if result is None:
+            result = self._tree.if_contains(point)
+            self._put(key, result, 0)
+        return result
+
+    # add a point to the tree and drop the entries it changes
+    def insert(self, point, *arguments):
+        self._tree.insert(point, *arguments)
+        self._invalidate(point)
+
+    # remove a point from the tree and drop the entries it changes
+    def remove(self, point):
+        self._tree.remove(point)
+        self._invalidate(point)
+
+    def clear(self):
+        self._entries.clear()
+        self._buckets.clear()
+        self._wide.clear()
+        self._bytes = 0
+
+    # hits and misses of the lookups, entries evicted to stay within max_bytes and dropped by changes,
+    # and the number of entries and bytes cached
+    def stats(self):
+        return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions,
+                "invalidations": self._invalidations, "entries": len(self._entries), "bytes": self._bytes}
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    # size: bytes of the result, those of the key and about 100 of the entry in the ordered dict are added here
+    def _put(self, key, result, size):
+        size += 100 + sys.getsizeof(key) + sum(sys.getsizeof(part) + 24 * len(part) for part in key[1:])
+        if size > self._max_bytes:
+            return
+        self._entries[key] = (result, size)
+        self._bytes += size
+        if key[0] == "rectangle":
+            self._bucket(key, True)
+        while self._bytes > self._max_bytes:
+            self._drop(next(iter(self._entries)))
+            self._evictions += 1
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+        if key[0] == "rectangle":
+            self._bucket(key, False)
+
+    # cell of the grid holding the coordinates, those outside the bounds of the tree (infinite ones too) fall in the border cells
+    def _cell_of(self, coordinates):
+        return tuple(int(min(max((x - origin) / cell, 0.0), _GRID - 1.0))
+                     for x, origin, cell in zip(coordinates, self._origin, self._cell))
+
+    # add the key of a cached rectangle to the buckets of the cells it overlaps, or remove it
+    def _bucket(self, key, add):
+        low, high = self._cell_of(key[1]), self._cell_of(key[2])
+        if math.prod(b - a + 1 for a, b in zip(low, high)) > _WIDE:
+            if add:
+                self._wide.add(key)
+            else:
+                self._wide.discard(key)
+            return
+        for cell in product(*(range(a, b + 1) for a, b in zip(low, high))):
+            if add:
+                self._buckets.setdefault(cell, set()).add(key)
+                continue
+            bucket = self._buckets[cell]
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[cell]
+
+    # drop the entries of the point and of the rectangles containing it, only those in the point's cell can
+    def _invalidate(self, point):
+        coordinates = tuple(map(float, point))
+        candidates = self._buckets.get(self._cell_of(coordinates), set()) | self._wide
+        changed = [key for key in candidates if all(low <= x <= high for low, x, high in zip(key[1], coordinates, key[2]))]
+        if ("point", coordinates) in self._entries:
+            changed.append(("point", coordinates))
+        for key in changed:
+            self._drop(key)
+        self._invalidations += len(changed)
@@ -0,0 +1,140 @@
+from utilities.NodeArrays import as_points, as_rectangles
+from MappedTree import MappedTree
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+import os
+import time
+
+import numpy as np
+
+_tree = None                                   # MappedTree of a worker process, attached once by _start
+
+def _start(name):
+    global _tree
+    _tree = MappedTree.attach(name)
+
+# answer a chunk of rectangles, given by their lower and upper corners, in one traversal of the arrays of the
+# worker process if none are given; the points of rectangle i are indices[offsets[i]:offsets[i+1]]
+def _search(lower, upper, arrays=None):
+    arrays = _tree._node_arrays() if arrays is None else arrays
+    start = time.perf_counter()
+    result = arrays.search_rectangles(lower, upper)
+    return time.perf_counter() - start, result
+
+# answer a chunk of membership queries in one traversal
+def _contains(points, arrays=None):
+    arrays = _tree._node_arrays() if arrays is None else arrays
+    start = time.perf_counter()
+    result = arrays.contains(points)
+    return time.perf_counter() - start, result
+
+class QueryExecutor:
+    """
+    Answers a stream of queries on a built KdTree or QuadTree with a pool of workers. The queries are cut into
+    chunks of chunk_size, at most two chunks per worker are in flight, so streams of any length are read as the
+    results are consumed, and the results are yielded in the order of the queries. Every chunk is answered in one
+    traversal of the tree's NodeArrays, which returns the positions of the points found; they are turned into the
+    tree's points only when the result of a query is yielded. The points found in a rectangle are those of
+    search_in_rectangle, in the same order.
+    A process pool publishes the arrays once in shared memory with share(), every worker attaches to them, and the
+    block is released by close(). A thread pool shares the arrays. Both answer on the snapshot of the tree taken when
+    the executor starts, so later changes of the tree are not seen.
+    """
+    def __init__(self, tree, workers=None, pool="process", chunk_size=256):
+        if pool not in ("process", "thread"):
+            raise ValueError("The pool must be 'process' or 'thread'.")
+        if workers is not None and workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+        if chunk_size < 1:
+            raise ValueError("The chunk size must be at least 1.")
+        self._arrays = tree._node_arrays()
+        self._points = list(tree._points)      # points by position, as the tree returns them
+        self._dimension = self._arrays.points.shape[1]
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+        self._threads = pool == "thread"
+        self._shared = None
+        if self._threads:
+            self._pool = ThreadPoolExecutor(self._workers)
+        else:
+            self._shared = tree.share()
+            self._pool = ProcessPoolExecutor(self._workers, initializer=_start, initargs=(self._shared.name,))
+        self._queries = 0
+        self._seconds = 0.0                    # wall time spent in search and contains
+        self._busy = 0.0                       # time the workers spent answering chunks
+        self._latencies = []                   # seconds from submitting every chunk until it was answered
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown()
+        if self._shared is not None:
+            self._shared.close()
+            self._shared.unlink()
+            self._shared = None
+
+    # find the points in every rectangle, yields the points found in each of them in order
+    def search(self, rectangles, raw=False):
+        for offsets, indices in self._map(_search, rectangles, lambda chunk: as_rectangles(chunk, self._dimension)):
+            offsets, indices = offsets.tolist(), indices.tolist()
+            for i in range(len(offsets) - 1):
+                points = [self._points[index] for index in indices[offsets[i]:offsets[i + 1]]]
+                yield [point.point for point in points] if raw else points
+
+    # check every point, yields True for the points stored in the tree in order
+    def contains(self, points):
+        for result in self._map(_contains, points, lambda chunk: (as_points(chunk, self._dimension),)):
+            yield from result.tolist()
+
+    # number of queries and chunks answered, the wall time spent and the queries per second,
+    # the time the workers spent answering and the latency of the chunks in seconds
+    def stats(self):
+        latencies = np.array(self._latencies)
+        latency = {}
+        if len(latencies):
+            latency = {"mean": float(latencies.mean()), "p50": float(np.percentile(latencies, 50)),
+                       "p99": float(np.percentile(latencies, 99)), "max": float(latencies.max())}
+        return {"queries": self._queries, "chunks": len(latencies), "seconds": self._seconds,
+                "throughput": self._queries / self._seconds if self._seconds else 0.0, "busy": self._busy, "latency": latency}
+
+    # yields the result of every chunk, convert turns a chunk of queries into the arguments of function
+    def _map(self, function, queries, convert):
+        queries = iter(queries)
+        pending = deque()
+        start = time.perf_counter()
+        try:
+            for chunk in iter(lambda: list(islice(queries, self._chunk_size)), []):
+                pending.append((len(chunk), *self._submit(function, convert(chunk))))
+                if len(pending) >= 2 * self._workers:
+                    yield self._collect(pending.popleft())
+            while pending:
+                yield self._collect(pending.popleft())
+        finally:
+            self._seconds += time.perf_counter() - start
+
+    # returns the time of submission, a list the time the chunk is answered is put in and the future
+    # the latency is taken when the chunk is answered, not when its turn comes to be yielded
+    def _submit(self, function, arguments):
+        submitted = time.perf_counter()
+        answered = []
+        if self._threads:
+            future = self._pool.submit(function, *arguments, self._arrays)
+        else:
+            future = self._pool.submit(function, *arguments)
+        future.add_done_callback(lambda _: answered.append(time.perf_counter()))
+        return submitted, answered, future
+
+    # callbacks run after result() returns, so a chunk answered just now may not have its time yet
+    def _collect(self, task):
+        size, submitted, answered, future = task
+        busy, results = future.result()
+        self._latencies.append((answered[0] if answered else time.perf_counter()) - submitted)
+        self._busy += busy
+        self._queries += size
+        return results
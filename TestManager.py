@@ -12,6 +12,8 @@ class TestManager:
                        self.contain_point_float,
                        self.points_in_rectangle_int,
                        self.points_in_rectangle_float]
+        if hasattr(tree, "nearest"):
+            self._tests.append(self.nearest_points)
         self.mytree = tree
 
     def all_tests(self):
@@ -128,6 +130,29 @@ class TestManager:
         print(f"\nPassed {good}/{all} tests.")
         return good, all
 
+    def nearest_points(self):
+        print("Test nearest_points:")
+        points = [((10, 85), (18, 89), (29, 33), (32, 76), (34, 21), (39, 69), (43, 94), (44, 74), (60, 48), (61, 49), (61, 90), (66, 6), (69, 60), (71, 72), (84, 49)),
+                  ((1,2), (3,4), (5,6), (7,8), (9,10))]
+        checks = [{((40,70), 1):[(39, 69)], ((40,70), 3):[(39, 69), (44, 74), (32, 76)], ((60,50), 2):[(61, 49), (60, 48)],
+                   ((0,0), 1):[(34, 21)], ((100,100), 2):[(61, 90), (71, 72)], ((50,50), 15):list(points[0])},
+                  {((0,0), 1):[(1,2)], ((6,6), 1):[(5,6)], ((100,100), 2):[(9,10), (7,8)], ((4,5), 10):list(points[1])}]
+        good = all = 0
+        for i in range(len(points)):
+            tree = self.mytree(points[i])
+            for (point, k), expected in checks[i].items():
+                actual = tree.nearest(point, k, raw=True)
+                distances = [distance for _, distance in actual]
+                if not self.same([neighbour for neighbour, _ in actual], expected) or distances != sorted(distances) \
+                   or any(abs(distance - Point(point).distance(neighbour)) > 1e-9 for neighbour, distance in actual):
+                    print("0", end="")
+                else:
+                    print("+", end="")
+                    good += 1
+                all += 1
+        print(f"\nPassed {good}/{all} tests.")
+        return good, all
+
     def same(self, act, exp):
         act = [tuple(i) for i in act]
         exp = [tuple(i) for i in exp]
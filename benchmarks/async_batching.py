@@ -0,0 +1,84 @@
+"""
+Load generator for asyncio front ends of KdTree: rectangle queries (about 0.1% of the area) arrive
+at random times at the given rates, each one handled by its own task like a request of a web server.
+Every query is answered by calling search_in_rectangle in the task (blocking the event loop), by one
+run_in_executor call per query, or by AsyncIndex with the given batch windows. Prints the requests
+answered per second and the 50th and 99th percentile latency from the arrival of a request to its
+answer, which includes the time it waits for the event loop.
+
+    python -m benchmarks.async_batching --size 100000 --rates 2000 4000 8000 --windows 0 0.001 0.005
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate
+from AsyncIndex import AsyncIndex
+from KdTree import KdTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import asyncio
+import gc
+import random
+import time
+
+import numpy as np
+
+# start a task awaiting answer(rectangle) for every rectangle at exponentially distributed intervals,
+# rate of them per second on average, and return the wall time and the latency of every request
+async def load(answer, rectangles, rate):
+    latencies = []
+    async def request(rectangle, arrival):
+        await answer(rectangle)
+        latencies.append(time.perf_counter() - arrival)
+    tasks = []
+    start = arrival = time.perf_counter()
+    for rectangle in rectangles:
+        arrival += random.expovariate(rate)
+        await asyncio.sleep(max(arrival - time.perf_counter(), 0))
+        tasks.append(asyncio.create_task(request(rectangle, arrival)))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - start, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rates", type=float, nargs="+", default=[2000, 4000, 8000], help="requests per second")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 0.001, 0.005])
+    parser.add_argument("--max-batch", type=int, default=1024)
+    parser.add_argument("--distribution", default="uniform", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--leaf-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    tree = KdTree(generate(args.distribution, args.size), leaf_size=args.leaf_size)
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    rectangles = []
+    for _ in range(args.requests):
+        x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+        rectangles.append(Rectangle((x, y), (x + side, y + side)))
+
+    async def inline(rectangle):
+        return tree.search_in_rectangle(rectangle)
+
+    async def offloaded(rectangle):
+        return await asyncio.get_running_loop().run_in_executor(None, tree.search_in_rectangle, rectangle)
+
+    async def run():
+        tree._node_arrays()
+        # keep the collector from going over the nodes of the tree, which would add its pauses to every mode
+        gc.freeze()
+        print(f"{'rate':>6}  {'mode':<16}{'requests/s':>12}{'p50 [ms]':>10}{'p99 [ms]':>10}{'mean batch':>12}")
+        for rate in args.rates:
+            modes = [("inline", inline, None), ("executor", offloaded, None)]
+            for window in args.windows:
+                index = AsyncIndex(tree, window, args.max_batch)
+                modes.append((f"batched {window * 1000:g} ms", index.search, index))
+            for name, answer, index in modes:
+                elapsed, latencies = await load(answer, rectangles, rate)
+                batch = index.stats()["mean_batch"] if index else 1
+                print(f"{rate:>6.0f}  {name:<16}{len(latencies) / elapsed:>12.0f}{np.percentile(latencies, 50) * 1000:>10.2f}"
+                      f"{np.percentile(latencies, 99) * 1000:>10.2f}{batch:>12.1f}", flush=True)
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Throughput of the batched queries search_in_rectangles and contains_many against a loop of
+search_in_rectangle and if_contains calls.
+
+    python -m benchmarks.batched --size 100000 --queries 10000
+"""
+from benchmarks.cases import DISTRIBUTIONS, generate
+from FlatKdTree import FlatKdTree
+from KdTree import KdTree
+from QuadTree import QuadTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+def measure(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--distribution", default="uniform", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--width", type=float, default=10, help="maximal side of a query rectangle")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    points = generate(args.distribution, args.size)
+    boxes = []
+    for _ in range(args.queries):
+        x, y = random.uniform(0, 1000), random.uniform(0, 1000)
+        boxes.append(((x, y), (x + random.uniform(0, args.width), y + random.uniform(0, args.width))))
+    rectangles = [Rectangle(*box) for box in boxes]
+    probes = [random.choice(points) if random.random() < 0.5 else (random.uniform(0, 1000), random.uniform(0, 1000)) for _ in range(args.queries)]
+    boxes, probes_array = np.array(boxes), np.array(probes)
+    print(f"{'tree':<12}{'rect loop [s]':>15}{'batched [s]':>13}{'speedup':>9}{'contains loop [s]':>19}{'batched [s]':>13}{'speedup':>9}")
+    for name, tree in (("KdTree", KdTree(points)), ("QuadTree", QuadTree(points, max_capacity=4)), ("FlatKdTree", FlatKdTree(points))):
+        tree._node_arrays()
+        loop = measure(lambda: [tree.search_in_rectangle(rectangle) for rectangle in rectangles])
+        batched = measure(lambda: tree.search_in_rectangles(boxes))
+        contains_loop = measure(lambda: [tree.if_contains(point) for point in probes])
+        contains_batched = measure(lambda: tree.contains_many(probes_array))
+        print(f"{name:<12}{loop:>15.3f}{batched:>13.3f}{loop / batched:>8.1f}x{contains_loop:>19.3f}{contains_batched:>13.3f}{contains_loop / contains_batched:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Dashboard workload on QuadTree: queries repeat a fixed set of viewport rectangles (about 1% of the
+area), picked with Zipf-like popularity, and a given share of the operations inserts a new point.
+Prints the operations per second without and with QueryCache, its hit rate and the bytes it holds.
+
+    python -m benchmarks.cache --size 100000 --operations 20000 --viewports 200 --inserts 0 0.001 0.01
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from QuadTree import QuadTree
+from QueryCache import QueryCache
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+
+def run(tree, operations):
+    for operation, argument in operations:
+        if operation == "insert":
+            tree.insert(argument)
+        else:
+            tree.search_in_rectangle(argument)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--viewports", type=int, default=200)
+    parser.add_argument("--inserts", type=float, nargs="+", default=[0, 0.001, 0.01], help="share of the operations inserting a point")
+    parser.add_argument("--max-capacity", type=int, default=8)
+    parser.add_argument("--max-bytes", type=int, default=64 * 2**20)
+    parser.add_argument("--distribution", default="uniform", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    points = generate(args.distribution, args.size)
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1
+    viewports = []
+    for _ in range(args.viewports):
+        x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+        viewports.append(Rectangle((x, y), (x + side, y + side)))
+    popularity = [1 / (rank + 1) for rank in range(args.viewports)]
+    print(f"{'inserts':>8}{'plain [op/s]':>14}{'cached [op/s]':>15}{'hit rate':>10}{'cache [MB]':>12}")
+    for share in args.inserts:
+        operations = []
+        for _ in range(args.operations):
+            if random.random() < share:
+                operations.append(("insert", (random.uniform(0, 1000), random.uniform(0, 1000))))
+            else:
+                operations.append(("search", random.choices(viewports, popularity)[0]))
+        tree = QuadTree(points, args.max_capacity)
+        plain, _ = measure(lambda: run(tree, operations))
+        cache = QueryCache(QuadTree(points, args.max_capacity), args.max_bytes)
+        cached, _ = measure(lambda: run(cache, operations))
+        stats = cache.stats()
+        print(f"{share:>8g}{args.operations / plain:>14.0f}{args.operations / cached:>15.0f}"
+              f"{stats['hits'] / (stats['hits'] + stats['misses']):>10.3f}{stats['bytes'] / 2**20:>12.2f}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+from comparator.CaseGenerator import CaseGenerator
+from utilities.Rectangle import Rectangle
+
+import math
+import time
+
+AREA = Rectangle((0, 0), (1000, 1000))
+CLUSTERS = [Rectangle((100, 100), (200, 200)), Rectangle((700, 150), (850, 300)),
+            Rectangle((400, 600), (450, 650)), Rectangle((800, 800), (950, 950))]
+
+# every CaseGenerator distribution, scaled so that it yields about quantity points
+DISTRIBUTIONS = {
+    "uniform": lambda gen, quantity: gen.uniform_distribution(quantity, AREA),
+    "normal": lambda gen, quantity: gen.normal_distribution(quantity, AREA),
+    "grid": lambda gen, quantity: gen.grid_distribution((math.isqrt(quantity), math.isqrt(quantity)), AREA),
+    "cluster": lambda gen, quantity: gen.cluster_distribution(quantity // len(CLUSTERS), CLUSTERS),
+    "outliers": lambda gen, quantity: gen.outliers_distribution((quantity - quantity // 100, quantity // 100), AREA),
+    "cross": lambda gen, quantity: gen.cross_distribution((quantity // 2, quantity - quantity // 2), AREA),
+    "rectangle": lambda gen, quantity: gen.rectangle_distribution(quantity, AREA),
+}
+
+# the same distributions as (n, 2) arrays from CaseGenerator's NumPy path, in chunks if chunk_size is given
+ARRAYS = {
+    "uniform": lambda gen, quantity, **kwargs: gen.uniform_array(quantity, AREA, **kwargs),
+    "normal": lambda gen, quantity, **kwargs: gen.normal_array(quantity, AREA, **kwargs),
+    "grid": lambda gen, quantity, seed=None, **kwargs: gen.grid_array((math.isqrt(quantity), math.isqrt(quantity)), AREA, **kwargs),
+    "cluster": lambda gen, quantity, **kwargs: gen.cluster_array(quantity // len(CLUSTERS), CLUSTERS, **kwargs),
+    "outliers": lambda gen, quantity, **kwargs: gen.outliers_array((quantity - quantity // 100, quantity // 100), AREA, **kwargs),
+    "cross": lambda gen, quantity, **kwargs: gen.cross_array((quantity // 2, quantity - quantity // 2), AREA, **kwargs),
+    "rectangle": lambda gen, quantity, **kwargs: gen.rectangle_array(quantity, AREA, **kwargs),
+}
+
+def generate(distribution, quantity):
+    """
+    Generate unique points of the given distribution
+    @param distribution: name of the distribution, key of DISTRIBUTIONS
+    @param quantity: approximate number of points
+    @return: a list of tuples
+    """
+    points = DISTRIBUTIONS[distribution](CaseGenerator(), quantity)
+    return list(dict.fromkeys(tuple(point) for point in points))
+
+def measure(function):
+    """
+    Time one call of a function
+    @param function: function without arguments
+    @return: a tuple of the seconds it took and its result
+    """
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
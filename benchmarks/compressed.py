@@ -0,0 +1,39 @@
+"""
+Size, depth, build time and rectangle query time of QuadTree with and without compression
+on every CaseGenerator distribution. Queries are rectangles covering about 0.1% of the area.
+
+    python -m benchmarks.compressed --size 100000 --max-capacity 1
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from QuadTree import QuadTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--max-capacity", type=int, default=1)
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    print(f"{'distribution':<12}{'compressed':>11}{'nodes':>10}{'empty':>10}{'depth':>7}{'build [s]':>11}{'rectangle [ms]':>16}")
+    for distribution in args.distributions:
+        random.seed(args.seed)
+        points = generate(distribution, args.size)
+        rectangles = []
+        for _ in range(args.queries):
+            x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+            rectangles.append(Rectangle((x, y), (x + side, y + side)))
+        for compressed in (False, True):
+            build, tree = measure(lambda: QuadTree(points, args.max_capacity, compressed=compressed))
+            search, _ = measure(lambda: [tree.search_in_rectangle(rectangle) for rectangle in rectangles])
+            stats = tree.stats()
+            print(f"{distribution:<12}{str(compressed):>11}{stats['nodes']:>10}{stats['empty_leaves']:>10}{stats['depth']:>7}"
+                  f"{build:>11.2f}{search / args.queries * 1000:>16.3f}", flush=True)
+
+if __name__ == "__main__":
+    main()
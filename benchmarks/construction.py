@@ -0,0 +1,75 @@
+"""
+Construction time of KdTree with the presorted build path against the previous build path,
+which sorted the points of every node again on every level.
+
+    python -m benchmarks.construction --sizes 100000 1000000
+"""
+from benchmarks.cases import DISTRIBUTIONS, generate
+from KdTree import KdTree, KdTreeNode
+from utilities.Point import Point
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+import sys
+import time
+
+class SortingKdTreeNode(KdTreeNode):
+    # previous build path: sort the slice on every level and split the list twice
+    def _build(self, points, depth, points_in_node, leaf_size=1, coords=None, ordered=None):
+        if len(points) > 1:
+            points.sort(key=lambda x: x[depth % len(x)])
+            median = (len(points)-1) // 2
+            self._axis = points[median][depth % len(points[median])]
+            lr, rr = self._rectangle.divide(depth % len(self._rectangle), self._axis)
+            med = median
+            for point in points[median+1:]:
+                if point[depth % len(points[median])] == points[median][depth % len(points[median])]:
+                    med += 1
+                else:
+                    break
+            self._left = SortingKdTreeNode(points[:med+1], lr, depth + 1, points_in_node)
+            self._right = SortingKdTreeNode(points[med+1:], rr, depth + 1, points_in_node)
+
+class SortingKdTree(KdTree):
+    # same validation as KdTree, only the node class differs
+    def __init__(self, points):
+        points = [Point(point) for point in points]
+        if len(set(points)) != len(points):
+            raise ValueError("The points are not unique.")
+        self._root = SortingKdTreeNode(points, Rectangle.from_points(points))
+        self._points_in_node = False
+        self._dimension = len(points[0])
+
+def measure(tree, points, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            tree(points)
+        except RecursionError:
+            return None
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    sys.setrecursionlimit(10000)
+    print(f"{'distribution':<12}{'points':>10}{'sorting [s]':>14}{'presorted [s]':>16}{'speedup':>10}")
+    for distribution in args.distributions:
+        for size in args.sizes:
+            random.seed(args.seed)
+            points = generate(distribution, size)
+            old = measure(SortingKdTree, points, args.repeat)
+            new = measure(KdTree, points, args.repeat)
+            old_text = "recursion" if old is None else f"{old:.2f}"
+            speedup = "-" if old is None else f"{old / new:.2f}x"
+            print(f"{distribution:<12}{len(points):>10}{old_text:>14}{new:>16.2f}{speedup:>10}", flush=True)
+
+if __name__ == "__main__":
+    main()
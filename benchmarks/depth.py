@@ -0,0 +1,46 @@
+"""
+Depth, leaf occupancy, build time and rectangle query time of QuadTree with and without max_depth
+on the distributions where many points share a coordinate. "line" puts half of the points on one
+vertical line with spacing close to the float precision, the worst case for the unbounded tree.
+Queries are rectangles covering about 0.1% of the area.
+
+    python -m benchmarks.depth --size 100000 --max-depth 12
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from QuadTree import QuadTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+
+def line(quantity):
+    points = generate("uniform", quantity - quantity // 2)
+    return list(dict.fromkeys(points + [(500.0, 500.0 + i * 1e-10) for i in range(quantity // 2)]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--max-capacity", type=int, default=4)
+    parser.add_argument("--max-depth", type=int, default=12)
+    parser.add_argument("--distributions", nargs="+", default=["cross", "rectangle", "line"], choices=list(DISTRIBUTIONS) + ["line"])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    print(f"{'distribution':<12}{'max_depth':>10}{'depth':>7}{'nodes':>10}{'overflow':>10}{'largest leaf':>14}{'build [s]':>11}{'rectangle [ms]':>16}")
+    for distribution in args.distributions:
+        random.seed(args.seed)
+        points = line(args.size) if distribution == "line" else generate(distribution, args.size)
+        rectangles = []
+        for _ in range(args.queries):
+            x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+            rectangles.append(Rectangle((x, y), (x + side, y + side)))
+        for max_depth in (None, args.max_depth):
+            build, tree = measure(lambda: QuadTree(points, args.max_capacity, max_depth=max_depth))
+            search, _ = measure(lambda: [tree.search_in_rectangle(rectangle) for rectangle in rectangles])
+            stats = tree.stats()
+            print(f"{distribution:<12}{str(max_depth):>10}{stats['depth']:>7}{stats['nodes']:>10}{stats['overflow_leaves']:>10}"
+                  f"{max(stats['size_histogram']):>14}{build:>11.2f}{search / args.queries * 1000:>16.3f}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Mixed insert/remove/query workload on KdTree. The tree is built on half of the points,
+then every operation inserts a point of the other half, removes a stored point or answers
+a rectangle query covering about 0.1% of the area, in the given proportions. The cost of
+rebuilding the tree through the constructor, the only way to add a point before insert existed,
+is measured once on the final set of points.
+
+    python -m benchmarks.dynamic --size 100000 --operations 20000
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from KdTree import KdTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--mix", type=float, nargs=3, default=[0.4, 0.2, 0.4], metavar=("INSERT", "REMOVE", "QUERY"))
+    parser.add_argument("--leaf-size", type=int, default=1)
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    print(f"{'distribution':<12}{'points':>8}{'insert [ms]':>13}{'remove [ms]':>13}{'query [ms]':>12}{'rebuild [s]':>13}")
+    for distribution in args.distributions:
+        random.seed(args.seed)
+        points = generate(distribution, args.size)
+        random.shuffle(points)
+        stored, pending = points[:len(points) // 2], points[len(points) // 2:]
+        tree = KdTree(stored, leaf_size=args.leaf_size)
+        times = {"insert": [0.0, 0], "remove": [0.0, 0], "query": [0.0, 0]}
+        for _ in range(args.operations):
+            operation = random.choices(list(times), weights=args.mix)[0]
+            if operation == "insert" and pending:
+                point = pending.pop()
+                elapsed, _ = measure(lambda: tree.insert(point))
+                stored.append(point)
+            elif operation == "remove" and stored:
+                index = random.randrange(len(stored))
+                stored[index], stored[-1] = stored[-1], stored[index]
+                point = stored.pop()
+                elapsed, _ = measure(lambda: tree.remove(point))
+                pending.append(point)
+            else:
+                operation = "query"
+                x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+                rectangle = Rectangle((x, y), (x + side, y + side))
+                elapsed, _ = measure(lambda: tree.search_in_rectangle(rectangle))
+            times[operation][0] += elapsed
+            times[operation][1] += 1
+        rebuild, _ = measure(lambda: KdTree(stored, leaf_size=args.leaf_size))
+        mean = {operation: total / max(number, 1) * 1000 for operation, (total, number) in times.items()}
+        print(f"{distribution:<12}{len(stored):>8}{mean['insert']:>13.3f}{mean['remove']:>13.3f}{mean['query']:>12.3f}{rebuild:>13.2f}", flush=True)
+
+if __name__ == "__main__":
+    main()
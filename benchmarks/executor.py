@@ -0,0 +1,57 @@
+"""
+Throughput of rectangle queries (about 0.1% of the area) and membership queries on KdTree, answered
+one by one in this process and by QueryExecutor with process and thread pools of the given sizes,
+with the 99th percentile latency of a chunk. The number of cores is printed first.
+
+    python -m benchmarks.executor --size 100000 --queries 20000 --workers 1 2 4 8
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from KdTree import KdTree
+from QueryExecutor import QueryExecutor
+from utilities.Rectangle import Rectangle
+
+import argparse
+import os
+import random
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--distribution", default="uniform", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--leaf-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    points = generate(args.distribution, args.size)
+    tree = KdTree(points, leaf_size=args.leaf_size)
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    rectangles = []
+    for _ in range(args.queries):
+        x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+        rectangles.append(Rectangle((x, y), (x + side, y + side)))
+    queries = random.sample(points, args.queries // 2) + [(random.uniform(0, 1000), random.uniform(0, 1000)) for _ in range(args.queries // 2)]
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'query':<10}{'pool':>9}{'workers':>9}{'queries/s':>11}{'p99 [ms]':>10}")
+    serial = {
+        "rectangle": lambda: [tree.search_in_rectangle(rectangle) for rectangle in rectangles],
+        "contains": lambda: [tree.if_contains(point) for point in queries],
+    }
+    for query, run in serial.items():
+        elapsed, _ = measure(run)
+        print(f"{query:<10}{'serial':>9}{1:>9}{args.queries / elapsed:>11.0f}{'':>10}", flush=True)
+    for pool in ("process", "thread"):
+        for workers in args.workers:
+            for query in serial:
+                with QueryExecutor(tree, workers, pool, args.chunk_size) as executor:
+                    if query == "rectangle":
+                        list(executor.search(rectangles))
+                    else:
+                        list(executor.contains(queries))
+                    stats = executor.stats()
+                print(f"{query:<10}{pool:>9}{workers:>9}{stats['throughput']:>11.0f}{stats['latency']['p99'] * 1000:>10.2f}", flush=True)
+
+if __name__ == "__main__":
+    main()
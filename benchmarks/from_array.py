@@ -0,0 +1,52 @@
+"""
+Build time and peak memory allocated during the build of KdTree, QuadTree and FlatKdTree from an
+(n, 2) float64 array: through the constructor given the array itself, through the constructor given
+array.tolist() (the conversion included) and through from_array. Memory is traced with tracemalloc
+and does not include the array.
+
+    python -m benchmarks.from_array --sizes 100000 1000000
+"""
+from benchmarks.cases import DISTRIBUTIONS, generate
+from KdTree import KdTree
+from FlatKdTree import FlatKdTree
+from QuadTree import QuadTree
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+def measure(function):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000])
+    parser.add_argument("--distribution", default="uniform", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--leaf-size", type=int, default=8)
+    args = parser.parse_args()
+    print(f"{'points':>8}{'tree':>12}{'input':>12}{'build [s]':>11}{'peak [MB]':>11}")
+    for size in args.sizes:
+        array = np.array(generate(args.distribution, size))
+        builds = {
+            "KdTree": (lambda source: KdTree(source, leaf_size=args.leaf_size), lambda source: KdTree.from_array(source, leaf_size=args.leaf_size)),
+            "QuadTree": (lambda source: QuadTree(source, args.leaf_size), lambda source: QuadTree.from_array(source, args.leaf_size)),
+            "FlatKdTree": (lambda source: FlatKdTree(source, leaf_size=args.leaf_size), lambda source: FlatKdTree.from_array(source, leaf_size=args.leaf_size)),
+        }
+        for name, (constructor, from_array) in builds.items():
+            for build, label in ((constructor, "array"), (lambda source: constructor(source.tolist()), "tolist"), (from_array, "from_array")):
+                elapsed, peak, tree = measure(lambda: build(array))
+                del tree
+                print(f"{len(array):>8}{name:>12}{label:>12}{elapsed:>11.2f}{peak / 2**20:>11.1f}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Time to generate the points of every CaseGenerator distribution as lists of Python floats and as an array
+from its NumPy path, and to stream them in chunks into a file of raw float64 mapped from disk, the way inputs larger
+than memory are prepared for KdTree.from_array. The peak memory of the chunked run, traced with tracemalloc,
+stays at a few chunks whatever the number of points.
+
+    python -m benchmarks.generation --size 1000000 --chunk-size 65536
+"""
+from benchmarks.cases import ARRAYS, DISTRIBUTIONS, measure
+from comparator.CaseGenerator import CaseGenerator
+
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+def stream(distribution, size, chunk_size, path):
+    with open(path, "wb") as file:
+        for chunk in ARRAYS[distribution](CaseGenerator(), size, seed=0, chunk_size=chunk_size):
+            file.write(chunk.tobytes())
+    return np.memmap(path, dtype=np.float64, mode="r").reshape(-1, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--distributions", nargs="+", default=list(ARRAYS), choices=list(ARRAYS))
+    args = parser.parse_args()
+    generator = CaseGenerator()
+    print(f"{'distribution':<12}{'lists [s]':>11}{'array [s]':>11}{'speedup':>9}{'chunked [s]':>13}{'chunked peak [MB]':>19}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "points.bin")
+        for distribution in args.distributions:
+            lists, _ = measure(lambda: DISTRIBUTIONS[distribution](generator, args.size))
+            array, _ = measure(lambda: ARRAYS[distribution](generator, args.size, seed=0))
+            tracemalloc.start()
+            chunked, mapped = measure(lambda: stream(distribution, args.size, args.chunk_size, path))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            del mapped
+            print(f"{distribution:<12}{lists:>11.3f}{array:>11.3f}{lists / array:>9.1f}{chunked:>13.3f}{peak / 2**20:>19.1f}", flush=True)
+
+if __name__ == "__main__":
+    main()
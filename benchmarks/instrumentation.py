@@ -0,0 +1,51 @@
+"""
+Cost of tracing the rectangle queries of KdTree and QuadTree: the time per search_in_rectangle and
+count_in_rectangle without tracing, with every sample-th query traced and with every query traced.
+Rectangles cover about 0.1% of the area. The mean work of a traced query is printed at the end.
+
+    python -m benchmarks.instrumentation --size 100000 --queries 2000 --samples 100 1
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from KdTree import KdTree
+from QuadTree import QuadTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+
+def run(tree, rectangles, repeat):
+    search = min(measure(lambda: [tree.search_in_rectangle(rectangle) for rectangle in rectangles])[0] for _ in range(repeat))
+    count = min(measure(lambda: [tree.count_in_rectangle(rectangle) for rectangle in rectangles])[0] for _ in range(repeat))
+    return search / len(rectangles), count / len(rectangles)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--samples", type=int, nargs="+", default=[100, 1], help="trace every sample-th query")
+    parser.add_argument("--repeat", type=int, default=5, help="the fastest of repeat rounds is kept")
+    parser.add_argument("--distribution", default="uniform", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    points = generate(args.distribution, args.size)
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    rectangles = []
+    for _ in range(args.queries):
+        x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+        rectangles.append(Rectangle((x, y), (x + side, y + side)))
+    print(f"{'tree':<10}{'tracing':<10}{'search [us]':>13}{'count [us]':>12}")
+    for name, tree in (("KdTree", KdTree(points, leaf_size=8)), ("QuadTree", QuadTree(points, 8))):
+        search, count = run(tree, rectangles, args.repeat)
+        print(f"{name:<10}{'off':<10}{search * 1e6:>13.2f}{count * 1e6:>12.2f}", flush=True)
+        for sample in args.samples:
+            tree.instrument(sample=sample)
+            search, count = run(tree, rectangles, args.repeat)
+            print(f"{name:<10}{'1/' + str(sample):<10}{search * 1e6:>13.2f}{count * 1e6:>12.2f}", flush=True)
+        totals = tree.uninstrument()
+        print(f"{name} per traced query: {totals.nodes / totals.queries:.1f} nodes, {totals.pruned / totals.queries:.1f} pruned, "
+              f"{totals.accepted / totals.queries:.1f} accepted, {totals.scanned / totals.queries:.1f} points scanned, "
+              f"{totals.returned / totals.queries:.1f} returned", flush=True)
+
+if __name__ == "__main__":
+    main()
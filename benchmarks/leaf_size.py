@@ -0,0 +1,45 @@
+"""
+Build and query time of KdTree for different leaf sizes on every CaseGenerator distribution.
+Queries are rectangles covering about 0.1% of the area and membership checks, half of them
+of points stored in the tree.
+
+    python -m benchmarks.leaf_size --size 100000 --leaf-sizes 1 4 8 16 32 64
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from KdTree import KdTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--leaf-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    print(f"{'distribution':<12}{'leaf size':>10}{'build [s]':>11}{'rectangle [ms]':>16}{'contains [ms]':>15}")
+    for distribution in args.distributions:
+        random.seed(args.seed)
+        points = generate(distribution, args.size)
+        rectangles = []
+        for _ in range(args.queries):
+            x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+            rectangles.append(Rectangle((x, y), (x + side, y + side)))
+        probes = [random.choice(points) if random.random() < 0.5 else (random.uniform(0, 1000), random.uniform(0, 1000)) for _ in range(args.queries)]
+        best = None
+        for leaf_size in args.leaf_sizes:
+            build, tree = measure(lambda: KdTree(points, leaf_size=leaf_size))
+            search, _ = measure(lambda: [tree.search_in_rectangle(rectangle) for rectangle in rectangles])
+            contains, _ = measure(lambda: [tree.if_contains(point) for point in probes])
+            search, contains = search / args.queries * 1000, contains / args.queries * 1000
+            print(f"{distribution:<12}{leaf_size:>10}{build:>11.2f}{search:>16.3f}{contains:>15.4f}", flush=True)
+            if best is None or search < best[1]:
+                best = leaf_size, search
+        print(f"{distribution:<12}{'best':>10}{best[0]:>11}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Build time, memory and mean query time of LinearQuadTree against QuadTree (max_capacity=4)
+on every CaseGenerator distribution. Rectangle queries cover about 0.1% of the area, half of
+the membership probes are stored points.
+
+    python -m benchmarks.linear --size 100000
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from LinearQuadTree import LinearQuadTree
+from QuadTree import QuadTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--bits", type=int, default=16)
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    print(f"{'distribution':<12}{'tree':>15}{'build [s]':>11}{'rectangle [ms]':>16}{'contains [ms]':>15}")
+    for distribution in args.distributions:
+        random.seed(args.seed)
+        points = generate(distribution, args.size)
+        rectangles = []
+        for _ in range(args.queries):
+            x, y = random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)
+            rectangles.append(Rectangle((x, y), (x + side, y + side)))
+        probes = [random.choice(points) if random.random() < 0.5 else (random.uniform(0, 1000), random.uniform(0, 1000)) for _ in range(args.queries)]
+        for name, build in (("QuadTree", lambda: QuadTree(points, 4)), ("LinearQuadTree", lambda: LinearQuadTree(points, args.bits))):
+            seconds, tree = measure(build)
+            search, _ = measure(lambda: [tree.search_in_rectangle(rectangle) for rectangle in rectangles])
+            contains, _ = measure(lambda: [tree.if_contains(point) for point in probes])
+            print(f"{distribution:<12}{name:>15}{seconds:>11.2f}{search / args.queries * 1000:>16.3f}{contains / args.queries * 1000:>15.4f}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Time of k-nearest-neighbour queries on KdTree and QuadTree against a brute force scan
+of all points with Point.distance.
+
+    python -m benchmarks.nearest --sizes 10000 100000 --k 1 10
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate
+from KdTree import KdTree
+from QuadTree import QuadTree
+from utilities.Point import Point
+
+import argparse
+import heapq
+import random
+import time
+
+def brute_force(points, query, k):
+    return heapq.nsmallest(k, points, key=query.distance)
+
+def measure(function, queries):
+    start = time.perf_counter()
+    for query in queries:
+        function(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--capacity", type=int, default=4, help="max_capacity of the QuadTree")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"{'distribution':<12}{'points':>10}{'k':>5}{'brute [ms]':>13}{'KdTree [ms]':>13}{'QuadTree [ms]':>15}")
+    for distribution in args.distributions:
+        for size in args.sizes:
+            random.seed(args.seed)
+            points = generate(distribution, size)
+            kdtree = KdTree(points)
+            quadtree = QuadTree(points, max_capacity=args.capacity)
+            wrapped = [Point(point) for point in points]
+            queries = [Point([random.uniform(AREA.lowerleft[i], AREA.upperright[i]) for i in range(2)]) for _ in range(args.queries)]
+            for k in args.k:
+                brute = measure(lambda query: brute_force(wrapped, query, k), queries)
+                kd = measure(lambda query: kdtree.nearest(query, k), queries)
+                quad = measure(lambda query: quadtree.nearest(query, k), queries)
+                print(f"{distribution:<12}{len(points):>10}{k:>5}{brute:>13.3f}{kd:>13.3f}{quad:>15.3f}", flush=True)
+
+if __name__ == "__main__":
+    main()
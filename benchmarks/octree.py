@@ -0,0 +1,49 @@
+"""
+Build time and mean query time of Octree against KdTree on 3D uniform and normal points from
+CaseGenerator. Rectangle queries are cubes covering about 0.1% of the volume, half of the
+membership probes are stored points.
+
+    python -m benchmarks.octree --size 100000 --capacities 1 8
+"""
+from benchmarks.cases import measure
+from comparator.CaseGenerator import CaseGenerator
+from KdTree import KdTree
+from OrthantTree import Octree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import random
+
+VOLUME = Rectangle((0, 0, 0), (1000, 1000, 1000))
+DISTRIBUTIONS = {
+    "uniform": lambda gen, quantity: gen.uniform_distribution(quantity, VOLUME),
+    "normal": lambda gen, quantity: gen.normal_distribution(quantity, VOLUME),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--capacities", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    side = 1000 * 0.001 ** (1 / 3)
+    print(f"{'distribution':<12}{'tree':>8}{'capacity':>10}{'build [s]':>11}{'rectangle [ms]':>16}{'contains [ms]':>15}")
+    for distribution in args.distributions:
+        random.seed(args.seed)
+        points = list(dict.fromkeys(tuple(point) for point in DISTRIBUTIONS[distribution](CaseGenerator(), args.size)))
+        cubes = []
+        for _ in range(args.queries):
+            corner = [random.uniform(0, 1000 - side) for _ in range(3)]
+            cubes.append(Rectangle(corner, [x + side for x in corner]))
+        probes = [random.choice(points) if random.random() < 0.5 else tuple(random.uniform(0, 1000) for _ in range(3)) for _ in range(args.queries)]
+        for capacity in args.capacities:
+            for name, build in (("Octree", lambda: Octree(points, capacity)), ("KdTree", lambda: KdTree(points, leaf_size=capacity))):
+                seconds, tree = measure(build)
+                search, _ = measure(lambda: [tree.search_in_rectangle(cube) for cube in cubes])
+                contains, _ = measure(lambda: [tree.if_contains(point) for point in probes])
+                print(f"{distribution:<12}{name:>8}{capacity:>10}{seconds:>11.2f}{search / args.queries * 1000:>16.3f}{contains / args.queries * 1000:>15.4f}", flush=True)
+
+if __name__ == "__main__":
+    main()
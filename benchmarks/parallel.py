@@ -0,0 +1,48 @@
+"""
+Build time of KdTree and FlatKdTree from an (n, 2) float64 array with one process and with a pool of
+workers, and the speedup over one process. KdTree plans the splits as arrays and creates the nodes
+from the plan either way, so its speedup is that of the pool alone; the nodes are always created by
+the building process, so it stays below the number of workers. FlatKdTree lays out whole subtrees
+in the workers and only stitches their arrays together. Both are bounded by the number of cores,
+which is printed first.
+
+    python -m benchmarks.parallel --sizes 1000000 --workers 1 2 4 8
+"""
+from benchmarks.cases import DISTRIBUTIONS, generate
+from KdTree import KdTree
+from FlatKdTree import FlatKdTree
+
+import argparse
+import gc
+import os
+import time
+
+import numpy as np
+
+def measure(function):
+    gc.collect()
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--distribution", default="uniform", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--leaf-size", type=int, default=1)
+    args = parser.parse_args()
+    print(f"cores: {os.cpu_count()}")
+    print(f"{'points':>8}{'tree':>12}{'workers':>9}{'build [s]':>11}{'speedup':>9}")
+    for size in args.sizes:
+        array = np.array(generate(args.distribution, size))
+        for name, cls in (("KdTree", KdTree), ("FlatKdTree", FlatKdTree)):
+            serial = None
+            for workers in args.workers:
+                elapsed, tree = measure(lambda: cls.from_array(array, leaf_size=args.leaf_size, workers=workers))
+                del tree
+                serial = serial or elapsed
+                print(f"{len(array):>8}{name:>12}{workers:>9}{elapsed:>11.2f}{serial / elapsed:>9.2f}", flush=True)
+
+if __name__ == "__main__":
+    main()
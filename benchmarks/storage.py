@@ -0,0 +1,53 @@
+"""
+Startup cost of a saved KdTree against building it: time to build the tree from an array, to save it,
+to open the file memory-mapped and read into memory, and the mean time of batched and single rectangle
+queries (about 0.1% of the area) on the built and on the mapped tree.
+
+    python -m benchmarks.storage --sizes 100000 1000000
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate, measure
+from KdTree import KdTree
+from utilities.Rectangle import Rectangle
+
+import argparse
+import os
+import random
+import tempfile
+
+import numpy as np
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000])
+    parser.add_argument("--distribution", default="uniform", choices=list(DISTRIBUTIONS))
+    parser.add_argument("--leaf-size", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    side = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+    print(f"{'points':>8}{'build [s]':>11}{'save [s]':>10}{'file [MB]':>11}{'mmap [ms]':>11}{'read [ms]':>11}"
+          f"{'batched [us]':>14}{'mapped [us]':>13}{'single [ms]':>13}{'mapped [ms]':>13}")
+    for size in args.sizes:
+        random.seed(args.seed)
+        array = np.array(generate(args.distribution, size))
+        corners = np.array([(random.uniform(0, 1000 - side), random.uniform(0, 1000 - side)) for _ in range(args.queries)])
+        rectangles = np.stack((corners, corners + side), axis=1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tree.bin")
+            build, tree = measure(lambda: KdTree.from_array(array, leaf_size=args.leaf_size))
+            save, _ = measure(lambda: tree.save(path))
+            opened, mapped = measure(lambda: KdTree.load(path))
+            read, _ = measure(lambda: KdTree.load(path, mmap=False))
+            tree.search_in_rectangles(rectangles[:1])
+            batched, _ = measure(lambda: tree.search_in_rectangles(rectangles))
+            batched_mapped, _ = measure(lambda: mapped.search_in_rectangles(rectangles))
+            single = [Rectangle(lower, upper) for lower, upper in rectangles[:1000].tolist()]
+            one, _ = measure(lambda: [tree.search_in_rectangle(rectangle) for rectangle in single])
+            one_mapped, _ = measure(lambda: [mapped.search_in_rectangle(rectangle) for rectangle in single])
+            print(f"{len(array):>8}{build:>11.2f}{save:>10.2f}{os.path.getsize(path) / 2**20:>11.1f}{opened * 1000:>11.2f}{read * 1000:>11.2f}"
+                  f"{batched / args.queries * 1e6:>14.1f}{batched_mapped / args.queries * 1e6:>13.1f}"
+                  f"{one / len(single) * 1000:>13.3f}{one_mapped / len(single) * 1000:>13.3f}", flush=True)
+            del mapped
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark suite of KdTree and QuadTree for CI and for comparing versions. run builds both trees on every
+CaseGenerator distribution at every size and seed, then times the build and every query type: contains
+(half of the points stored), rectangle, count and batched (rectangles covering about 0.1% of the area),
+radius (a circle of the same area) and nearest (10 neighbours). Each measurement is preceded by warmup
+rounds and repeated; the build is timed as a whole and every query on its own, and the median, mean,
+90th and 99th percentile and minimum are kept, in seconds per build or query. The peak memory allocated
+by the build and by every query type is traced with tracemalloc in separate, untimed rounds. The results
+and the environment (Python, NumPy, platform, git commit) are written as JSON.
+compare reads a baseline and a current result file and flags every median time (or the statistic given)
+and peak memory that grew by more than the threshold; it exits with status 1 if any did. On a shared or
+noisy machine the minimum is steadier than the median.
+
+    python -m benchmarks.suite run --sizes 10000 100000 --seeds 0 1 --output results.json
+    python -m benchmarks.suite compare baseline.json results.json --threshold 0.1
+"""
+from benchmarks.cases import AREA, DISTRIBUTIONS, generate
+from KdTree import KdTree
+from QuadTree import QuadTree
+from utilities.Rectangle import Rectangle
+
+from datetime import datetime, timezone
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+FORMAT = 1                                 # version of the layout of the result files
+
+TREES = {
+    "KdTree": lambda points, leaf_size: KdTree(points, leaf_size=leaf_size),
+    "QuadTree": lambda points, leaf_size: QuadTree(points, leaf_size),
+}
+
+# query types and the function answering one query, batched answers all rectangles in one call
+QUERIES = {
+    "contains": lambda tree, point: tree.if_contains(point),
+    "rectangle": lambda tree, rectangle: tree.search_in_rectangle(rectangle),
+    "count": lambda tree, rectangle: tree.count_in_rectangle(rectangle),
+    "radius": lambda tree, point: tree.search_in_radius(point, RADIUS),
+    "nearest": lambda tree, point: tree.nearest(point, 10),
+    "batched": lambda tree, rectangles: tree.search_in_rectangles(rectangles),
+}
+
+SIDE = (AREA.upperright[0] - AREA.lowerleft[0]) * 0.1 ** 1.5
+RADIUS = SIDE / math.sqrt(math.pi)
+
+# inputs of every query type, drawn from its own generator so they depend only on the seed
+def query_inputs(points, number, seed):
+    generator = random.Random(seed)
+    def position(margin=0):
+        return (generator.uniform(0, 1000 - margin), generator.uniform(0, 1000 - margin))
+    rectangles = []
+    for _ in range(number):
+        x, y = position(SIDE)
+        rectangles.append(Rectangle((x, y), (x + SIDE, y + SIDE)))
+    centers = [position() for _ in range(number)]
+    return {
+        "contains": generator.sample(points, number // 2) + [position() for _ in range(number - number // 2)],
+        "rectangle": rectangles,
+        "count": rectangles,
+        "radius": centers,
+        "nearest": centers,
+        "batched": [rectangles],
+    }
+
+def summary(samples):
+    samples = np.array(samples)
+    return {"median": float(np.median(samples)), "mean": float(samples.mean()), "p90": float(np.percentile(samples, 90)),
+            "p99": float(np.percentile(samples, 99)), "min": float(samples.min()), "samples": len(samples)}
+
+# time of every call of function over the inputs in repeat rounds after warmup rounds, per input;
+# batched inputs are divided by the number of rectangles to get the time per query
+def timings(function, inputs, warmup, repeat):
+    for _ in range(warmup):
+        for argument in inputs:
+            function(argument)
+    samples = []
+    for _ in range(repeat):
+        for argument in inputs:
+            start = time.perf_counter()
+            function(argument)
+            samples.append((time.perf_counter() - start) / (len(argument) if isinstance(argument, list) else 1))
+    return samples
+
+def peak_memory(function, inputs):
+    gc.collect()
+    tracemalloc.start()
+    for argument in inputs:
+        function(argument)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+            "processor": platform.machine(), "cores": os.cpu_count(), "commit": commit,
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+
+def run(args):
+    records = []
+    print(f"{'tree':<10}{'distribution':<12}{'points':>8}{'seed':>6}{'build [ms]':>12}{'peak [MB]':>11}"
+          + "".join(f"{name + ' [us]':>16}" for name in args.queries))
+    for distribution in args.distributions:
+        for size in args.sizes:
+            for seed in args.seeds:
+                random.seed(seed)
+                points = generate(distribution, size)
+                inputs = query_inputs(points, args.queries_per_type, seed)
+                for name in args.trees:
+                    build = lambda _: TREES[name](points, args.leaf_size)
+                    record = {"tree": name, "distribution": distribution, "size": size, "points": len(points), "seed": seed,
+                              "build": summary(timings(build, [None], args.warmup, args.repeat)),
+                              "build_memory": peak_memory(build, [None]), "queries": {}}
+                    tree = TREES[name](points, args.leaf_size)
+                    for query in args.queries:
+                        function = lambda argument: QUERIES[query](tree, argument)
+                        record["queries"][query] = {"time": summary(timings(function, inputs[query], args.warmup, args.repeat)),
+                                                    "memory": peak_memory(function, inputs[query])}
+                    records.append(record)
+                    print(f"{name:<10}{distribution:<12}{len(points):>8}{seed:>6}{record['build']['median'] * 1000:>12.2f}"
+                          f"{record['build_memory'] / 2**20:>11.1f}"
+                          + "".join(f"{record['queries'][query]['time']['median'] * 1e6:>16.2f}" for query in args.queries), flush=True)
+    settings = {key: value for key, value in vars(args).items() if key not in ("command", "function", "output")}
+    with open(args.output, "w") as file:
+        json.dump({"format": FORMAT, "environment": environment(), "settings": settings, "results": records}, file, indent=1)
+    print(f"written to {args.output}")
+
+# times (the given statistic) and peak memory of a result file by (tree, distribution, size, seed) and measurement
+def measurements(path, statistic):
+    with open(path) as file:
+        data = json.load(file)
+    if data.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a result file of format {FORMAT}.")
+    result = {}
+    for record in data["results"]:
+        key = (record["tree"], record["distribution"], record["size"], record["seed"])
+        result[key + ("build",)] = record["build"][statistic]
+        result[key + ("build memory",)] = record["build_memory"]
+        for query, values in record["queries"].items():
+            result[key + (query,)] = values["time"][statistic]
+            result[key + (query + " memory",)] = values["memory"]
+    return data["environment"], result
+
+def compare(args):
+    base_environment, baseline = measurements(args.baseline, args.statistic)
+    environment, current = measurements(args.current, args.statistic)
+    print(f"baseline: {base_environment.get('commit')} {base_environment.get('date')}, current: {environment.get('commit')} {environment.get('date')}")
+    print(f"{'tree':<10}{'distribution':<12}{'size':>8}{'seed':>6}  {'measurement':<18}{'baseline':>12}{'current':>12}{'change':>9}")
+    regressions = 0
+    for key in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[key], current[key]
+        change = new / old - 1 if old else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  regression"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  improvement"
+        if flag or args.all:
+            tree, distribution, size, seed, measurement = key
+            print(f"{tree:<10}{distribution:<12}{size:>8}{seed:>6}  {measurement:<18}{old:>12.4g}{new:>12.4g}{change:>+9.1%}{flag}")
+    missing = len(baseline.keys() - current.keys())
+    if missing:
+        print(f"{missing} measurements of the baseline are not in the current results")
+    print(f"{regressions} regressions over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    runner = commands.add_parser("run", help="measure and write the results as JSON")
+    runner.add_argument("--sizes", type=int, nargs="+", default=[10000])
+    runner.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    runner.add_argument("--seeds", type=int, nargs="+", default=[0])
+    runner.add_argument("--trees", nargs="+", default=list(TREES), choices=list(TREES))
+    runner.add_argument("--queries", nargs="+", default=list(QUERIES), choices=list(QUERIES))
+    runner.add_argument("--queries-per-type", type=int, default=200)
+    runner.add_argument("--leaf-size", type=int, default=8, help="leaf_size of KdTree and max_capacity of QuadTree")
+    runner.add_argument("--warmup", type=int, default=1)
+    runner.add_argument("--repeat", type=int, default=5)
+    runner.add_argument("--output", default="results.json")
+    runner.set_defaults(function=run)
+    comparer = commands.add_parser("compare", help="flag regressions of a result file against a baseline")
+    comparer.add_argument("baseline")
+    comparer.add_argument("current")
+    comparer.add_argument("--threshold", type=float, default=0.1, help="relative growth counted as a regression")
+    comparer.add_argument("--statistic", default="median", choices=["median", "mean", "p90", "p99", "min"])
+    comparer.add_argument("--all", action="store_true", help="print every measurement, not only the flagged ones")
+    comparer.set_defaults(function=compare)
+    args = parser.parse_args()
+    sys.exit(args.function(args))
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ from utilities.Rectangle import Rectangle
 
 import random
 
+import numpy as np
+
 
 class CaseGenerator:
     def check_quantity(self, quantity, name="quantity"):
@@ -25,6 +27,14 @@ class CaseGenerator:
         """
         if mu and sigma are None, then mu is set to the middle of rectangle and sigma is set to 1/6 of rectangle
         """
+        self.check_quantity(quantity)
+        self.check_rectangle(rectangle)
+        mu, sigma = self.normal_parameters(rectangle, mu, sigma)
+        if raw:
+            return   [[random.gauss(mu[i], sigma[i]) for i in range(len(rectangle))]  for _ in range(quantity)]
+        return [Point([random.gauss(mu[i], sigma[i]) for i in range(len(rectangle))]) for _ in range(quantity)]
+
+    def normal_parameters(self, rectangle, mu, sigma):
         def check_param(param, name):
             if param is None:
                 return True
@@ -32,15 +42,11 @@ class CaseGenerator:
                 raise Exception(f"{name} must be list")
             if len(param) != len(rectangle):
                 raise Exception(f"{name} must have the same dimensionality as rectangle")
-        self.check_quantity(quantity)
-        self.check_rectangle(rectangle)
         if check_param(mu, "mu"):
             mu = [rectangle.lowerleft[i] + (rectangle.upperright[i] - rectangle.lowerleft[i])/2 for i in range(len(rectangle))]
         if check_param(sigma, "sigma"):
             sigma = [(rectangle.upperright[i] - rectangle.lowerleft[i])/6 for i in range(len(rectangle))]
-        if raw:
-            return   [[random.gauss(mu[i], sigma[i]) for i in range(len(rectangle))]  for _ in range(quantity)]
-        return [Point([random.gauss(mu[i], sigma[i]) for i in range(len(rectangle))]) for _ in range(quantity)]
+        return mu, sigma
 
     def grid_distribution(self, quantity, rectangle, raw=True):
         if len(quantity) != 2:
@@ -110,3 +116,114 @@ class CaseGenerator:
         if raw:
             return points
         return [Point(point) for point in points]
+
+    # NumPy versions of the distributions above: the points of the same shapes as an (n, d) float64 array, drawn
+    # from np.random.default_rng(seed), so an int seed gives the same points on every run and a Generator is used as is.
+    # With chunk_size they are yielded as arrays of chunk_size rows (the last may be shorter) generated one at a
+    # time, their concatenation being the array returned without chunk_size for the same seed.
+
+    def uniform_array(self, quantity, rectangle, seed=None, chunk_size=None):
+        self.check_quantity(quantity)
+        self.check_rectangle(rectangle)
+        lower, upper = self.bounds(rectangle)
+        rng = np.random.default_rng(seed)
+        return self.blocks(quantity, chunk_size, lambda start, stop: lower + rng.random((stop - start, len(lower))) * (upper - lower))
+
+    def normal_array(self, quantity, rectangle, seed=None, chunk_size=None, mu=None, sigma=None):
+        self.check_quantity(quantity)
+        self.check_rectangle(rectangle)
+        mu, sigma = self.normal_parameters(rectangle, mu, sigma)
+        rng = np.random.default_rng(seed)
+        return self.blocks(quantity, chunk_size, lambda start, stop: rng.normal(mu, sigma, (stop - start, len(mu))))
+
+    def grid_array(self, quantity, rectangle, chunk_size=None):
+        if len(quantity) != 2:
+            raise ValueError("Quantity should be a tuple of (columns, rows)")
+        columns, rows = quantity
+        self.check_quantity(columns, "columns")
+        self.check_quantity(rows, "rows")
+        self.check_rectangle(rectangle, must2d=True)
+        lower, upper = self.bounds(rectangle)
+        step = (upper - lower) / (columns + 1, rows + 1)
+        def block(start, stop):
+            index = np.arange(start, stop)
+            return lower + step * np.column_stack((index // rows + 1, index % rows + 1))
+        return self.blocks(columns * rows, chunk_size, block)
+
+    def cluster_array(self, quantity, clusters, seed=None, chunk_size=None):
+        """
+        quantity - number of points in each cluster
+        """
+        self.check_quantity(quantity)
+        for cluster in clusters:
+            self.check_rectangle(cluster, must2d=True)
+        lower = np.array([self.bounds(cluster)[0] for cluster in clusters]).reshape(-1, 2)
+        sides = np.array([self.bounds(cluster)[1] for cluster in clusters]).reshape(-1, 2) - lower
+        rng = np.random.default_rng(seed)
+        def block(start, stop):
+            cluster = np.arange(start, stop) // quantity
+            return lower[cluster] + rng.random((stop - start, 2)) * sides[cluster]
+        return self.blocks(quantity * len(clusters), chunk_size, block)
+
+    def outliers_array(self, quantities, rectangle, seed=None, chunk_size=None):
+        if len(quantities) != 2:
+            raise ValueError("Quantity should be a tuple of (quantity, outliers)")
+        quantity, outliers = quantities
+        self.check_quantity(quantity)
+        self.check_quantity(outliers, "outliers")
+        self.check_rectangle(rectangle)
+        lower, upper = self.bounds(rectangle)
+        inset = np.zeros(len(lower))
+        inset[:2] = (upper - lower)[:2] / 4
+        rng = np.random.default_rng(seed)
+        def block(start, stop):
+            inner = (np.arange(start, stop) < quantity)[:, None]
+            low = np.where(inner, lower + inset, lower)
+            return low + rng.random((stop - start, len(lower))) * (np.where(inner, upper - inset, upper) - low)
+        return self.blocks(quantity + outliers, chunk_size, block)
+
+    def cross_array(self, quantity, rectangle, seed=None, chunk_size=None):
+        if len(quantity) != 2:
+            raise ValueError("Quantity should be a tuple of (vertical, horizontal)")
+        vertical, horizontal = quantity
+        self.check_quantity(vertical, "vertical")
+        self.check_quantity(horizontal, "horizontal")
+        self.check_rectangle(rectangle)
+        lower, upper = self.bounds(rectangle)
+        lower, upper = lower[:2], upper[:2]
+        middle = (lower + upper) / 2
+        rng = np.random.default_rng(seed)
+        def block(start, stop):
+            on_middle_row = np.arange(start, stop) < vertical
+            position = lower + rng.random(stop - start)[:, None] * (upper - lower)
+            return np.column_stack((np.where(on_middle_row, position[:, 0], middle[0]), np.where(on_middle_row, middle[1], position[:, 1])))
+        return self.blocks(vertical + horizontal, chunk_size, block)
+
+    def rectangle_array(self, quantity, rectangle, seed=None, chunk_size=None):
+        self.check_quantity(quantity)
+        self.check_rectangle(rectangle, must2d=True)
+        (x0, y0), (x1, y1) = self.bounds(rectangle)
+        width, height = x1 - x0, y1 - y0
+        rng = np.random.default_rng(seed)
+        # the perimeter is walked counterclockwise from the lower left corner: bottom, right, top and left edge
+        def block(start, stop):
+            q = rng.random(stop - start) * 2 * (width + height)
+            edges = [q <= width, q <= width + height, q <= 2 * width + height]
+            x = np.select(edges, [x0 + q, x1, x1 - (q - width - height)], x0)
+            y = np.select(edges, [y0, y0 + q - width, y1], y1 - (q - 2 * width - height))
+            return np.column_stack((x, y))
+        return self.blocks(quantity, chunk_size, block)
+
+    def bounds(self, rectangle):
+        return (np.array([rectangle.lowerleft[i] for i in range(len(rectangle))], dtype=np.float64),
+                np.array([rectangle.upperright[i] for i in range(len(rectangle))], dtype=np.float64))
+
+    def blocks(self, quantity, chunk_size, block):
+        """
+        block(start, stop) - the rows from start to stop, called in order
+        """
+        if chunk_size is None:
+            return block(0, quantity)
+        if chunk_size < 1:
+            raise Exception("chunk_size must be positive")
+        return (block(start, min(start + chunk_size, quantity)) for start in range(0, quantity, chunk_size))
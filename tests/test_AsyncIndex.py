@@ -0,0 +1,74 @@
+import unittest
+import asyncio
+import threading
+import random
+from utilities.Rectangle import Rectangle, Point
+from KdTree import KdTree
+from QuadTree import QuadTree
+from AsyncIndex import AsyncIndex
+
+class TestAsyncIndex(unittest.TestCase):
+    def setUp(self):
+        random.seed(7)
+        self.points = list(dict.fromkeys((random.uniform(0, 100), random.uniform(0, 100)) for _ in range(600)))
+        self.rectangles = []
+        for _ in range(50):
+            x, y = random.uniform(0, 90), random.uniform(0, 90)
+            self.rectangles.append(Rectangle((x, y), (x + random.uniform(0, 40), y + random.uniform(0, 40))))
+
+    def test_batches(self):
+        async def run(tree):
+            index = AsyncIndex(tree, window=0.01, max_batch=16)
+            found = await asyncio.gather(*(index.search(rectangle) for rectangle in self.rectangles))
+            contained = await asyncio.gather(*(index.contains(point) for point in self.points[:20] + [(-1, -1)]))
+            return found, contained, index.stats()
+        for tree in (KdTree(self.points, leaf_size=4), QuadTree(self.points, 4, points_in_node=True)):
+            found, contained, stats = asyncio.run(run(tree))
+            for points, rectangle in zip(found, self.rectangles):
+                self.assertEqual(points, tree.search_in_rectangle(rectangle))
+                self.assertTrue(all(isinstance(point, Point) for point in points))
+            self.assertEqual(contained, [True] * 20 + [False])
+            self.assertEqual(stats["requests"], 71)
+            self.assertEqual(stats["batches"], 4 + 2)
+            self.assertEqual(stats["largest_batch"], 16)
+
+    def test_updates_and_errors(self):
+        async def run():
+            tree = KdTree(self.points)
+            index = AsyncIndex(tree, window=0)
+            self.assertFalse(await index.contains((200, 200)))
+            tree.insert((200, 200))
+            self.assertTrue(await index.contains((200, 200)))
+            self.assertEqual(await index.search(Rectangle((199, 199), (201, 201)), raw=True), [[200.0, 200.0]])
+            with self.assertRaises(ValueError):
+                await index.search(Rectangle((0, 0, 0), (1, 1, 1)))
+            with self.assertRaises(ValueError):
+                await index.contains((1, 2, 3))
+            waiting = asyncio.ensure_future(index.search(self.rectangles[0]))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            self.assertEqual(len(await index.search(self.rectangles[1])), len(tree.search_in_rectangle(self.rectangles[1])))
+        asyncio.run(run())
+        for arguments in ({"window": -1}, {"max_batch": 0}):
+            with self.assertRaises(ValueError):
+                AsyncIndex(KdTree(self.points), **arguments)
+
+    def test_arrays_built_in_executor(self):
+        tree = KdTree(self.points)
+        build = tree._node_arrays
+        threads = []
+        def node_arrays():
+            threads.append(threading.current_thread())
+            return build()
+        tree._node_arrays = node_arrays
+        async def run():
+            index = AsyncIndex(tree, window=0)
+            tree.insert((200, 200))
+            self.assertTrue(await index.contains((200, 200)))
+            self.assertEqual(len(await index.search(self.rectangles[0])), len(tree.search_in_rectangle(self.rectangles[0])))
+        asyncio.run(run())
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(threading.main_thread(), threads)
+
+if __name__ == "__main__":
+    unittest.main()
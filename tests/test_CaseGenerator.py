@@ -1,9 +1,12 @@
 import unittest
+import random
+import numpy as np
 from utilities.Rectangle import Rectangle, Point
 from comparator.CaseGenerator import CaseGenerator
 
 class TestCaseGenerator(unittest.TestCase):
     def setUp(self):
+        random.seed(0)
         self.generator = CaseGenerator()
 
     def test_check_quantity_positive(self):
@@ -89,4 +92,44 @@ class TestCaseGenerator(unittest.TestCase):
         self.assertEqual(len(points), 5)
         for point in points:
             self.assertEqual(len(point), 3)
-            
\ No newline at end of file
+
+    def test_arrays(self):
+        rectangle = Rectangle(Point([0, 0]), Point([10, 20]))
+        clusters = [Rectangle(Point([0, 0]), Point([1, 1])), Rectangle(Point([5, 5]), Point([6, 8]))]
+        arrays = {
+            "uniform": lambda **kwargs: self.generator.uniform_array(100, rectangle, **kwargs),
+            "normal": lambda **kwargs: self.generator.normal_array(100, rectangle, **kwargs),
+            "cluster": lambda **kwargs: self.generator.cluster_array(50, clusters, **kwargs),
+            "outliers": lambda **kwargs: self.generator.outliers_array((90, 10), rectangle, **kwargs),
+            "cross": lambda **kwargs: self.generator.cross_array((50, 50), rectangle, **kwargs),
+            "rectangle": lambda **kwargs: self.generator.rectangle_array(100, rectangle, **kwargs),
+        }
+        for name, generate in arrays.items():
+            points = generate(seed=1)
+            self.assertEqual(points.shape, (100, 2), name)
+            self.assertEqual(points.dtype, np.float64, name)
+            self.assertTrue((generate(seed=1) == points).all(), name)
+            self.assertFalse((generate(seed=2) == points).all(), name)
+            self.assertTrue((generate(seed=np.random.default_rng(1)) == points).all(), name)
+            chunks = list(generate(seed=1, chunk_size=30))
+            self.assertEqual([len(chunk) for chunk in chunks], [30, 30, 30, 10], name)
+            self.assertTrue((np.concatenate(chunks) == points).all(), name)
+            if name != "normal":
+                self.assertTrue(((points >= 0) & (points <= 20)).all(), name)
+
+    def test_arrays_shapes(self):
+        rectangle = Rectangle(Point([0, 0]), Point([10, 20]))
+        self.assertEqual(self.generator.grid_array((3, 2), rectangle).tolist(), [list(point) for point in self.generator.grid_distribution((3, 2), rectangle)])
+        self.assertEqual(len(np.concatenate(list(self.generator.grid_array((30, 20), rectangle, chunk_size=7)))), 600)
+        points = self.generator.outliers_array((90, 10), rectangle, seed=0)[:90]
+        self.assertTrue(((points >= [2.5, 5]) & (points <= [7.5, 15])).all())
+        points = self.generator.cross_array((50, 50), rectangle, seed=0)
+        self.assertTrue((points[:50, 1] == 10).all() and (points[50:, 0] == 5).all())
+        points = self.generator.rectangle_array(100, rectangle, seed=0)
+        self.assertTrue(((points[:, 0] == 0) | (points[:, 0] == 10) | (points[:, 1] == 0) | (points[:, 1] == 20)).all())
+        self.assertEqual(self.generator.uniform_array(5, Rectangle(Point([1, 2, 3]), Point([4, 5, 6])), seed=0).shape, (5, 3))
+        self.assertEqual(self.generator.uniform_array(0, rectangle).shape, (0, 2))
+        with self.assertRaises(Exception):
+            self.generator.uniform_array(5, rectangle, chunk_size=0)
+        with self.assertRaises(Exception):
+            self.generator.normal_array(-1, rectangle)
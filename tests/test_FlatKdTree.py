@@ -0,0 +1,110 @@
+import unittest
+import random
+import numpy as np
+from utilities.Rectangle import Rectangle, Point
+from KdTree import KdTree
+from FlatKdTree import FlatKdTree
+from TestManager import TestManager as Manager
+
+class TestFlatKdTree(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.points = [(random.uniform(0, 100), random.uniform(0, 100)) for _ in range(500)]
+
+    def test_init(self):
+        tree = FlatKdTree(self.points)
+        self.assertEqual(len(tree._coords), 500)
+        self.assertEqual(len(tree._axis), 2 * 500 - 1)
+        self.assertEqual(sorted(tree._index.tolist()), list(range(500)))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            FlatKdTree([])
+        with self.assertRaises(ValueError):
+            FlatKdTree([(1, 2), (1, 2)])
+        with self.assertRaises(ValueError):
+            FlatKdTree([(1, 2), (1, 2, 3)])
+
+    def test_manager(self):
+        self.assertTrue(Manager(FlatKdTree).all_tests())
+
+    def test_same_as_kdtree(self):
+        tree = KdTree(self.points)
+        flat = FlatKdTree(self.points)
+        for _ in range(50):
+            x1, x2 = sorted(random.uniform(-10, 110) for _ in range(2))
+            y1, y2 = sorted(random.uniform(-10, 110) for _ in range(2))
+            rectangle = Rectangle((x1, y1), (x2, y2))
+            self.assertEqual(flat.search_in_rectangle(rectangle), tree.search_in_rectangle(rectangle))
+        for point in self.points[:50]:
+            self.assertTrue(flat.if_contains(point))
+        self.assertFalse(flat.if_contains((50, 50)))
+
+    def test_shared_coordinates(self):
+        tree = FlatKdTree([(1, 0), (1, 1), (0, 1)])
+        self.assertTrue(tree.if_contains((0, 1)))
+        self.assertFalse(tree.if_contains((0, 0)))
+        self.assertEqual(sorted(tree.search_in_rectangle(Rectangle((0, 1), (1, 1)), raw=True)), [[0, 1], [1, 1]])
+
+    def test_leaf_size(self):
+        flat = FlatKdTree(self.points, leaf_size=16)
+        rectangle = Rectangle((20, 30), (70, 60))
+        expected = [Point(point) for point in self.points if rectangle.contains(point)]
+        self.assertEqual(sorted(flat.search_in_rectangle(rectangle, raw=True)), sorted(point.point for point in expected))
+
+    def test_from_array(self):
+        array = np.array(self.points)
+        expected = FlatKdTree(self.points, leaf_size=4)
+        rectangle = Rectangle((20, 10), (70, 60))
+        for source in (array, memoryview(array), array.astype(np.float32)):
+            flat = FlatKdTree.from_array(source, leaf_size=4)
+            self.assertTrue(np.shares_memory(flat._coords, np.asarray(source)))
+            self.assertEqual(flat._index.dtype, np.int32)
+            rows = np.asarray(source).tolist()
+            self.assertEqual(sorted(flat.search_in_rectangle(rectangle, raw=True)), sorted(row for row in rows if rectangle.contains(row)))
+            offsets, indices = flat.search_in_rectangles([rectangle])
+            self.assertEqual([rows[i] for i in indices], flat.search_in_rectangle(rectangle, raw=True))
+            self.assertTrue(all(flat.if_contains(row) for row in rows[::7]))
+        flat = FlatKdTree.from_array(array, leaf_size=4)
+        self.assertEqual(flat.search_in_rectangle(rectangle), expected.search_in_rectangle(rectangle))
+        self.assertEqual(flat.nbytes, expected.nbytes)
+        for invalid in (np.zeros((0, 2)), np.zeros(4), np.array([[1, 2]]), np.array([[1.0, 2.0], [1.0, 2.0]]), np.array([[np.nan, 1.0]])):
+            with self.assertRaises(ValueError):
+                FlatKdTree.from_array(invalid)
+        with self.assertRaises(ValueError):
+            FlatKdTree.from_array(array, leaf_size=0)
+
+    def test_workers(self):
+        array = np.array(self.points)
+        serial = FlatKdTree.from_array(array, leaf_size=2)
+        for workers in (2, 3):
+            flat = FlatKdTree.from_array(array, leaf_size=2, workers=workers)
+            self.assertEqual(flat._index.tolist(), serial._index.tolist())
+            self.assertEqual(len(flat._axis), len(serial._axis))
+            for _ in range(20):
+                x1, x2 = sorted(random.uniform(-10, 110) for _ in range(2))
+                y1, y2 = sorted(random.uniform(-10, 110) for _ in range(2))
+                rectangle = Rectangle((x1, y1), (x2, y2))
+                self.assertEqual(flat.search_in_rectangle(rectangle), serial.search_in_rectangle(rectangle))
+            self.assertTrue(flat.contains_many(array).all())
+        self.assertEqual(FlatKdTree(self.points, workers=2).search_in_rectangle(rectangle), FlatKdTree(self.points).search_in_rectangle(rectangle))
+        with self.assertRaises(ValueError):
+            FlatKdTree(self.points, workers=0)
+        with self.assertRaises(ValueError):
+            FlatKdTree.from_array(array, workers=0)
+
+    def test_batched_queries(self):
+        flat = FlatKdTree(self.points, leaf_size=8)
+        boxes = np.array([[[x, y], [x + 20, y + 10]] for x, y in self.points[:40]])
+        offsets, indices = flat.search_in_rectangles(boxes)
+        for i, (lower, upper) in enumerate(boxes):
+            found = [self.points[j] for j in indices[offsets[i]:offsets[i+1]]]
+            self.assertEqual(found, [tuple(point) for point in flat.search_in_rectangle(Rectangle(lower, upper), raw=True)])
+        probes = np.array(self.points[:40] + [(x, y + 1e-6) for x, y in self.points[:40]])
+        self.assertEqual(flat.contains_many(probes).tolist(), [True] * 40 + [False] * 40)
+        with self.assertRaises(ValueError):
+            flat.search_in_rectangles(np.zeros((3, 2, 3)))
+        with self.assertRaises(ValueError):
+            flat.search_in_rectangles([[[1, 1], [0, 0]]])
+        with self.assertRaises(ValueError):
+            flat.contains_many([(1, 2, 3)])
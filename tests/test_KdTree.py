@@ -1,6 +1,8 @@
 import unittest
+import random
+import numpy as np
 from utilities.Rectangle import Rectangle, Point
-from KdTree import KdTreeNode
+from KdTree import KdTree, KdTreeNode
 
 class TestKdTree(unittest.TestCase):
     def setUp(self):
@@ -28,3 +30,253 @@ class TestKdTree(unittest.TestCase):
         result = node._search_rectangle(search_area)
         expected_result = [Point([3, 4]), Point([5, 6])]
         self.assertEqual(result, expected_result)
+
+    def test_shared_coordinates(self):
+        points = [Point([1, 0]), Point([1, 1]), Point([0, 1])]
+        node = KdTreeNode(points, Rectangle.from_points(points))
+        for point in points:
+            self.assertTrue(node._if_contains(point))
+        self.assertFalse(node._if_contains(Point([0, 0])))
+
+    def test_median_rule(self):
+        random.seed(0)
+        points = list({Point([random.randint(0, 40), random.randint(0, 40)]) for _ in range(1000)})
+        root = KdTreeNode(points, Rectangle.from_points(points))
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node._axis is None:
+                continue
+            axis = node._depth % 2
+            self.assertTrue(all(point[axis] <= node._axis for point in node._left._add_leaves()))
+            self.assertTrue(all(point[axis] > node._axis for point in node._right._add_leaves()))
+            stack += [node._left, node._right]
+        for point in points:
+            self.assertTrue(root._if_contains(point))
+
+    def test_nearest(self):
+        random.seed(1)
+        points = [Point([random.uniform(0, 100), random.uniform(0, 100)]) for _ in range(300)]
+        tree = KdTree(points)
+        for _ in range(20):
+            query = Point([random.uniform(-20, 120), random.uniform(-20, 120)])
+            expected = sorted(points, key=query.distance)[:5]
+            self.assertEqual([point for point, _ in tree.nearest(query, 5)], expected)
+        with self.assertRaises(ValueError):
+            tree.nearest((1, 2), 0)
+
+    def test_search_in_radius(self):
+        random.seed(2)
+        points = [Point([random.uniform(0, 100), random.uniform(0, 100)]) for _ in range(300)]
+        tree = KdTree(points)
+        for metric in ("euclidean", "manhattan", "chebyshev"):
+            for _ in range(10):
+                center = Point([random.uniform(0, 100), random.uniform(0, 100)])
+                expected = [point for point in points if center.distance(point, metric) <= 20]
+                self.assertCountEqual(tree.search_in_radius(center, 20, metric), expected)
+        self.assertEqual(tree.search_in_radius((500, 500), 10), [])
+
+    def test_batched_queries(self):
+        random.seed(3)
+        points = [(random.randint(0, 50), random.randint(0, 50)) for _ in range(400)]
+        points = list(dict.fromkeys(points))
+        tree = KdTree(points)
+        rectangles = [Rectangle((x, y), (x + 10, y + 5)) for x, y in points[:30]] + [Rectangle((60, 60), (70, 70))]
+        offsets, indices = tree.search_in_rectangles(rectangles)
+        for i, rectangle in enumerate(rectangles):
+            found = [points[j] for j in indices[offsets[i]:offsets[i+1]]]
+            self.assertCountEqual(found, [tuple(point) for point in tree.search_in_rectangle(rectangle, raw=True)])
+        probes = points[:50] + [(x + 0.5, y) for x, y in points[:50]]
+        self.assertEqual(tree.contains_many(probes).tolist(), [True] * 50 + [False] * 50)
+
+    def test_from_array(self):
+        random.seed(4)
+        points = list(dict.fromkeys((random.uniform(0, 100), random.uniform(0, 100), random.uniform(0, 100)) for _ in range(500)))
+        array = np.array(points)
+        rectangle = Rectangle((20, 10, 30), (70, 60, 90))
+        expected = KdTree(points, leaf_size=4)
+        for source in (array, memoryview(array), array.astype(np.float32)):
+            tree = KdTree.from_array(source, leaf_size=4)
+            rows = np.asarray(source).tolist()
+            self.assertCountEqual(tree.search_in_rectangle(rectangle, raw=True), [row for row in rows if rectangle.contains(row)])
+            offsets, indices = tree.search_in_rectangles([rectangle])
+            self.assertCountEqual([rows[i] for i in indices], tree.search_in_rectangle(rectangle, raw=True))
+            self.assertTrue(all(tree.if_contains(row) for row in rows[::7]))
+        self.assertEqual(tree.count_in_rectangle(rectangle), expected.count_in_rectangle(rectangle))
+        self.assertTrue(np.array_equal(array, np.array(points)))
+        tree = KdTree.from_array(array, weights=list(range(len(array))))
+        tree.insert((200, 200, 200), 1)
+        tree.remove(points[0])
+        self.assertEqual(tree.aggregate_in_rectangle(Rectangle((0, 0, 0), (300, 300, 300))).sum, sum(range(len(array))) + 1)
+        for invalid in (np.zeros((0, 2)), np.zeros(4), np.array([[1, 2]]), np.array([[1.0, 2.0], [1.0, 2.0]]), np.array([[np.nan, 1.0]])):
+            with self.assertRaises(ValueError):
+                KdTree.from_array(invalid)
+
+    def test_leaf_size(self):
+        random.seed(4)
+        points = [Point([random.uniform(0, 100), random.uniform(0, 100)]) for _ in range(300)]
+        single = KdTree(points)
+        for points_in_node in (False, True):
+            tree = KdTree(points, points_in_node=points_in_node, leaf_size=16)
+            stack = [tree._root]
+            while stack:
+                node = stack.pop()
+                if node._axis is None:
+                    self.assertTrue(0 < len(node._points) <= 16)
+                else:
+                    stack += [node._left, node._right]
+            self.assertEqual(len(tree._root._add_leaves(points_in_node)), 300)
+            for point in points[:30]:
+                self.assertTrue(tree.if_contains(point))
+            rectangle = Rectangle((20, 10), (60, 70))
+            self.assertCountEqual(tree.search_in_rectangle(rectangle), single.search_in_rectangle(rectangle))
+            self.assertEqual(tree.nearest((50, 50), 3), single.nearest((50, 50), 3))
+        with self.assertRaises(ValueError):
+            KdTree(points, leaf_size=0)
+
+    def test_iter_in_rectangle(self):
+        random.seed(5)
+        points = [Point([random.uniform(0, 100), random.uniform(0, 100)]) for _ in range(300)]
+        for points_in_node in (False, True):
+            tree = KdTree(points, points_in_node=points_in_node)
+            rectangle = Rectangle((10, 20), (80, 90))
+            self.assertEqual(list(tree.iter_in_rectangle(rectangle)), tree.search_in_rectangle(rectangle))
+            self.assertEqual(list(tree.iter_in_rectangle(rectangle, limit=5, raw=True)), tree.search_in_rectangle(rectangle, raw=True)[:5])
+            self.assertEqual(list(tree.iter_in_rectangle(Rectangle((200, 200), (300, 300)))), [])
+
+    def test_count_and_aggregate(self):
+        random.seed(6)
+        points = [Point([random.uniform(0, 100), random.uniform(0, 100), random.uniform(0, 100)]) for _ in range(300)]
+        weights = [random.uniform(-1, 1) for _ in points]
+        for leaf_size in (1, 8):
+            tree = KdTree(points, leaf_size=leaf_size, weights=weights)
+            for _ in range(20):
+                corners = [sorted(random.uniform(-10, 110) for _ in range(2)) for _ in range(3)]
+                rectangle = Rectangle(tuple(c[0] for c in corners), tuple(c[1] for c in corners))
+                inside = [weight for point, weight in zip(points, weights) if rectangle.contains(point)]
+                self.assertEqual(tree.count_in_rectangle(rectangle), len(inside))
+                aggregate = tree.aggregate_in_rectangle(rectangle)
+                self.assertEqual(aggregate.count, len(inside))
+                self.assertAlmostEqual(aggregate.sum, sum(inside))
+                self.assertEqual((aggregate.min, aggregate.max), (min(inside), max(inside)) if inside else (None, None))
+        with self.assertRaises(ValueError):
+            KdTree(points).aggregate_in_rectangle(rectangle)
+        with self.assertRaises(ValueError):
+            KdTree(points, weights=weights[1:])
+
+    def test_insert_and_remove(self):
+        random.seed(7)
+        points = [Point([random.uniform(0, 100), random.uniform(0, 100)]) for _ in range(200)]
+        for points_in_node, leaf_size in ((False, 1), (True, 1), (False, 8)):
+            stored = points[:100]
+            weights = {point: random.randint(0, 9) for point in points}
+            tree = KdTree(stored, points_in_node=points_in_node, leaf_size=leaf_size, weights=[weights[point] for point in stored])
+            stored = set(stored)
+            for _ in range(400):
+                point = random.choice(points)
+                if point in stored:
+                    tree.remove(point)
+                    stored.remove(point)
+                else:
+                    tree.insert(point, weights[point])
+                    stored.add(point)
+                self.assertEqual(tree._root._count, len(stored))
+            for point in points:
+                self.assertEqual(tree.if_contains(point), point in stored)
+            self.assertCountEqual(tree._root._add_leaves(points_in_node), stored)
+            for rectangle in (Rectangle((10, 20), (70, 90)), Rectangle((-10, -10), (110, 110))):
+                inside = [point for point in stored if rectangle.contains(point)]
+                self.assertCountEqual(tree.search_in_rectangle(rectangle), inside)
+                self.assertEqual(tree.count_in_rectangle(rectangle), len(inside))
+                self.assertEqual(tree.aggregate_in_rectangle(rectangle).sum, sum(weights[point] for point in inside))
+                offsets, indices = tree.search_in_rectangles([rectangle])
+                self.assertCountEqual([list(tree._points)[i] for i in indices], inside)
+            nearest = min(stored, key=lambda point: point.distance(Point([50, 50])))
+            self.assertEqual(tree.nearest((50, 50))[0][0], nearest)
+        with self.assertRaises(ValueError):
+            tree.insert(next(iter(stored)), 1)
+        with self.assertRaises(ValueError):
+            tree.remove((500, 500))
+        with self.assertRaises(ValueError):
+            tree.insert((500, 500))
+
+    def test_insert_keeps_balance(self):
+        tree = KdTree([(0, 0)])
+        for i in range(1, 1024):
+            tree.insert((i, i * i % 1031))
+        depth = 0
+        stack = [(tree._root, 0)]
+        while stack:
+            node, level = stack.pop()
+            depth = max(depth, level)
+            if node._axis is not None:
+                stack += [(node._left, level + 1), (node._right, level + 1)]
+        self.assertLessEqual(depth, 30)
+        self.assertTrue(tree.if_contains((500, 500 * 500 % 1031)))
+        for i in range(1000):
+            tree.remove((i, i * i % 1031))
+        self.assertEqual(tree.count_in_rectangle(Rectangle((0, 0), (2000, 2000))), 24)
+        self.assertEqual(len(tree.search_in_rectangle(Rectangle((1000, 0), (1023, 1031)))), 24)
+
+    def test_workers(self):
+        def nodes(root):
+            result = []
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                result.append((node._axis, node._depth, node._count, node._rectangle, sorted(point._point for point in node._points)))
+                if node._axis is not None:
+                    stack += [node._right, node._left]
+            return result
+        random.seed(5)
+        points = list(dict.fromkeys((random.randint(0, 40), random.randint(0, 40)) for _ in range(1000)))
+        for points_in_node, leaf_size in ((False, 1), (True, 3)):
+            expected = KdTree(points, points_in_node=points_in_node, leaf_size=leaf_size, weights=list(range(len(points))))
+            tree = KdTree(points, points_in_node=points_in_node, leaf_size=leaf_size, weights=list(range(len(points))), workers=2)
+            self.assertEqual(nodes(tree._root), nodes(expected._root))
+            recursive = KdTreeNode([Point(point) for point in points], Rectangle.from_points(points), 0, points_in_node, leaf_size)
+            self.assertEqual(nodes(expected._root), nodes(recursive))
+            rectangle = Rectangle((5, 10), (30, 25))
+            self.assertEqual(tree.aggregate_in_rectangle(rectangle).sum, expected.aggregate_in_rectangle(rectangle).sum)
+            tree.insert((50, 50), 1)
+            self.assertTrue(tree.if_contains((50, 50)))
+        array = np.array(points, dtype=np.float32) / 3
+        self.assertEqual(nodes(KdTree.from_array(array, workers=3)._root), nodes(KdTree.from_array(array)._root))
+        self.assertEqual(nodes(KdTree(points[:5], workers=4)._root), nodes(KdTree(points[:5])._root))
+        with self.assertRaises(ValueError):
+            KdTree(points, workers=0)
+
+    def test_instrument(self):
+        random.seed(6)
+        points = list(dict.fromkeys((random.uniform(0, 100), random.uniform(0, 100)) for _ in range(300)))
+        rectangles = [Rectangle((10, 20), (60, 45)), Rectangle((0, 0), (100, 100)), Rectangle((200, 200), (300, 300))]
+        for points_in_node in (False, True):
+            tree = KdTree(points, points_in_node=points_in_node, leaf_size=4)
+            expected = [tree.search_in_rectangle(rectangle) for rectangle in rectangles]
+            traced = []
+            tree.instrument(lambda kind, rectangle, stats: traced.append((kind, rectangle, stats)))
+            self.assertEqual([tree.search_in_rectangle(rectangle) for rectangle in rectangles], expected)
+            self.assertEqual(tree.search_in_rectangle(rectangles[0], raw=True), [point.point for point in expected[0]])
+            self.assertEqual(tree.count_in_rectangle(rectangles[0]), len(expected[0]))
+            self.assertEqual([kind for kind, _, _ in traced], ["search"] * 4 + ["count"])
+            self.assertIs(traced[0][1], rectangles[0])
+            stats = traced[0][2]
+            self.assertEqual((stats.queries, stats.returned), (1, len(expected[0])))
+            self.assertGreater(stats.pruned, 0)
+            self.assertGreater(stats.scanned, 0)
+            self.assertLess(stats.nodes, 2 * len(points))
+            self.assertEqual(traced[4][2][:6], stats[:6])
+            self.assertEqual(traced[1][2][:6], (1, 1, 0, 1, 0, len(points)))
+            self.assertEqual(traced[2][2][:6], (1, 0, 0, 0, 0, 0))
+            totals = tree.uninstrument()
+            self.assertEqual(totals.queries, 5)
+            self.assertEqual(totals.returned, sum(stats.returned for _, _, stats in traced))
+            self.assertEqual(tree.query_stats().queries, 0)
+            tree.search_in_rectangle(rectangles[0])
+            self.assertEqual(len(traced), 5)
+        tree.instrument(sample=3)
+        for _ in range(7):
+            tree.count_in_rectangle(rectangles[0])
+        self.assertEqual(tree.query_stats().queries, 2)
+        with self.assertRaises(ValueError):
+            tree.instrument(sample=0)
@@ -0,0 +1,60 @@
+import unittest
+import random
+from utilities.Rectangle import Rectangle, Point
+from QuadTree import QuadTree
+from LinearQuadTree import LinearQuadTree
+from TestManager import TestManager as Manager
+
+class TestLinearQuadTree(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.points = [(random.uniform(0, 100), random.uniform(0, 100)) for _ in range(500)]
+
+    def test_init(self):
+        tree = LinearQuadTree(self.points)
+        self.assertEqual(len(tree._codes), 500)
+        self.assertTrue((tree._codes[1:] >= tree._codes[:-1]).all())
+        self.assertEqual(sorted(tree._index.tolist()), list(range(500)))
+        self.assertEqual(tree._encode(tree._quantise(tree._lower[None]))[0], 0)
+
+    def test_morton_order(self):
+        tree = LinearQuadTree([(0, 0), (3, 3)], bits=2)
+        cells = tree._quantise(tree._points)
+        self.assertEqual(cells.tolist(), [[0, 0], [3, 3]])
+        self.assertEqual(tree._codes.tolist(), [0, 15])
+        grid = LinearQuadTree([(x, y) for x in range(4) for y in range(4)], bits=2)
+        self.assertEqual(grid._points[:4].tolist(), [[0, 0], [1, 0], [0, 1], [1, 1]])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            LinearQuadTree([])
+        with self.assertRaises(ValueError):
+            LinearQuadTree([(1, 2), (1, 2)])
+        with self.assertRaises(ValueError):
+            LinearQuadTree([(1, 2, 3)])
+        with self.assertRaises(ValueError):
+            LinearQuadTree(self.points, bits=40)
+
+    def test_manager(self):
+        self.assertTrue(Manager(LinearQuadTree).all_tests())
+
+    def test_same_as_quadtree(self):
+        tree = QuadTree(self.points)
+        for bits in (2, 8, 16):
+            linear = LinearQuadTree(self.points, bits=bits)
+            for _ in range(50):
+                x1, x2 = sorted(random.uniform(-10, 110) for _ in range(2))
+                y1, y2 = sorted(random.uniform(-10, 110) for _ in range(2))
+                rectangle = Rectangle((x1, y1), (x2, y2))
+                self.assertCountEqual(linear.search_in_rectangle(rectangle), tree.search_in_rectangle(rectangle))
+            for point in self.points[:50]:
+                self.assertTrue(linear.if_contains(point))
+                self.assertFalse(linear.if_contains((point[0], point[1] + 1e-9)))
+            self.assertFalse(linear.if_contains((200, 50)))
+
+    def test_degenerate(self):
+        tree = LinearQuadTree([(1, 0), (1, 1), (1, 5)])
+        self.assertTrue(tree.if_contains((1, 1)))
+        self.assertFalse(tree.if_contains((0, 1)))
+        self.assertEqual(tree.search_in_rectangle(Rectangle((0, 0), (2, 1)), raw=True), [[1, 0], [1, 1]])
+        self.assertEqual(tree.search_in_rectangle(Rectangle((1, 1), (1, 1))), [Point([1, 1])])
@@ -0,0 +1,125 @@
+import unittest
+import random
+import os
+import tempfile
+import multiprocessing
+import numpy as np
+from utilities.Rectangle import Rectangle, Point
+from KdTree import KdTree
+from QuadTree import QuadTree
+from MappedTree import MappedTree
+
+# tree attached by every worker of the pool in test_shared
+worker_tree = None
+
+def attach(name, kind):
+    global worker_tree
+    worker_tree = (KdTree if kind == "KdTree" else QuadTree).attach(name)
+
+def query(arguments):
+    rectangle, point = arguments
+    return (worker_tree.search_in_rectangle(Rectangle(*rectangle), raw=True), worker_tree.if_contains(point),
+            worker_tree._arrays.points.flags.owndata)
+
+class TestMappedTree(unittest.TestCase):
+    def setUp(self):
+        random.seed(5)
+        self.points = list(dict.fromkeys((random.uniform(0, 100), random.uniform(0, 100)) for _ in range(500)))
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "tree.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        rectangles = [Rectangle((x, y), (x + 20, y + 10)) for x, y in self.points[:20]] + [Rectangle((200, 200), (300, 300))]
+        probes = self.points[:50] + [(x + 0.5, y) for x, y in self.points[:50]]
+        for tree, load in ((KdTree(self.points, leaf_size=4), KdTree.load), (QuadTree(self.points, 4, compressed=True), QuadTree.load)):
+            tree.insert((150, 150))
+            tree.remove(self.points[3])
+            tree.save(self.path)
+            for mmap in (True, False):
+                mapped = load(self.path, mmap)
+                self.assertEqual(isinstance(mapped._arrays.points, np.memmap), mmap)
+                self.assertEqual(len(mapped), len(self.points))
+                for rectangle in rectangles:
+                    self.assertCountEqual(mapped.search_in_rectangle(rectangle), tree.search_in_rectangle(rectangle))
+                    self.assertEqual(mapped.count_in_rectangle(rectangle), len(tree.search_in_rectangle(rectangle)))
+                for expected, found in zip(tree.search_in_rectangles(rectangles), mapped.search_in_rectangles(rectangles)):
+                    self.assertEqual(expected.tolist(), found.tolist())
+                self.assertEqual(mapped.contains_many(probes).tolist(), tree.contains_many(probes).tolist())
+                self.assertTrue(mapped.if_contains((150, 150)))
+                self.assertFalse(mapped.if_contains(self.points[3]))
+                self.assertEqual([tuple(row) for row in mapped.points().tolist()], self.points[:3] + self.points[4:] + [(150, 150)])
+                del mapped
+
+    def test_shared(self):
+        rectangles = [((x, y), (x + 20, y + 10)) for x, y in self.points[:40]]
+        probes = self.points[:20] + [(x + 0.5, y) for x, y in self.points[:20]]
+        context = multiprocessing.get_context("spawn")
+        for tree in (KdTree(self.points, leaf_size=4), QuadTree(self.points, 4)):
+            shared = tree.share()
+            try:
+                local = type(tree).attach(shared.name)
+                self.assertFalse(local._arrays.points.flags.writeable)
+                with context.Pool(2, initializer=attach, initargs=(shared.name, type(tree).__name__)) as pool:
+                    results = pool.map(query, zip(rectangles, probes))
+                for (rectangle, point), (found, contained, copied) in zip(zip(rectangles, probes), results):
+                    self.assertCountEqual(found, tree.search_in_rectangle(Rectangle(*rectangle), raw=True))
+                    self.assertEqual(found, local.search_in_rectangle(Rectangle(*rectangle), raw=True))
+                    self.assertEqual(contained, tree.if_contains(point))
+                    self.assertFalse(copied)
+                local.close()
+            finally:
+                shared.close()
+                shared.unlink()
+        with self.assertRaises(FileNotFoundError):
+            KdTree.attach(shared.name)
+
+    def test_single_point(self):
+        KdTree([(1, 2, 3)]).save(self.path)
+        mapped = KdTree.load(self.path)
+        self.assertTrue(mapped.if_contains(Point([1, 2, 3])))
+        self.assertEqual(mapped.search_in_rectangle(Rectangle((0, 0, 0), (5, 5, 5)), raw=True), [[1, 2, 3]])
+
+    def test_empty_tree(self):
+        rectangles = [Rectangle((0, 0), (100, 100)), Rectangle((20, 20), (30, 40))]
+        for tree in (KdTree(self.points[:20], leaf_size=4), QuadTree(self.points[:20], 4), QuadTree(self.points[:20], 4, compressed=True)):
+            for point in self.points[:20]:
+                tree.remove(point)
+            offsets, indices = tree.search_in_rectangles(rectangles)
+            self.assertEqual((offsets.tolist(), indices.tolist()), ([0, 0, 0], []))
+            self.assertEqual(tree.contains_many(self.points[:5]).tolist(), [False] * 5)
+            tree.save(self.path)
+            for mmap in (True, False):
+                mapped = type(tree).load(self.path, mmap)
+                self.assertEqual(len(mapped), 0)
+                self.assertEqual(mapped.search_in_rectangle(rectangles[0]), [])
+                self.assertFalse(mapped.if_contains(self.points[0]))
+                del mapped
+            shared = tree.share()
+            try:
+                attached = type(tree).attach(shared.name)
+                self.assertEqual(attached.search_in_rectangles(rectangles)[0].tolist(), [0, 0, 0])
+                self.assertEqual(attached.contains_many(self.points[:5]).tolist(), [False] * 5)
+                attached.close()
+            finally:
+                shared.close()
+                shared.unlink()
+
+    def test_invalid(self):
+        QuadTree(self.points).save(self.path)
+        with self.assertRaises(ValueError):
+            KdTree.load(self.path)
+        self.assertEqual(MappedTree.open(self.path).kind, "QuadTree")
+        with open(self.path, "r+b") as file:
+            file.seek(8)
+            file.write(np.array([99], dtype="<u4").tobytes())
+        with self.assertRaises(ValueError):
+            QuadTree.load(self.path)
+        with open(self.path, "wb") as file:
+            file.write(b"not a tree")
+        with self.assertRaises(ValueError):
+            QuadTree.load(self.path)
+        with self.assertRaises(ValueError):
+            QuadTree.load(self.path, mmap=False)
@@ -0,0 +1,105 @@
+import unittest
+import random
+import os
+import tempfile
+from utilities.Rectangle import Rectangle, Point
+from QuadTree import QuadTree
+from OrthantTree import OrthantTree, Octree
+from TestManager import TestManager as Manager
+
+class TestOrthantTree(unittest.TestCase):
+    def setUp(self):
+        random.seed(0)
+        self.points = [Point([random.uniform(0, 100) for _ in range(3)]) for _ in range(400)]
+
+    def test_init(self):
+        tree = Octree(self.points, max_capacity=4)
+        self.assertFalse(tree._root._leaf)
+        stack = [tree._root]
+        while stack:
+            node = stack.pop()
+            if node._leaf:
+                self.assertTrue(0 < len(node.points) <= 4)
+            else:
+                self.assertEqual(len(node._children), 8)
+                self.assertTrue(1 < len(node._quarters()) <= 8)
+                stack += node._quarters()
+        self.assertEqual(len(list(tree._root._iter_leaves())), 400)
+        plain = Octree(self.points, max_capacity=4, compressed=False)
+        self.assertEqual(len(plain._root._quarters()), 8)
+        self.assertGreater(plain.stats()["empty_leaves"], 0)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            OrthantTree([])
+        with self.assertRaises(ValueError):
+            OrthantTree([(1, 2), (1, 2)])
+        with self.assertRaises(ValueError):
+            OrthantTree([(1, 2), (1, 2, 3)])
+        with self.assertRaises(ValueError):
+            Octree([(1, 2), (3, 4)])
+
+    def test_manager(self):
+        self.assertTrue(Manager(OrthantTree).all_tests())
+
+    def test_search(self):
+        for points_in_node in (False, True):
+            tree = Octree(self.points, max_capacity=2, points_in_node=points_in_node)
+            for _ in range(30):
+                corners = [sorted(random.uniform(-10, 110) for _ in range(2)) for _ in range(3)]
+                rectangle = Rectangle([c[0] for c in corners], [c[1] for c in corners])
+                self.assertCountEqual(tree.search_in_rectangle(rectangle), [point for point in self.points if rectangle.contains(point)])
+            for point in self.points[:50]:
+                self.assertTrue(tree.if_contains(point))
+            self.assertFalse(tree.if_contains((50, 50, 50)))
+            self.assertFalse(tree.if_contains((500, 50, 50)))
+
+    def test_same_as_quadtree(self):
+        points = [point.point[:2] for point in self.points]
+        tree, quadtree = OrthantTree(points), QuadTree(points)
+        rectangle = Rectangle((10, 20), (60, 50))
+        self.assertCountEqual(tree.search_in_rectangle(rectangle), quadtree.search_in_rectangle(rectangle))
+
+    def test_shared_with_quadtree(self):
+        weights = {point: random.randint(0, 9) for point in self.points}
+        extra = [Point([random.uniform(-50, 150) for _ in range(3)]) for _ in range(100)]
+        rectangles = [Rectangle((10, 20, 30), (60, 90, 70)), Rectangle((-50, -50, -50), (40, 150, 150))]
+        for compressed in (True, False):
+            tree = Octree(self.points[:200], 2, weights=[weights[point] for point in self.points[:200]], compressed=compressed, max_depth=8)
+            stored = set(self.points[:200])
+            for point in self.points[200:] + extra:
+                tree.insert(point, weights.setdefault(point, 1))
+                stored.add(point)
+            for point in self.points[:300]:
+                tree.remove(point)
+                stored.remove(point)
+            self.assertLessEqual(tree.stats()["depth"], 8)
+            self.assertTrue(all(tree.if_contains(point) for point in stored))
+            for rectangle in rectangles:
+                inside = [point for point in stored if rectangle.contains(point)]
+                self.assertCountEqual(tree.search_in_rectangle(rectangle), inside)
+                self.assertEqual(tree.count_in_rectangle(rectangle), len(inside))
+                self.assertEqual(tree.aggregate_in_rectangle(rectangle).sum, sum(weights[point] for point in inside))
+            offsets, indices = tree.search_in_rectangles(rectangles)
+            points = list(tree._points)
+            for i, rectangle in enumerate(rectangles):
+                self.assertEqual([points[j] for j in indices[offsets[i]:offsets[i + 1]]], tree.search_in_rectangle(rectangle))
+            self.assertEqual(tree.contains_many(self.points).tolist(), [point in stored for point in self.points])
+            center = Point([50, 50, 50])
+            self.assertEqual(tree.nearest(center)[0][0], min(stored, key=center.distance))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "octree.bin")
+            tree.save(path)
+            mapped = Octree.load(path)
+            self.assertEqual(mapped.search_in_rectangle(rectangles[0]), tree.search_in_rectangle(rectangles[0]))
+            del mapped
+            with self.assertRaises(ValueError):
+                QuadTree.load(path)
+
+    def test_higher_dimension(self):
+        points = [Point([random.randint(0, 9) for _ in range(5)]) for _ in range(300)]
+        points = list(set(points))
+        tree = OrthantTree(points, max_capacity=3)
+        rectangle = Rectangle((0, 2, 0, 4, 1), (5, 9, 9, 8, 6))
+        self.assertCountEqual(tree.search_in_rectangle(rectangle), [point for point in points if rectangle.contains(point)])
+        self.assertTrue(all(tree.if_contains(point) for point in points))
@@ -70,3 +70,11 @@ class TestPoint(unittest.TestCase):
         p2 = Point([4, 5, 6])
         p3 = Point([4, 5, 6])
         self.assertEqual(p1.maximum(p2), p3)
+
+    def test_distance_metrics(self):
+        p1 = Point([1, 2, 3])
+        p2 = Point([4, 0, 6])
+        self.assertEqual(p1.distance(p2, "manhattan"), 8)
+        self.assertEqual(p1.distance(p2, "chebyshev"), 3)
+        with self.assertRaises(ValueError):
+            p1.distance(p2, "cosine")
@@ -0,0 +1,222 @@
+import unittest
+import random
+import numpy as np
+from utilities.Rectangle import Rectangle, Point
+from QuadTree import QuadTree, QuadTreeNode
+
+class TestQuadTree(unittest.TestCase):
+    def setUp(self):
+        random.seed(1)
+        self.points = [Point([random.uniform(0, 100), random.uniform(0, 100)]) for _ in range(300)]
+
+    def test_init(self):
+        node = QuadTreeNode(self.points, Rectangle.from_points(self.points), max_capacity=4)
+        self.assertEqual(len(node._children), 4)
+        self.assertTrue(all(child is not None for child in node._children))
+        center = node._center
+        for number, child in enumerate(node._children):
+            self.assertEqual(child._rectangle, node._rectangle.orthant(number, center))
+        self.assertEqual(len(node._add_leaves()), 300)
+
+    def test_nearest(self):
+        tree = QuadTree(self.points, max_capacity=4)
+        for _ in range(20):
+            query = Point([random.uniform(-20, 120), random.uniform(-20, 120)])
+            expected = sorted(self.points, key=query.distance)[:5]
+            self.assertEqual([point for point, _ in tree.nearest(query, 5)], expected)
+        with self.assertRaises(ValueError):
+            tree.nearest((1, 2, 3))
+
+    def test_search_in_radius(self):
+        tree = QuadTree(self.points, max_capacity=4)
+        for metric in ("euclidean", "manhattan", "chebyshev"):
+            for _ in range(10):
+                center = Point([random.uniform(0, 100), random.uniform(0, 100)])
+                expected = [point for point in self.points if center.distance(point, metric) <= 20]
+                self.assertCountEqual(tree.search_in_radius(center, 20, metric), expected)
+        with self.assertRaises(ValueError):
+            tree.search_in_radius((1, 2), -1)
+
+    def test_batched_queries(self):
+        tree = QuadTree(self.points, max_capacity=4)
+        rectangles = [Rectangle((x, y), (x + 15, y + 10)) for x, y in ((0, 0), (30, 40), (85, 90), (50, 0))]
+        offsets, indices = tree.search_in_rectangles(rectangles)
+        for i, rectangle in enumerate(rectangles):
+            found = [self.points[j] for j in indices[offsets[i]:offsets[i+1]]]
+            self.assertCountEqual(found, tree.search_in_rectangle(rectangle))
+        probes = self.points[:20] + [Point([point.x, point.y + 0.001]) for point in self.points[:20]]
+        self.assertEqual(tree.contains_many(probes).tolist(), [True] * 20 + [False] * 20)
+
+    def test_from_array(self):
+        array = np.array([point.point for point in self.points])
+        rectangle = Rectangle((20, 10), (70, 60))
+        for compressed in (False, True):
+            expected = QuadTree(self.points, max_capacity=4, compressed=compressed)
+            for source in (array, memoryview(array)):
+                tree = QuadTree.from_array(source, max_capacity=4, compressed=compressed)
+                self.assertCountEqual(tree.search_in_rectangle(rectangle), expected.search_in_rectangle(rectangle))
+                self.assertEqual(tree.stats(), expected.stats())
+                offsets, indices = tree.search_in_rectangles([rectangle])
+                self.assertCountEqual(indices.tolist(), expected.search_in_rectangles([rectangle])[1].tolist())
+        tree = QuadTree.from_array(array.astype(np.float32))
+        self.assertTrue(all(tree.if_contains(row) for row in array.astype(np.float32).tolist()))
+        for invalid in (np.zeros((3, 3)), np.array([[1.0, 2.0], [1.0, 2.0]]), np.array([[1, 2], [3, 4]])):
+            with self.assertRaises(ValueError):
+                QuadTree.from_array(invalid)
+
+    def test_iter_in_rectangle(self):
+        for points_in_node in (False, True):
+            tree = QuadTree(self.points, max_capacity=4, points_in_node=points_in_node)
+            rectangle = Rectangle((10, 20), (80, 90))
+            expected = [point for point in self.points if rectangle.contains(point)]
+            self.assertCountEqual(list(tree.iter_in_rectangle(rectangle)), expected)
+            self.assertCountEqual(tree.search_in_rectangle(rectangle), expected)
+            first = list(tree.iter_in_rectangle(rectangle, limit=7))
+            self.assertEqual(len(first), 7)
+            self.assertTrue(all(point in expected for point in first))
+        with self.assertRaises(ValueError):
+            tree.iter_in_rectangle(rectangle, limit=-1)
+
+    def test_count_and_aggregate(self):
+        weights = [random.randint(-50, 50) for _ in self.points]
+        tree = QuadTree(self.points, max_capacity=4, weights=weights)
+        for _ in range(20):
+            x, y = sorted(random.uniform(-10, 110) for _ in range(2)), sorted(random.uniform(-10, 110) for _ in range(2))
+            rectangle = Rectangle((x[0], y[0]), (x[1], y[1]))
+            inside = [weight for point, weight in zip(self.points, weights) if rectangle.contains(point)]
+            self.assertEqual(tree.count_in_rectangle(rectangle), len(inside))
+            aggregate = tree.aggregate_in_rectangle(rectangle)
+            self.assertEqual((aggregate.count, aggregate.sum), (len(inside), sum(inside)))
+            self.assertEqual((aggregate.min, aggregate.max), (min(inside), max(inside)) if inside else (None, None))
+        with self.assertRaises(ValueError):
+            QuadTree(self.points).aggregate_in_rectangle(rectangle)
+        with self.assertRaises(ValueError):
+            QuadTree(self.points, weights=weights[1:])
+
+    def test_insert_and_remove(self):
+        extra = [Point([random.uniform(-300, 400), random.uniform(-300, 400)]) for _ in range(100)]
+        points = self.points[:150] + extra
+        for points_in_node, max_capacity, compressed in ((False, 1, False), (True, 1, False), (False, 4, False), (False, 1, True), (True, 2, True)):
+            weights = {point: random.randint(0, 9) for point in points}
+            tree = QuadTree(points[:100], max_capacity, points_in_node, weights=[weights[point] for point in points[:100]], compressed=compressed)
+            stored = set(points[:100])
+            for _ in range(500):
+                point = random.choice(points)
+                if point in stored:
+                    tree.remove(point)
+                    stored.remove(point)
+                else:
+                    tree.insert(point, weights[point])
+                    stored.add(point)
+                self.assertEqual(tree._root._count, len(stored))
+            for point in points:
+                self.assertEqual(tree.if_contains(point), point in stored)
+            self.assertTrue(tree.contains_many([point.point for point in points]).tolist() == [point in stored for point in points])
+            for rectangle in (Rectangle((10, 20), (70, 90)), Rectangle((-400, -400), (50, 500))):
+                inside = [point for point in stored if rectangle.contains(point)]
+                self.assertCountEqual(tree.search_in_rectangle(rectangle), inside)
+                self.assertEqual(tree.aggregate_in_rectangle(rectangle).sum, sum(weights[point] for point in inside))
+            nearest = min(stored, key=lambda point: point.distance(Point([50, 50])))
+            self.assertEqual(tree.nearest((50, 50))[0][0], nearest)
+            stack = [tree._root]
+            while stack:
+                node = stack.pop()
+                if node._leaf:
+                    self.assertTrue(len(node.points) <= max_capacity)
+                    self.assertTrue(all(node._rectangle.contains(point) for point in node.points))
+                else:
+                    self.assertGreater(node._count, max_capacity)
+                    self.assertTrue(len(node._quarters()) > 1 if compressed else len(node._quarters()) == 4)
+                    stack += node._quarters()
+            if compressed:
+                self.assertEqual(tree.stats()["empty_leaves"], 0)
+        with self.assertRaises(ValueError):
+            tree.remove((1000, 1000))
+        with self.assertRaises(ValueError):
+            tree.insert((1000, 1000))
+
+    def test_grow_on_edge(self):
+        tree = QuadTree([(0, 0), (1, 1)])
+        tree.insert((-1, 0.5))
+        tree.insert((0, 5))
+        tree.insert((2, -3))
+        for point in [(0, 0), (1, 1), (-1, 0.5), (0, 5), (2, -3)]:
+            self.assertTrue(tree.if_contains(point))
+        self.assertEqual(len(tree.search_in_rectangle(Rectangle((0, 0), (0, 5)))), 2)
+
+    def test_max_depth(self):
+        line = [Point([50, 50 + i * 1e-9]) for i in range(200)] + self.points[:100]
+        for compressed in (False, True):
+            tree = QuadTree(line, max_capacity=2, compressed=compressed, max_depth=6)
+            stats = tree.stats()
+            self.assertLessEqual(stats["depth"], 6)
+            self.assertGreater(stats["overflow_leaves"], 0)
+            self.assertEqual(sum(stats["depth_histogram"].values()), stats["leaves"])
+            self.assertEqual(sum(size * leaves for size, leaves in stats["size_histogram"].items()), len(line))
+            self.assertGreater(QuadTree(line, max_capacity=2, compressed=compressed).stats()["depth"], 6)
+            stored = list(line)
+            for point in [Point([random.uniform(-100, 200), random.uniform(-100, 200)]) for _ in range(50)] + [Point([50, 49 - i * 1e-9]) for i in range(50)]:
+                tree.insert(point)
+                stored.append(point)
+            for point in stored[::3]:
+                tree.remove(point)
+            stored = [point for i, point in enumerate(stored) if i % 3]
+            self.assertLessEqual(tree.stats()["depth"], 6)
+            for rectangle in (Rectangle((49, 49), (51, 51)), Rectangle((50, 50), (50, 50 + 1e-7)), Rectangle((-100, -100), (200, 200))):
+                self.assertCountEqual(tree.search_in_rectangle(rectangle), [point for point in stored if rectangle.contains(point)])
+            self.assertTrue(all(tree.if_contains(point) for point in stored))
+        with self.assertRaises(ValueError):
+            QuadTree(line, max_depth=-1)
+
+    def test_compressed(self):
+        clusters = [Point([random.gauss(20, 0.001), random.gauss(30, 0.001)]) for _ in range(150)] \
+                 + [Point([random.gauss(70, 1e-6), random.gauss(80, 1e-6)]) for _ in range(150)]
+        plain = QuadTree(clusters)
+        tree = QuadTree(clusters, compressed=True)
+        stats = tree.stats()
+        self.assertLess(stats["nodes"], 2 * len(clusters))
+        self.assertEqual(stats["empty_leaves"], 0)
+        self.assertLess(stats["depth"], plain.stats()["depth"])
+        self.assertGreater(plain.stats()["empty_leaves"], 0)
+        for rectangle in (Rectangle((19.999, 29.999), (20.001, 30.001)), Rectangle((0, 0), (100, 100)), Rectangle((70, 80), (71, 81))):
+            self.assertCountEqual(tree.search_in_rectangle(rectangle), plain.search_in_rectangle(rectangle))
+            self.assertEqual(tree.count_in_rectangle(rectangle), plain.count_in_rectangle(rectangle))
+        for point in clusters[::10]:
+            self.assertTrue(tree.if_contains(point))
+            self.assertEqual(tree.nearest(point, 3), plain.nearest(point, 3))
+        self.assertFalse(tree.if_contains((20, 80)))
+        self.assertEqual(tree.contains_many([point.point for point in clusters]).sum(), len(clusters))
+
+    def test_instrument(self):
+        rectangles = [Rectangle((10, 20), (60, 45)), Rectangle((0, 0), (100, 100)), Rectangle((200, 200), (300, 300))]
+        for compressed in (False, True):
+            tree = QuadTree(self.points, max_capacity=4, compressed=compressed)
+            expected = [tree.search_in_rectangle(rectangle) for rectangle in rectangles]
+            traced = []
+            tree.instrument(lambda kind, rectangle, stats: traced.append((kind, stats)), sample=1)
+            self.assertEqual([tree.search_in_rectangle(rectangle) for rectangle in rectangles], expected)
+            self.assertEqual(tree.count_in_rectangle(rectangles[0]), len(expected[0]))
+            stats = traced[0][1]
+            self.assertEqual(stats.returned, len(expected[0]))
+            self.assertGreater(stats.pruned, 0)
+            self.assertGreaterEqual(stats.scanned + stats.accepted, 1)
+            self.assertEqual(traced[3][0], "count")
+            self.assertEqual(traced[3][1][:6], stats[:6])
+            self.assertEqual(traced[1][1][:6], (1, 1, 0, 1, 0, len(self.points)))
+            self.assertEqual(tree.query_stats().queries, 4)
+            self.assertGreater(tree.uninstrument().seconds, 0)
+            self.assertEqual(tree.query_stats().queries, 0)
+
+    def test_compressed_insert_on_center_lines(self):
+        tree = QuadTree([(2, 8), (8, 4)], compressed=True)
+        for point in [(8, 3), (6, 2), (2, 1)]:
+            tree.insert(point)
+        for point in [(2, 8), (8, 4), (8, 3), (6, 2), (2, 1)]:
+            self.assertTrue(tree.if_contains(point))
+        for _ in range(100):
+            points = list(dict.fromkeys((random.randint(0, 10), random.randint(0, 10)) for _ in range(20)))
+            tree = QuadTree(points[:2], max_capacity=random.choice([1, 2]), compressed=True)
+            for point in points[2:]:
+                tree.insert(point)
+            self.assertTrue(all(tree.if_contains(point) for point in points))
+            self.assertCountEqual([tuple(point.point) for point in tree.search_in_rectangle(Rectangle((0, 0), (10, 10)))], points)
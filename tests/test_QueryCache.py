@@ -0,0 +1,87 @@
+import unittest
+import random
+import math
+from utilities.Rectangle import Rectangle, Point
+from KdTree import KdTree
+from QuadTree import QuadTree
+from QueryCache import QueryCache
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self):
+        random.seed(8)
+        self.points = list(dict.fromkeys((random.uniform(0, 100), random.uniform(0, 100)) for _ in range(500)))
+        self.rectangles = [Rectangle((10, 10), (40, 40)), Rectangle((50, 0), (100, 30)), Rectangle((0, 60), (30, 100))]
+
+    def test_hits_and_invalidation(self):
+        for tree in (KdTree(self.points, leaf_size=4), QuadTree(self.points, 4)):
+            cache = QueryCache(tree)
+            for _ in range(3):
+                for rectangle in self.rectangles:
+                    self.assertCountEqual(cache.search_in_rectangle(rectangle), tree.search_in_rectangle(rectangle))
+            self.assertEqual(cache.search_in_rectangle(Rectangle((10, 10.0), (40.0, 40)), raw=True),
+                             [point.point for point in cache.search_in_rectangle(self.rectangles[0])])
+            self.assertTrue(cache.if_contains(self.points[0]))
+            self.assertTrue(cache.if_contains(Point(self.points[0])))
+            self.assertFalse(cache.if_contains((20, 20)))
+            self.assertEqual(cache.stats()["hits"], 6 + 2 + 1)
+            self.assertEqual(cache.stats()["misses"], 3 + 2)
+            cache.insert((20, 20))
+            self.assertEqual(cache.stats()["invalidations"], 2)
+            self.assertTrue(cache.if_contains((20, 20)))
+            self.assertIn(Point((20, 20)), cache.search_in_rectangle(self.rectangles[0]))
+            removed = cache.search_in_rectangle(self.rectangles[1])[0]
+            cache.remove(removed)
+            self.assertNotIn(removed, cache.search_in_rectangle(self.rectangles[1]))
+            self.assertEqual(cache.stats()["entries"], 5)
+            self.assertEqual(len(cache.search_in_rectangle(self.rectangles[2])), len(tree.search_in_rectangle(self.rectangles[2])))
+            self.assertEqual(cache.count_in_rectangle(self.rectangles[0]), tree.count_in_rectangle(self.rectangles[0]))
+            cache.clear()
+            self.assertEqual(cache.stats()["bytes"], 0)
+
+    def test_eviction(self):
+        tree = KdTree(self.points)
+        cache = QueryCache(tree, max_bytes=2000)
+        rectangles = [Rectangle((x, 0), (x + 5, 5)) for x in range(50)]
+        for rectangle in rectangles:
+            cache.search_in_rectangle(rectangle)
+            self.assertLessEqual(cache.stats()["bytes"], 2000)
+        self.assertGreater(cache.stats()["evictions"], 0)
+        cache.search_in_rectangle(rectangles[-1])
+        self.assertEqual(cache.stats()["hits"], 1)
+        cache.search_in_rectangle(rectangles[0])
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(QueryCache(tree, max_bytes=0).search_in_rectangle(rectangles[0]), tree.search_in_rectangle(rectangles[0]))
+        with self.assertRaises(ValueError):
+            QueryCache(tree, max_bytes=-1)
+        with self.assertRaises(ValueError):
+            cache.search_in_rectangle(((0, 0), (1, 1)))
+
+    def test_invalidation_by_grid(self):
+        for tree in (KdTree(self.points, leaf_size=4), QuadTree(self.points, 4)):
+            cache = QueryCache(tree)
+            rectangles = [Rectangle((x, y), (x + side, y + side)) for x, y, side in
+                          [(random.uniform(-20, 100), random.uniform(-20, 100), random.choice([1, 6.25, 12.5, 30, 150])) for _ in range(60)]]
+            rectangles += [Rectangle((-math.inf, -math.inf), (math.inf, math.inf)), Rectangle((50, -math.inf), (math.inf, 60)),
+                           Rectangle((1e300, 1e300), (math.inf, math.inf))]
+            for _ in range(40):
+                for rectangle in rectangles:
+                    cache.search_in_rectangle(rectangle)
+                point = random.choice([(random.uniform(-10, 110), random.uniform(-10, 110)), (random.choice([0, 6.25, 50]), random.uniform(0, 100))])
+                if cache.if_contains(point):
+                    cache.remove(point)
+                else:
+                    cache.insert(point)
+                for rectangle in rectangles:
+                    self.assertCountEqual(cache.search_in_rectangle(rectangle), tree.search_in_rectangle(rectangle))
+            self.assertGreater(cache.stats()["invalidations"], 0)
+            self.assertGreater(len(cache._wide), 0)
+            cache.clear()
+            self.assertEqual((cache._buckets, cache._wide), ({}, set()))
+        cache = QueryCache(KdTree(self.points), max_bytes=3000)
+        for x in range(50):
+            cache.search_in_rectangle(Rectangle((x, 0), (x + 5, 5)))
+        cached = {key for key in cache._entries if key[0] == "rectangle"}
+        self.assertEqual(set().union(*cache._buckets.values()) | cache._wide, cached)
+
+if __name__ == "__main__":
+    unittest.main()
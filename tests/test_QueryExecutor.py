@@ -0,0 +1,71 @@
+import unittest
+import random
+from utilities.Rectangle import Rectangle, Point
+from KdTree import KdTree
+from QuadTree import QuadTree
+from QueryExecutor import QueryExecutor
+
+class TestQueryExecutor(unittest.TestCase):
+    def setUp(self):
+        random.seed(6)
+        self.points = list(dict.fromkeys((random.uniform(0, 100), random.uniform(0, 100)) for _ in range(800)))
+        self.rectangles = []
+        for _ in range(100):
+            x, y = random.uniform(0, 90), random.uniform(0, 90)
+            self.rectangles.append(Rectangle((x, y), (x + random.uniform(0, 40), y + random.uniform(0, 40))))
+        self.queries = self.points[::10] + [(random.uniform(0, 100), random.uniform(0, 100)) for _ in range(80)]
+
+    def test_matches_serial(self):
+        trees = (KdTree(self.points, points_in_node=True, leaf_size=4), QuadTree(self.points, 4), QuadTree(self.points, 2, compressed=True))
+        for tree in trees:
+            for pool in ("process", "thread"):
+                with QueryExecutor(tree, workers=2, pool=pool, chunk_size=7) as executor:
+                    results = list(executor.search(iter(self.rectangles), raw=True))
+                    self.assertEqual(len(results), len(self.rectangles))
+                    for result, rectangle in zip(results, self.rectangles):
+                        self.assertEqual(result, tree.search_in_rectangle(rectangle, raw=True))
+                    for result, rectangle in zip(executor.search(self.rectangles[:3]), self.rectangles[:3]):
+                        self.assertEqual(result, tree.search_in_rectangle(rectangle))
+                        self.assertTrue(all(isinstance(point, Point) for point in result))
+                    self.assertEqual(list(executor.contains(Point(point) for point in self.queries)),
+                                     [tree.if_contains(point) for point in self.queries])
+                    self.assertEqual(list(executor.search([])), [])
+                    stats = executor.stats()
+                    self.assertEqual(stats["queries"], len(self.rectangles) + 3 + len(self.queries))
+                    self.assertEqual(stats["chunks"], 15 + 1 + 23)
+                    self.assertGreater(stats["throughput"], 0)
+                    self.assertLessEqual(stats["latency"]["p50"], stats["latency"]["max"])
+
+    def test_matches_serial_after_updates(self):
+        trees = (KdTree(self.points, points_in_node=True, leaf_size=2), QuadTree(self.points, 2, points_in_node=True),
+                 QuadTree(self.points, 2, points_in_node=True, compressed=True))
+        for tree in trees:
+            for point in self.points[::4]:
+                tree.remove(point)
+            for _ in range(200):
+                tree.insert((random.uniform(-20, 120), random.uniform(-20, 120)))
+            with QueryExecutor(tree, workers=2, pool="thread", chunk_size=9) as executor:
+                for result, rectangle in zip(executor.search(self.rectangles, raw=True), self.rectangles):
+                    self.assertEqual(result, tree.search_in_rectangle(rectangle, raw=True))
+
+    def test_shared_memory_released(self):
+        tree = KdTree(self.points)
+        executor = QueryExecutor(tree, workers=2)
+        name = executor._shared.name
+        self.assertEqual(len(list(executor.search(self.rectangles[:5]))), 5)
+        executor.close()
+        with self.assertRaises(FileNotFoundError):
+            KdTree.attach(name)
+
+    def test_invalid(self):
+        tree = KdTree(self.points)
+        with QueryExecutor(tree, workers=1, pool="thread") as executor:
+            with self.assertRaises(ValueError):
+                list(executor.search([Rectangle((0, 0, 0), (1, 1, 1))]))
+            self.assertEqual(executor.stats()["latency"], {})
+        for arguments in ({"pool": "fiber"}, {"workers": 0}, {"chunk_size": 0}):
+            with self.assertRaises(ValueError):
+                QueryExecutor(tree, **arguments)
+
+if __name__ == "__main__":
+    unittest.main()
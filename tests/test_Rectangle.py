@@ -1,4 +1,5 @@
 import unittest
+import random
 from utilities.Rectangle import Rectangle, Point
 
 class TestRectangle(unittest.TestCase):
@@ -78,3 +79,41 @@ class TestRectangle(unittest.TestCase):
         opposite2 = r.opposite(Point([2, 3]), False)
         self.assertEqual(opposite1, ((1, 3), (3,3)))
         self.assertEqual(opposite2, ((2,2), (2,4)))
+
+    def test_distance(self):
+        r = Rectangle(Point([1, 2]), Point([3, 4]))
+        self.assertEqual(r.distance(Point([2, 3])), 0)
+        self.assertEqual(r.distance(Point([3, 5])), 1)
+        self.assertEqual(r.distance(Point([6, 8])), 5)
+        self.assertEqual(r.distance((0, 3)), 1)
+
+    def test_max_distance(self):
+        r = Rectangle(Point([1, 2]), Point([3, 4]))
+        self.assertEqual(r.max_distance(Point([2, 3]), "chebyshev"), 1)
+        self.assertEqual(r.max_distance(Point([0, 0]), "manhattan"), 7)
+        self.assertEqual(r.max_distance(Point([-1, 1])), 5)
+        self.assertEqual(r.distance(Point([5, 5]), "manhattan"), 3)
+
+    def test_orthant(self):
+        r = Rectangle(Point([0, 0, 0]), Point([2, 4, 6]))
+        self.assertEqual(r.orthant(0), Rectangle((0, 0, 0), (1, 2, 3)))
+        self.assertEqual(r.orthant(0b101), Rectangle((1, 0, 3), (2, 2, 6)))
+        self.assertEqual(r.orthant(0b010, Point([1, 1, 1])), Rectangle((0, 1, 0), (1, 4, 1)))
+        q = Rectangle(Point([1, 2]), Point([3, 4]))
+        self.assertEqual([q.orthant(number) for number in (0, 1, 3, 2)], q.to_quaters())
+
+    def test_unchecked(self):
+        random.seed(2)
+        for _ in range(200):
+            a = Rectangle.from_points([(random.randint(0, 9), random.randint(0, 9)) for _ in range(2)])
+            b = Rectangle.from_points([(random.randint(0, 9), random.randint(0, 9)) for _ in range(2)])
+            point = Point([random.randint(0, 9), random.randint(0, 9)])
+            self.assertEqual(a._contains_point(point), a.lowerleft.precedes(point) and a.upperright.follows(point))
+            self.assertEqual(a._contains_rectangle(b), a.lowerleft.precedes(b.lowerleft) and a.upperright.follows(b.upperright))
+            self.assertEqual(a._intersects(b), a.lowerleft.precedes(b.upperright) and a.upperright.follows(b.lowerleft))
+            self.assertEqual(a._to_quaters(a.center()), a.to_quaters())
+            self.assertEqual([a._orthant(number, a.center()) for number in range(4)], [a.orthant(number) for number in range(4)])
+        with self.assertRaises(ValueError):
+            Rectangle((0, 0), (1, 1)).contains((0, 0, 0))
+        with self.assertRaises(ValueError):
+            Rectangle((0, 0), (1, 1)).contains(Rectangle((0, 0, 0), (1, 1, 1)))
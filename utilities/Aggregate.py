@@ -0,0 +1,28 @@
+from collections import namedtuple
+
+class Aggregate(namedtuple("Aggregate", ["count", "sum", "min", "max"])):
+    """
+    Count, sum, minimum and maximum of the weights of a set of points
+    min and max are None for an empty set
+    """
+    __slots__ = ()
+
+    @classmethod
+    def empty(cls):
+        return cls(0, 0, None, None)
+
+    @classmethod
+    def of(cls, weight):
+        return cls(1, weight, weight, weight)
+
+    def merge(self, other):
+        """
+        Combine the aggregates of two disjoint sets of points
+        @param other: another aggregate
+        @return: aggregate of the union of both sets
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        return Aggregate(self.count + other.count, self.sum + other.sum, min(self.min, other.min), max(self.max, other.max))
@@ -0,0 +1,307 @@
+from multiprocessing.shared_memory import SharedMemory
+import json
+
+import numpy as np
+
+MAGIC = b"TREEARR\0"
+VERSION = 1
+
+def expand(starts, ends):
+    """
+    Concatenate the ranges [starts[i], ends[i])
+    @return: array of positions
+    """
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return offsets + np.arange(total, dtype=np.int64)
+
+def as_rectangles(rectangles, dimension):
+    """
+    Convert rectangles to two arrays of lower-left and upper-right corners
+    @param rectangles: Rectangle objects or an array-like of shape (m, 2, dimension)
+    @return: a tuple of two (m, dimension) arrays
+    raises ValueError if the rectangles have a different dimension or a lower-left corner does not precede the upper-right one
+    """
+    if len(rectangles) and hasattr(rectangles[0], "lowerleft"):
+        rectangles = [(rectangle.lowerleft._point, rectangle.upperright._point) for rectangle in rectangles]
+    rectangles = np.asarray(rectangles, dtype=np.float64)
+    if len(rectangles) == 0:
+        rectangles = rectangles.reshape(0, 2, dimension)
+    if rectangles.ndim != 3 or rectangles.shape[1:] != (2, dimension):
+        raise ValueError(f"The rectangles must have shape (m, 2, {dimension}).")
+    if np.any(rectangles[:, 0] > rectangles[:, 1]):
+        raise ValueError("LowerLeft point must precede the UpperRight point.")
+    return rectangles[:, 0], rectangles[:, 1]
+
+def as_points(points, dimension):
+    """
+    Convert points to an (m, dimension) array
+    raises ValueError if the points have a different dimension
+    """
+    points = np.asarray([tuple(point) for point in points] if len(points) and hasattr(points[0], "point") else points, dtype=np.float64)
+    if len(points) == 0:
+        points = points.reshape(0, dimension)
+    if points.ndim != 2 or points.shape[1] != dimension:
+        raise ValueError(f"The points must have shape (m, {dimension}).")
+    return points
+
+def as_unique_rows(array):
+    """
+    Check that the rows of an (n, d) float32/float64 array, or of any buffer-protocol object, are valid unique points
+    The checks run on the array itself, it is not copied
+    @param array: array-like of shape (n, d), rows being distinct finite points
+    @return: a tuple of the array and the lower and upper bounds of its rows as tuples
+    raises ValueError if the array is empty, has a different shape or type, or its rows are not finite and unique
+    """
+    array = np.asarray(array)
+    if array.ndim != 2 or array.shape[1] < 1:
+        raise ValueError("The points must have shape (n, d).")
+    if len(array) == 0:
+        raise ValueError("The list of points is empty.")
+    if array.dtype not in (np.float32, np.float64):
+        raise ValueError("The points must be float32 or float64.")
+    if not np.isfinite(array).all():
+        raise ValueError("The points must be finite.")
+    # sorted rows are unique when no two neighbours are equal, compared one column at a time
+    order = np.lexsort(array.T[::-1])
+    equal = np.ones(len(array) - 1, dtype=bool)
+    for column in array.T:
+        values = column[order]
+        equal &= values[1:] == values[:-1]
+    if equal.any():
+        raise ValueError("The points are not unique.")
+    return array, tuple(array.min(axis=0).tolist()), tuple(array.max(axis=0).tolist())
+
+class NodeArrays:
+    """
+    Array snapshot of a tree used to answer many queries in one traversal.
+    Node i has the rectangle [lower[i], upper[i]] and the children children[i] (-1 where missing), it covers
+    the points points[start[i]:end[i]] and index maps these positions to the order in which the points
+    were given to the tree. split[i] holds the coordinates the node splits at (NaN on axes it does not split),
+    a point goes to the child whose number has a bit set for every split axis on which the point is greater,
+    the first split axis being the least significant bit as in Rectangle.orthant.
+    Queries travel down together as (query, node) pairs, so each level of the tree is tested once for all
+    queries that reach it.
+    """
+    _names = ("lower", "upper", "children", "leaf", "split", "weights", "start", "end", "points", "index")
+
+    def __init__(self, lower, upper, children, split, start, end, points, index, leaf=None, weights=None):
+        self.lower = lower
+        self.upper = upper
+        self.children = children
+        self.leaf = np.all(children < 0, axis=1) if leaf is None else leaf
+        self.split = split
+        if weights is None:
+            valid = ~np.isnan(split)
+            weights = np.where(valid, 2 ** (valid.cumsum(axis=1) - valid), 0)
+        self.weights = weights
+        self.start = start
+        self.end = end
+        self.points = points
+        self.index = index
+
+    @classmethod
+    def from_nodes(cls, root, children, split, leaf_points, positions):
+        """
+        Flatten a tree of node objects
+        @param root: root node, every node has a _rectangle
+        @param children: function returning the children of a node (None for a missing one) or None for a leaf
+        @param split: function returning the split coordinates of an inner node, None on axes it does not split
+        @param leaf_points: function returning the points stored in a leaf
+        @param positions: dict mapping every point to its position in the input of the tree
+        @return: NodeArrays of the tree
+        """
+        rectangles, splits, kids, points, start = [], [], [], [], []
+        stack = [(root, -1, 0)]
+        while stack:
+            node, parent, slot = stack.pop()
+            if parent >= 0:
+                kids[parent][slot] = len(kids)
+            rectangles.append((node._rectangle.lowerleft._point, node._rectangle.upperright._point))
+            start.append(len(points))
+            below = children(node)
+            if below is None:
+                kids.append([])
+                splits.append([None] * len(node._rectangle))
+                points.extend(leaf_points(node))
+                continue
+            kids.append([-1] * len(below))
+            splits.append(split(node))
+            for slot in reversed(range(len(below))):
+                if below[slot] is not None:
+                    stack.append((below[slot], len(kids) - 1, slot))
+        # children are numbered after their parent, so the ends can be filled from the last node backwards
+        end = start[1:] + [len(points)]
+        for node in reversed(range(len(kids))):
+            if kids[node]:
+                end[node] = max(end[child] for child in kids[node] if child >= 0)
+        width = max(len(row) for row in kids)
+        rectangles = np.array(rectangles, dtype=np.float64)
+        return cls(rectangles[:, 0], rectangles[:, 1],
+                   np.array([row + [-1] * (width - len(row)) for row in kids], dtype=np.int64).reshape(len(kids), width),
+                   np.array(splits, dtype=np.float64), np.array(start, dtype=np.int64), np.array(end, dtype=np.int64),
+                   np.array([point._point for point in points], dtype=np.float64).reshape(len(points), len(root._rectangle)),
+                   np.array([positions[point] for point in points], dtype=np.int64))
+
+    def save(self, path, metadata):
+        """
+        Write the arrays to a file that load can map without reading it
+        @param path: path of the file
+        @param metadata: JSON-serialisable dict stored with the arrays
+        The file starts with MAGIC, the format VERSION and the length of a JSON header (two little-endian uint32),
+        followed by the header describing every array (dtype, shape, offset) and the arrays, each aligned to 64 bytes.
+        """
+        head, arrays, offsets, size = self._layout(metadata)
+        with open(path, "wb") as file:
+            file.write(head)
+            for name, array in arrays.items():
+                file.seek(offsets[name])
+                file.write(array.tobytes())
+            file.truncate(size)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Read a file written by save
+        @param mmap: map the arrays read-only with numpy.memmap instead of reading them into memory
+        @return: a tuple of the metadata and NodeArrays
+        raises ValueError if the file is not in this format or has a different version
+        """
+        with open(path, "rb") as file:
+            header, start = cls._header(file.read)
+            arrays = {}
+            for name, array in header["arrays"].items():
+                shape, dtype = tuple(array["shape"]), np.dtype(array["dtype"])
+                if mmap and 0 not in shape:
+                    arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=start + array["offset"], shape=shape)
+                else:
+                    file.seek(start + array["offset"])
+                    arrays[name] = np.fromfile(file, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+        return header["metadata"], cls(**arrays)
+
+    def share(self, metadata, name=None):
+        """
+        Copy the arrays into a new block of shared memory, laid out like the file written by save
+        @param name: name of the block, a random one by default
+        @return: the SharedMemory, whose owner has to close and unlink it once no process needs it
+        """
+        head, arrays, offsets, size = self._layout(metadata)
+        shared = SharedMemory(name=name, create=True, size=size)
+        shared.buf[:len(head)] = head
+        for name, array in arrays.items():
+            np.ndarray(array.shape, array.dtype, buffer=shared.buf, offset=offsets[name])[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, shared):
+        """
+        Read-only views of the arrays in a block of shared memory written by share, nothing is copied
+        @param shared: SharedMemory attached by the calling process
+        @return: a tuple of the metadata and NodeArrays
+        raises ValueError if the block does not hold arrays in this format or has a different version
+        """
+        position = 0
+        def read(size):
+            nonlocal position
+            position += size
+            return bytes(shared.buf[position - size:position])
+        header, start = cls._header(read)
+        arrays = {}
+        for name, array in header["arrays"].items():
+            arrays[name] = np.ndarray(tuple(array["shape"]), np.dtype(array["dtype"]), buffer=shared.buf, offset=start + array["offset"])
+            arrays[name].flags.writeable = False
+        return header["metadata"], cls(**arrays)
+
+    # the bytes before the first array, the arrays, where each of them starts and the total size
+    def _layout(self, metadata):
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in self._names}
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset += -(-array.nbytes // 64) * 64
+        header = json.dumps({"metadata": metadata, "arrays": layout}).encode()
+        start = -(-(len(MAGIC) + 8 + len(header)) // 64) * 64
+        head = MAGIC + np.array([VERSION, len(header)], dtype="<u4").tobytes() + header
+        return head, arrays, {name: start + layout[name]["offset"] for name in arrays}, max(start + offset, 1)
+
+    # header written by _layout, read through a function returning the next bytes, and where the arrays start
+    @staticmethod
+    def _header(read):
+        head = read(len(MAGIC) + 8)
+        if len(head) < len(MAGIC) + 8 or head[:len(MAGIC)] != MAGIC:
+            raise ValueError("The file does not hold a saved tree.")
+        version, length = np.frombuffer(head[len(MAGIC):], dtype="<u4").tolist()
+        if version != VERSION:
+            raise ValueError(f"The file has format version {version}, expected {VERSION}.")
+        return json.loads(read(length)), -(-(len(MAGIC) + 8 + length) // 64) * 64
+
+    def search_rectangles(self, lower, upper):
+        """
+        Find the points in every rectangle [lower[i], upper[i]]
+        @return: offsets and indices, the points of rectangle i are indices[offsets[i]:offsets[i+1]]
+        """
+        offsets, positions = self.search_positions(lower, upper)
+        return offsets, self.index[positions]
+
+    def search_positions(self, lower, upper):
+        """
+        Find the points in every rectangle [lower[i], upper[i]] as positions in the points array
+        @return: offsets and positions, the points of rectangle i are points[positions[offsets[i]:offsets[i+1]]]
+        """
+        queries = np.arange(len(lower))
+        nodes = np.zeros(len(lower), dtype=np.int64)
+        found_queries, found_starts, found_ends = [], [], []
+        while len(nodes):
+            node_lower, node_upper = self.lower[nodes], self.upper[nodes]
+            query_lower, query_upper = lower[queries], upper[queries]
+            intersects = np.all((node_lower <= query_upper) & (node_upper >= query_lower), axis=1)
+            contained = np.all((node_lower >= query_lower) & (node_upper <= query_upper), axis=1) & intersects
+            found_queries.append(queries[contained])
+            found_starts.append(self.start[nodes[contained]])
+            found_ends.append(self.end[nodes[contained]])
+            rest = intersects & ~contained
+            leaf = rest & self.leaf[nodes]
+            if leaf.any():
+                owner = np.repeat(queries[leaf], self.end[nodes[leaf]] - self.start[nodes[leaf]])
+                hits = expand(self.start[nodes[leaf]], self.end[nodes[leaf]])
+                points = self.points[hits]
+                inside = np.all((points >= lower[owner]) & (points <= upper[owner]), axis=1)
+                found_queries.append(owner[inside])
+                found_starts.append(hits[inside])
+                found_ends.append(hits[inside] + 1)
+            internal = rest & ~leaf
+            children = self.children[nodes[internal]]
+            queries = np.repeat(queries[internal], children.shape[1])
+            nodes = children.ravel()
+            queries, nodes = queries[nodes >= 0], nodes[nodes >= 0]
+        queries = np.concatenate(found_queries)
+        starts = np.concatenate(found_starts)
+        ends = np.concatenate(found_ends)
+        order = np.lexsort((starts, queries))
+        queries, starts, ends = queries[order], starts[order], ends[order]
+        offsets = np.zeros(len(lower) + 1, dtype=np.int64)
+        np.add.at(offsets, queries + 1, ends - starts)
+        return np.cumsum(offsets), expand(starts, ends)
+
+    def contains(self, points):
+        """
+        Check which of the points are stored in the tree
+        @return: boolean array
+        """
+        result = np.zeros(len(points), dtype=bool)
+        queries = np.flatnonzero(np.all((points >= self.lower[0]) & (points <= self.upper[0]), axis=1))
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        while len(queries):
+            leaf = self.leaf[nodes]
+            if leaf.any():
+                owner = np.repeat(queries[leaf], self.end[nodes[leaf]] - self.start[nodes[leaf]])
+                hits = expand(self.start[nodes[leaf]], self.end[nodes[leaf]])
+                result[owner[np.all(self.points[hits] == points[owner], axis=1)]] = True
+            queries, nodes = queries[~leaf], nodes[~leaf]
+            slots = np.sum((points[queries] > self.split[nodes]) * self.weights[nodes], axis=1)
+            nodes = self.children[nodes, slots]
+            queries, nodes = queries[nodes >= 0], nodes[nodes >= 0]
+        return result
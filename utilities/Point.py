@@ -1,11 +1,29 @@
 from math import sqrt
 
+# distance between two points from the absolute differences of their coordinates
+METRICS = {
+    "euclidean": lambda gaps: sqrt(sum(gap ** 2 for gap in gaps)),
+    "manhattan": lambda gaps: sum(gaps),
+    "chebyshev": lambda gaps: max(gaps),
+}
+
 class Point:
+    __slots__ = ("_point",)
+
     def __init__(self, point):
         if len(point) < 1:
             raise ValueError("Point must have at least one dimension")
         self._point = tuple(point)
 
+    @classmethod
+    def _of(cls, coordinates):
+        """
+        Create a point from a non-empty tuple of coordinates without validation, for the internals of the trees
+        """
+        point = object.__new__(cls)
+        point._point = coordinates
+        return point
+
     def __eq__(self, other):
         if not isinstance(other, Point):
             return Point(other) == self
@@ -62,12 +80,14 @@ class Point:
             raise ValueError("Can only compare Points of the same dimensionality")
         return all(x1 <= x2 for x1, x2 in zip(self._point, other._point))
     
-    def distance(self, other):
+    def distance(self, other, metric="euclidean"):
         if not isinstance(other, Point):
             other = Point(other)
         if len(self) != len(other):
             raise ValueError("Can only compare Points of the same dimensionality")
-        return sqrt(sum((x1 - x2) ** 2 for x1, x2 in zip(self._point, other._point)))
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {list(METRICS)}")
+        return METRICS[metric](abs(x1 - x2) for x1, x2 in zip(self._point, other._point))
     
     def minimum(self, other):
         if not isinstance(other, Point):
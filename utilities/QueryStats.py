@@ -0,0 +1,52 @@
+from collections import namedtuple
+
+class QueryStats(namedtuple("QueryStats", ["queries", "nodes", "pruned", "accepted", "scanned", "returned", "seconds"])):
+    """
+    Work done by traced rectangle queries: the nodes visited, the subtrees pruned because they do not intersect
+    the rectangle, the subtrees accepted whole because the rectangle contains them, the points of the leaves
+    checked against the rectangle, the points returned or counted and the wall time in seconds
+    """
+    __slots__ = ()
+
+    @classmethod
+    def empty(cls):
+        return cls(0, 0, 0, 0, 0, 0, 0.0)
+
+    def merge(self, other):
+        """
+        Add up the work of two sets of queries
+        @param other: another QueryStats
+        @return: QueryStats of both sets
+        """
+        return QueryStats(*(mine + theirs for mine, theirs in zip(self, other)))
+
+class QueryTracer:
+    """
+    Sampling of the rectangle queries of a tree: every sample-th query is traced, its QueryStats are added
+    to totals and passed to callback(kind, rectangle, stats), kind being "search" or "count"
+    """
+    __slots__ = ("callback", "sample", "totals", "_skipped")
+
+    def __init__(self, callback=None, sample=1):
+        if sample < 1:
+            raise ValueError("The sampling interval must be at least 1.")
+        self.callback = callback
+        self.sample = sample
+        self.totals = QueryStats.empty()
+        self._skipped = 0
+
+    def sampled(self):
+        """
+        Decide if the next query is traced
+        @return: True for every sample-th call
+        """
+        self._skipped += 1
+        if self._skipped < self.sample:
+            return False
+        self._skipped = 0
+        return True
+
+    def record(self, kind, rectangle, stats):
+        self.totals = self.totals.merge(stats)
+        if self.callback is not None:
+            self.callback(kind, rectangle, stats)
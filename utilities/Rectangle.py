@@ -1,8 +1,10 @@
-from utilities.Point import Point
+from utilities.Point import Point, METRICS
 
-from functools import reduce
+from itertools import product
 
 class Rectangle:
+    __slots__ = ("_lowerleft", "_upperright")
+
     def __init__(self, lowerleft, upperright):
         if not isinstance(lowerleft, Point):
             lowerleft = Point(lowerleft)
@@ -15,6 +17,16 @@ class Rectangle:
         self._lowerleft = lowerleft
         self._upperright = upperright
 
+    @classmethod
+    def _of(cls, lowerleft, upperright):
+        """
+        Create a rectangle from two points of the same dimension, lowerleft preceding upperright, without validation
+        """
+        rectangle = object.__new__(cls)
+        rectangle._lowerleft = lowerleft
+        rectangle._upperright = upperright
+        return rectangle
+
     def __eq__(self, other):
         if not isinstance(other, Rectangle):
             return False
@@ -50,14 +62,11 @@ class Rectangle:
         """
         if not points:
             raise ValueError("Cannot create a Rectangle from an empty list of points")
-        for point in points:
-            if not isinstance(point, Point):
-                point = Point(point)
-        if not all(len(p) == len(points[0]) for p in points):
+        coordinates = [point._point if isinstance(point, Point) else Point(point)._point for point in points]
+        if not all(len(p) == len(coordinates[0]) for p in coordinates):
             raise ValueError("All points must have the same dimensionality")
-        lowerleft = reduce(lambda p1, p2: p1.minimum(p2), points)
-        upperright = reduce(lambda p1, p2: p1.maximum(p2), points)
-        return cls(lowerleft, upperright)
+        axes = list(zip(*coordinates))
+        return cls._of(Point._of(tuple(map(min, axes))), Point._of(tuple(map(max, axes))))
     
     def does_intersect(self, other):
         """
@@ -70,7 +79,7 @@ class Rectangle:
             raise ValueError("Can only check intersection with another Rectangle")
         if len(self) != len(other):
             raise ValueError("Can only check intersection with a Rectangle of the same dimensionality")
-        return self.lowerleft.precedes(other.upperright) and self.upperright.follows(other.lowerleft)
+        return self._intersects(other)
 
     def contains(self, object):
         """
@@ -79,11 +88,65 @@ class Rectangle:
         @return: True if the point/rectangle is fully contained in the rectangle, False otherwise
         """
         if isinstance(object, Rectangle):
-            return self.lowerleft.precedes(object.lowerleft) and self.upperright.follows(object.upperright)
-        else:
-            if not isinstance(object, Point):
-                object = Point(object)
-            return self.lowerleft.precedes(object) and self.upperright.follows(object)
+            if len(self) != len(object):
+                raise ValueError("Can only compare Points of the same dimensionality")
+            return self._contains_rectangle(object)
+        if not isinstance(object, Point):
+            object = Point(object)
+        if len(self) != len(object):
+            raise ValueError("Can only compare Points of the same dimensionality")
+        return self._contains_point(object)
+
+    # unchecked versions of contains and does_intersect for the internals of the trees,
+    # the arguments must be a Point or a Rectangle of the same dimension
+    def _contains_point(self, point):
+        for low, value, high in zip(self._lowerleft._point, point._point, self._upperright._point):
+            if not low <= value <= high:
+                return False
+        return True
+
+    def _contains_rectangle(self, other):
+        for low, other_low, other_high, high in zip(self._lowerleft._point, other._lowerleft._point, other._upperright._point, self._upperright._point):
+            if other_low < low or other_high > high:
+                return False
+        return True
+
+    def _intersects(self, other):
+        for low, other_low, other_high, high in zip(self._lowerleft._point, other._lowerleft._point, other._upperright._point, self._upperright._point):
+            if other_high < low or other_low > high:
+                return False
+        return True
+
+    def distance(self, point, metric="euclidean"):
+        """
+        Compute the distance between a point and the closest point of the rectangle
+        @param point: a point
+        @param metric: "euclidean", "manhattan" or "chebyshev"
+        @return: 0 if the point lies in the rectangle, the distance to the rectangle otherwise
+        raises ValueError if the point has different dimensionality than the rectangle or the metric is unknown
+        """
+        point = self._check_metric(point, metric)
+        return METRICS[metric](max(low - x, 0, x - high) for low, x, high in zip(self._lowerleft._point, point._point, self._upperright._point))
+
+    def max_distance(self, point, metric="euclidean"):
+        """
+        Compute the distance between a point and the farthest point of the rectangle
+        @param point: a point
+        @param metric: "euclidean", "manhattan" or "chebyshev"
+        @return: the distance to the farthest vertex of the rectangle
+        raises ValueError if the point has different dimensionality than the rectangle or the metric is unknown
+        """
+        point = self._check_metric(point, metric)
+        return METRICS[metric](max(x - low, high - x) for low, x, high in zip(self._lowerleft._point, point._point, self._upperright._point))
+
+    def _check_metric(self, point, metric):
+        if not isinstance(point, Point):
+            point = Point(point)
+        if len(point) != len(self):
+            raise ValueError("Can only compute distance to a Point of the same dimensionality")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric}, expected one of {list(METRICS)}")
+        return point
 
     def divide(self, dimension, value):
         """
@@ -97,10 +160,10 @@ class Rectangle:
             raise ValueError(f"Dimension must be between 0 and {len(self)-1}")
         if value < self.lowerleft[dimension] or value > self.upperright[dimension]:
             raise ValueError(f"Value must be between {self.lowerleft[dimension]} and {self.upperright[dimension]}")
-        ll1, ur1 = self.lowerleft.point, self.upperright.point
-        ll2, ur2 = self.lowerleft.point, self.upperright.point
-        ll2[dimension] = ur1[dimension] = value
-        return Rectangle(ll1, ur1), Rectangle(ll2, ur2)
+        lower, upper = self._lowerleft._point, self._upperright._point
+        middle_upper = upper[:dimension] + (value,) + upper[dimension+1:]
+        middle_lower = lower[:dimension] + (value,) + lower[dimension+1:]
+        return Rectangle._of(self._lowerleft, Point._of(middle_upper)), Rectangle._of(Point._of(middle_lower), self._upperright)
 
     def intersection(self, other):
         """
@@ -113,11 +176,11 @@ class Rectangle:
             raise ValueError("Can only compute intersection with another Rectangle")
         if len(self) != len(other):
             raise ValueError("Can only compute intersection with a Rectangle of the same dimensionality")
-        if not self.does_intersect(other):
+        if not self._intersects(other):
             return None
-        ll = self.lowerleft.maximum(other.lowerleft)
-        ur = self.upperright.minimum(other.upperright)
-        return Rectangle(ll, ur)
+        lowerleft = tuple(map(max, self._lowerleft._point, other._lowerleft._point))
+        upperright = tuple(map(min, self._upperright._point, other._upperright._point))
+        return Rectangle._of(Point._of(lowerleft), Point._of(upperright))
     
     @property
     def vertices2D(self):
@@ -144,18 +207,59 @@ class Rectangle:
         """
         Compute the center of the rectangle
         """
-        return Point([self.lowerleft[i] + (self.upperright[i] - self.lowerleft[i])/2 for i in range(len(self))])
+        return Point._of(tuple(low + (high - low)/2 for low, high in zip(self._lowerleft._point, self._upperright._point)))
     
-    def to_quaters(self):
+    def orthant(self, number, center=None):
+        """
+        Compute one of the 2^d rectangles the rectangle is divided into by the hyperplanes through a point
+        @param number: bit i is set for the upper half along dimension i
+        @param center: the point where the orthants meet, the center of the rectangle by default
+        @return: a rectangle
+        """
+        if center is None:
+            center = self.center()
+        lowerleft = [center[i] if number >> i & 1 else self.lowerleft[i] for i in range(len(self))]
+        upperright = [self.upperright[i] if number >> i & 1 else center[i] for i in range(len(self))]
+        return Rectangle(lowerleft, upperright)
+
+    def _orthant(self, number, center):
+        # orthant without validation, center being a Point inside the rectangle
+        lowerleft = tuple(value if number >> i & 1 else low for i, (low, value) in enumerate(zip(self._lowerleft._point, center._point)))
+        upperright = tuple(high if number >> i & 1 else value for i, (value, high) in enumerate(zip(center._point, self._upperright._point)))
+        return Rectangle._of(Point._of(lowerleft), Point._of(upperright))
+
+    def _orthants(self, center):
+        # all 2^d orthants without validation, in the order of their numbers
+        if len(center) == 2:
+            left_down, right_down, right_up, left_up = self._to_quaters(center)
+            return [left_down, right_down, left_up, right_up]
+        halves = [((low, value), (value, high)) for low, value, high in zip(self._lowerleft._point, center._point, self._upperright._point)]
+        orthants = []
+        for sides in product(*reversed(halves)):
+            sides = sides[::-1]
+            orthants.append(Rectangle._of(Point._of(tuple(low for low, _ in sides)), Point._of(tuple(high for _, high in sides))))
+        return orthants
+
+    def to_quaters(self, center=None):
         """
         Divide rectangle into equal 4 quaters [2d only]
+        @param center: the point where the quaters meet, the center of the rectangle by default
         """
         if len(self) != 2:
             raise ValueError("Can only compute vertices of a 2D rectangle")
         ll = self.lowerleft
         ur = self.upperright
-        center = self.center()
+        if center is None:
+            center = self.center()
         return [Rectangle(ll, center), 
                 Rectangle(Point([center[0], ll[1]]), Point([ur[0], center[1]])), 
-                Rectangle(self.center(), ur), 
+                Rectangle(center, ur), 
                 Rectangle(Point([ll[0], center[1]]), Point([center[0], ur[1]]))]
+
+    def _to_quaters(self, center):
+        # to_quaters without validation, center being a Point inside the 2D rectangle
+        (left, down), (x, y), (right, up) = self._lowerleft._point, center._point, self._upperright._point
+        return [Rectangle._of(self._lowerleft, center),
+                Rectangle._of(Point._of((x, down)), Point._of((right, y))),
+                Rectangle._of(center, self._upperright),
+                Rectangle._of(Point._of((left, y)), Point._of((x, up)))]